@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - registers the signal receivers
+        from django.conf import settings
+        if settings.BACKTEST_TRACE_MEMORY:
+            from .instrumentation import start_memory_tracing
+            start_memory_tracing()
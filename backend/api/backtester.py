@@ -1,8 +1,13 @@
 # backend/api/backtester.py
 import pandas as pd
-import operator
 import numpy as np
 
+from .downsampling import DOWNSAMPLE_METHODS, downsample_indices
+from .indicators import add_indicators_to_data, indicator_column, indicator_params
+from .instrumentation import StageTimings
+from .performance import format_stat, performance_stats, rolling_series
+from .strategy_plan import SIGNAL_CODES, SIGNAL_HOLD, SIGNAL_LONG, SIGNAL_NAMES, StrategyPlan, compile_strategy
+
 def validate_strategy_config(config: dict) -> None:
     """Validate strategy configuration before running backtest."""
     if not isinstance(config, dict):
@@ -31,6 +36,14 @@ def validate_strategy_config(config: dict) -> None:
         
         if condition['indicator'] not in ['RSI', 'MACD', 'Close', 'SMA', 'EMA', 'Bollinger_Bands', 'Stochastic', 'Williams_R', 'ATR', 'Volume']:
             raise ValueError(f"Invalid indicator in condition {i}: {condition['indicator']}")
+        
+        # Validate indicator parameters (period, fast_period, comparePeriod, ...)
+        try:
+            indicator_params(condition['indicator'], condition)
+            if condition['operator'] in ['crosses_above', 'crosses_below']:
+                indicator_params(condition.get('compareIndicator', 'Close'), condition, compare=True)
+        except ValueError as e:
+            raise ValueError(f"Invalid parameter in condition {i}: {str(e)}")
     
     # Validate action
     if 'action' not in config:
@@ -94,11 +107,27 @@ def validate_strategy_config(config: dict) -> None:
         
         if exit_condition['operator'] not in ['less_than', 'greater_than', 'equals']:
             raise ValueError(f"Invalid operator in exit condition: {exit_condition['operator']}")
+        
+        try:
+            indicator_params(exit_condition['indicator'], exit_condition)
+        except ValueError as e:
+            raise ValueError(f"Invalid parameter in exit condition: {str(e)}")
 
-def run_backtest(data_df: pd.DataFrame, strategy_config: dict, initial_cash: float, leverage: float = 1.0):
-    """Main backtesting function with comprehensive error handling."""
-    from .indicators import add_indicators_to_data
-    
+def run_backtest(data_df: pd.DataFrame, strategy_config: dict, initial_cash: float, leverage: float = 1.0, engine: str = None,
+                 max_points: int = None, downsample: str = 'lttb', columnar: bool = False, timings: StageTimings = None,
+                 plan: StrategyPlan = None, rolling_window: int = None):
+    """
+    Main backtesting function with comprehensive error handling.
+
+    plot_data holds every bar unless max_points is given, in which case the
+    equity curve is reduced to about that many points with the downsample method.
+    With columnar=True the results are typed NumPy columns (see
+    PortfolioSimulator.columnar_results) rather than display strings.
+    Pass a StageTimings to record the indicator, signal and simulation stages.
+    A StrategyPlan compiled from strategy_config (e.g. get_strategy_plan())
+    skips validating and compiling the configuration again. With rolling_window,
+    plot_data also holds the rolling Sharpe ratio and drawdown over that many bars.
+    """
     # Validate inputs
     if data_df.empty:
         raise ValueError("Input data is empty")
@@ -106,23 +135,46 @@ def run_backtest(data_df: pd.DataFrame, strategy_config: dict, initial_cash: flo
     if initial_cash <= 0:
         raise ValueError("Initial cash must be positive")
     
+    engine = engine or DEFAULT_ENGINE
+    if engine not in SIMULATION_ENGINES:
+        raise ValueError(f"Invalid engine: {engine}. Must be one of {list(SIMULATION_ENGINES)}")
+
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Invalid downsample method: {downsample}. Must be one of {list(DOWNSAMPLE_METHODS)}")
+
+    if rolling_window is not None and rolling_window < 2:
+        raise ValueError("Rolling window must be at least 2 bars")
+    
     # Validate strategy configuration
-    validate_strategy_config(strategy_config)
+    if plan is None:
+        validate_strategy_config(strategy_config)
+        plan = compile_strategy(strategy_config)
     
+    timings = timings or StageTimings()
     try:
-        # 1. Prepare Data: Calculate all indicators first.
-        df_with_indicators = add_indicators_to_data(data_df)
+        # 1. Prepare Data: Calculate the indicators the strategy references.
+        with timings.stage('indicators') as stage:
+            df_with_indicators = add_indicators_to_data(data_df, strategy_config, specs=plan.indicators)
+            stage['rows'] = len(df_with_indicators)
         
         if df_with_indicators.empty:
             raise ValueError("No valid data after calculating indicators")
         
-        # 2. Generate Signals: Create a single column of 'BUY', 'SELL', or 'HOLD'.
-        signals = generate_signals(df_with_indicators, strategy_config)
+        # 2. Generate Signals: Create a single int8 column of LONG/SHORT/HOLD codes.
+        with timings.stage('signals') as stage:
+            signals = plan.generate_signals(df_with_indicators)
+            stage['rows'] = len(signals)
         
         # 3. Simulate Portfolio: Loop through prices and signals to simulate trades.
         exit_condition = strategy_config.get('exitCondition', {'type': 'manual'})
-        simulator = PortfolioSimulator(df_with_indicators, signals, initial_cash, leverage, exit_condition)
-        results = simulator.run_simulation()
+        with timings.stage('simulation') as stage:
+            simulator = SIMULATION_ENGINES[engine](df_with_indicators, signals, initial_cash, leverage, exit_condition,
+                                                   max_points=max_points, downsample=downsample, rolling_window=rolling_window)
+            results = simulator.run_simulation(format_results=not columnar)
+            if columnar and 'error' not in results:
+                results = simulator.columnar_results()
+            stage['rows'] = len(df_with_indicators)
+            stage['trades'] = len(simulator.trade_records)
         
         return results
         
@@ -136,175 +188,18 @@ def run_backtest(data_df: pd.DataFrame, strategy_config: dict, initial_cash: flo
 
 def generate_signals(df: pd.DataFrame, config: dict) -> pd.Series:
     """
-    Takes a DataFrame with indicators and returns a Series with trade signals.
-    This is the core of the strategy logic.
+    Takes a DataFrame with indicators and returns an int8 Series of trade signals
+    (SIGNAL_LONG, SIGNAL_SHORT or SIGNAL_HOLD).
+    This is the core of the strategy logic; see StrategyPlan for how conditions
+    are evaluated. Compile the config once with compile_strategy() when
+    generating signals for it repeatedly.
     """
-    op_map = {
-        'less_than': operator.lt,
-        'greater_than': operator.gt,
-        'equals': operator.eq,
-        'not_equals': operator.ne,
-        'crosses_above': 'crosses_above',
-        'crosses_below': 'crosses_below',
-        'between': 'between',
-        'outside': 'outside'
-    }
-    
-    # Start with a neutral signal (no action)
-    final_signal = pd.Series('HOLD', index=df.index)
-    logical_op = config.get('logicalOperator', 'AND')
-    
-    # Validate logical operator
-    if logical_op not in ['AND', 'OR']:
-        logical_op = 'AND'
-    
-    # Evaluate all conditions in a vectorized way
-    condition_signals = []
-    for cond in config.get('conditions', []):
-        indicator_name = cond.get('indicator', '').upper()
-        op_str = cond.get('operator')
-        value = cond.get('value', 0)
-        
-        condition_met = pd.Series(False, index=df.index)
-        
-        try:
-            if op_str in ['crosses_above', 'crosses_below']:
-                # Handle cross-indicator comparisons
-                compare_indicator = cond.get('compareIndicator', 'Close')
-                compare_indicator_name = compare_indicator.upper()
-                
-                # Map indicator names to column names
-                indicator_mapping = {
-                    'RSI': 'rsi',
-                    'MACD': 'macd_line',
-                    'SMA': 'sma_20',
-                    'EMA': 'ema_20',
-                    'BOLLINGER_BANDS': 'bb_middle',
-                    'STOCHASTIC': 'stoch_k',
-                    'WILLIAMS_R': 'williams_r',
-                    'ATR': 'atr',
-                    'VOLUME': 'Volume',
-                    'CLOSE': 'Close'
-                }
-                
-                # Get the main indicator column
-                main_indicator_col = indicator_mapping.get(indicator_name, 'Close')
-                compare_indicator_col = indicator_mapping.get(compare_indicator_name, 'Close')
-                
-                if main_indicator_col not in df.columns or compare_indicator_col not in df.columns:
-                    continue
-                
-                main_line = df[main_indicator_col]
-                compare_line = df[compare_indicator_col]
-                valid_mask = ~(main_line.isna() | compare_line.isna())
-                
-                if op_str == 'crosses_above':
-                    condition_met = (
-                        (main_line.shift(1) < compare_line.shift(1)) & 
-                        (main_line > compare_line) & 
-                        valid_mask
-                    )
-                else:  # crosses_below
-                    condition_met = (
-                        (main_line.shift(1) > compare_line.shift(1)) & 
-                        (main_line < compare_line) & 
-                        valid_mask
-                    )
-            elif op_str in ['between', 'outside']:
-                # Handle range operators
-                op_func = op_map.get(op_str)
-                if op_func:
-                    indicator_mapping = {
-                        'RSI': 'rsi',
-                        'MACD': 'macd_line',
-                        'SMA': 'sma_20',
-                        'EMA': 'ema_20',
-                        'BOLLINGER_BANDS': 'bb_middle',
-                        'STOCHASTIC': 'stoch_k',
-                        'WILLIAMS_R': 'williams_r',
-                        'ATR': 'atr',
-                        'VOLUME': 'Volume',
-                        'CLOSE': 'Close'
-                    }
-                    
-                    indicator_col = indicator_mapping.get(indicator_name, 'Close')
-                    
-                    if indicator_col not in df.columns:
-                        continue
-                    
-                    try:
-                        min_val = float(value)
-                        max_val = float(cond.get('compareValue', value))
-                        
-                        if op_str == 'between':
-                            condition_met = (df[indicator_col] >= min_val) & (df[indicator_col] <= max_val)
-                        else:  # outside
-                            condition_met = (df[indicator_col] < min_val) | (df[indicator_col] > max_val)
-                    except (ValueError, TypeError):
-                        continue
-            else:
-                # Handle comparison operators
-                op_func = op_map.get(op_str)
-                if op_func:
-                    # Map indicator names to column names
-                    indicator_mapping = {
-                        'RSI': 'rsi',
-                        'MACD': 'macd_line',
-                        'SMA': 'sma_20',
-                        'EMA': 'ema_20',
-                        'BOLLINGER_BANDS': 'bb_middle',  # Use middle band for comparison
-                        'STOCHASTIC': 'stoch_k',
-                        'WILLIAMS_R': 'williams_r',
-                        'ATR': 'atr',
-                        'VOLUME': 'Volume',
-                        'CLOSE': 'Close'
-                    }
-                    
-                    indicator_col = indicator_mapping.get(indicator_name, 'Close')
-                    
-                    if indicator_col not in df.columns:
-                        continue
-                    
-                    try:
-                        value = float(value)
-                        condition_met = op_func(df[indicator_col], value)
-                    except (ValueError, TypeError):
-                        continue
-
-            condition_signals.append(condition_met.fillna(False))
-            
-        except Exception as e:
-            # Skip this condition if there's an error
-            continue
-
-    # Combine the boolean Series for each condition
-    if not condition_signals:
-        return final_signal # No conditions, so no signals
-
-    if logical_op == 'AND':
-        triggered = pd.concat(condition_signals, axis=1).all(axis=1)
-    else: # OR
-        triggered = pd.concat(condition_signals, axis=1).any(axis=1)
-
-    # Create more sophisticated signal generation
-    # LONG/SHORT when conditions are met and we're not already in a position
-    # Exit when conditions are NOT met and we have a position
-    # This creates natural long/short cycles
-    
-    # Start with HOLD
-    final_signal = pd.Series('HOLD', index=df.index)
-    
-    # Apply LONG/SHORT signals where conditions are met
-    action = config.get('action', 'LONG')
-    final_signal[triggered] = action
-    
-    # We'll handle the alternating logic in the portfolio simulator
-    
-    return final_signal
+    return compile_strategy(config).generate_signals(df)
 
 class PortfolioSimulator:
-    """Simulates trades based on a signal Series and returns the results."""
-    def __init__(self, df: pd.DataFrame, signals: pd.Series, initial_cash: float, leverage: float = 1.0, exit_condition: dict = None):
+    """Simulates trades based on an int8 signal Series (see strategy_plan.SIGNAL_CODES) and returns the results."""
+    def __init__(self, df: pd.DataFrame, signals: pd.Series, initial_cash: float, leverage: float = 1.0, exit_condition: dict = None,
+                 max_points: int = None, downsample: str = 'lttb', rolling_window: int = None):
         self.df = df
         self.signals = signals
         self.initial_cash = initial_cash
@@ -313,6 +208,7 @@ class PortfolioSimulator:
         self.cash = initial_cash
         self.position = 0.0  # Positive for long, negative for short
         self.trades = []
+        self.trade_records = []  # Numeric (bar, type, price, portfolio, pnl, pnl_pct) tuples behind each trade
         self.equity_curve = []
         self.in_position = False  # Track if we're currently holding a position
         self.position_type = None  # 'LONG' or 'SHORT'
@@ -320,6 +216,9 @@ class PortfolioSimulator:
         self.entry_date = None  # Track when we entered for time-based exits
         self.highest_price = 0  # Track highest price for trailing stops (for long positions)
         self.lowest_price = float('inf')  # Track lowest price for trailing stops (for short positions)
+        self.max_points = max_points  # Plot point budget; None keeps every bar
+        self.downsample = downsample
+        self.rolling_window = rolling_window  # Bars in the rolling Sharpe/drawdown window; None skips them
 
     def should_exit_position(self, current_price: float, current_date, current_index: int) -> bool:
         """Check if we should exit the position based on exit conditions."""
@@ -331,7 +230,7 @@ class PortfolioSimulator:
         if exit_type == 'manual':
             # Manual exit: only exit when signal changes from current position type
             current_signal = self.signals.iloc[current_index]
-            return current_signal != self.position_type
+            return current_signal != SIGNAL_CODES[self.position_type]
         
         elif exit_type == 'profit_target':
             # Exit when profit target is reached
@@ -401,21 +300,7 @@ class PortfolioSimulator:
             operator = self.exit_condition.get('operator', 'greater_than')
             target_value = float(self.exit_condition.get('indicatorValue', '70'))
             
-            # Map indicator names to column names
-            indicator_mapping = {
-                'RSI': 'rsi',
-                'MACD': 'macd_line',
-                'SMA': 'sma_20',
-                'EMA': 'ema_20',
-                'Bollinger_Bands': 'bb_middle',
-                'Stochastic': 'stoch_k',
-                'Williams_R': 'williams_r',
-                'ATR': 'atr',
-                'Volume': 'Volume',
-                'Close': 'Close'
-            }
-            
-            indicator_col = indicator_mapping.get(indicator, 'Close')
+            indicator_col = indicator_column(indicator, indicator_params(indicator, self.exit_condition))
             if indicator_col in self.df.columns:
                 current_indicator_value = self.df[indicator_col].iloc[current_index]
                 if not pd.isna(current_indicator_value):
@@ -428,8 +313,13 @@ class PortfolioSimulator:
         
         return False
 
-    def run_simulation(self):
-        """Run the portfolio simulation with proper buy/sell cycles."""
+    def run_simulation(self, format_results: bool = True):
+        """
+        Run the portfolio simulation with proper buy/sell cycles.
+
+        With format_results=False the formatted stats and plot data are skipped
+        and an empty dict is returned; read equity_curve and trades instead.
+        """
         try:
             for i in range(len(self.df)):
                 current_price = self.df['Close'].iloc[i]
@@ -443,12 +333,12 @@ class PortfolioSimulator:
 
                 # Trading logic: LONG/SHORT when signal matches and we're not in position
                 # Exit when exit conditions are met
-                if signal in ['LONG', 'SHORT'] and not self.in_position and self.cash > 0 and self.equity_curve and self.equity_curve[-1] > 0:
+                if signal != SIGNAL_HOLD and not self.in_position and self.cash > 0 and self.equity_curve and self.equity_curve[-1] > 0:
                     # Enter position: use current portfolio value with leverage
                     current_portfolio_value = self.cash  # Current available cash
                     available_capital = current_portfolio_value * self.leverage
                     
-                    if signal == 'LONG':
+                    if signal == SIGNAL_LONG:
                         # Long position: buy shares
                         self.position = available_capital / current_price
                         trade_type = 'LONG'
@@ -464,7 +354,7 @@ class PortfolioSimulator:
                     max_loss_pct = 100 / self.leverage  # Maximum loss percentage before margin call
                     
                     # Calculate the maximum price movement we can handle
-                    if signal == 'LONG':
+                    if signal == SIGNAL_LONG:
                         max_price_drop = current_price * (max_loss_pct / 100)
                         min_safe_price = current_price - max_price_drop
                     else:  # SHORT
@@ -474,13 +364,13 @@ class PortfolioSimulator:
                     trade_value = available_capital  # Total value of the leveraged position
                     self.cash = 0  # All cash is used as margin
                     self.in_position = True
-                    self.position_type = signal
+                    self.position_type = SIGNAL_NAMES[signal]
                     self.entry_price = current_price  # Store entry price for P&L calculation
                     self.entry_date = current_date  # Store entry date for time-based exits
                     self.entry_portfolio_value = current_portfolio_value  # Store portfolio value at entry
                     
                     # Initialize trailing stops
-                    if signal == 'LONG':
+                    if signal == SIGNAL_LONG:
                         self.highest_price = current_price
                     else:  # SHORT
                         self.lowest_price = current_price
@@ -496,6 +386,7 @@ class PortfolioSimulator:
                         'P&L': '—',  # No P&L for entry trades
                         'Leverage': f"{self.leverage}x"
                     })
+                    self.trade_records.append((i, trade_type, current_price, portfolio_value, float('nan'), float('nan')))
                     print(f"{trade_description}, Value: ${trade_value:,.2f}, Leverage: {self.leverage}x")
                         
                 elif self.in_position and self.position != 0 and self.should_exit_position(current_price, current_date, i):
@@ -531,6 +422,7 @@ class PortfolioSimulator:
                             pnl_display = f"-${abs(pnl_amount):,.2f} ({pnl_pct:.2f}%)"
                     else:
                         pnl_display = "N/A"
+                        pnl_amount = pnl_pct = float('nan')
                     
                     # Calculate profit/loss with leverage for portfolio
                     # Use the actual portfolio value that was used for this trade
@@ -556,6 +448,7 @@ class PortfolioSimulator:
                         'P&L': pnl_display,
                         'Leverage': f"{self.leverage}x"
                     })
+                    self.trade_records.append((i, trade_type, current_price, portfolio_value, pnl_amount, pnl_pct))
                     print(f"{trade_description}, P&L: {pnl_display}, Leverage: {self.leverage}x")
                 
                 # Calculate current equity (actual portfolio value, not leveraged position value)
@@ -603,6 +496,7 @@ class PortfolioSimulator:
                                 pnl_display = f"-${abs(pnl_amount):,.2f}"
                         else:
                             pnl_display = "N/A"
+                            pnl_amount = float('nan')
                         
                         # Reset to zero cash (margin call wiped out the account)
                         self.cash = 0
@@ -618,13 +512,14 @@ class PortfolioSimulator:
                             'P&L': pnl_display,
                             'Leverage': f"{self.leverage}x"
                         })
+                        self.trade_records.append((i, trade_type, current_price, 0.0, pnl_amount, float('nan')))
                         print(f"MARGIN CALL: {trade_type} at ${current_price:.2f}, P&L: {pnl_display}")
                     
                     current_equity = 0  # Set equity to zero to prevent negative values
                 
                 self.equity_curve.append(current_equity)
             
-            return self._format_results()
+            return self._format_results() if format_results else {}
             
         except Exception as e:
             return {
@@ -647,19 +542,20 @@ class PortfolioSimulator:
         try:
             final_equity = self.equity_curve[-1]
             total_return_pct = ((final_equity - self.initial_cash) / self.initial_cash) * 100
+            plot_data = self._plot_data()
+
+            stats = {
+                'Start': self.df.index[0].strftime('%Y-%m-%d'),
+                'End': self.df.index[-1].strftime('%Y-%m-%d'),
+                'Equity Final [$]': f"{final_equity:,.2f}",
+                'Return [%]': f"{total_return_pct:.2f}",
+                '# Trades': len(self.trades)
+            }
+            stats.update({name: format_stat(value) for name, value in self._performance_stats().items()})
 
             return {
-                'stats': {
-                    'Start': self.df.index[0].strftime('%Y-%m-%d'),
-                    'End': self.df.index[-1].strftime('%Y-%m-%d'),
-                    'Equity Final [$]': f"{final_equity:,.2f}",
-                    'Return [%]': f"{total_return_pct:.2f}",
-                    '# Trades': len(self.trades)
-                },
-                'plot_data': {
-                    'equity_curve': self.equity_curve,
-                    'dates': self.df.index.strftime('%Y-%m-%d %H:%M').tolist()
-                },
+                'stats': stats,
+                'plot_data': plot_data,
                 'trades': self.trades
             }
         except Exception as e:
@@ -668,4 +564,360 @@ class PortfolioSimulator:
                 'stats': {},
                 'plot_data': {'equity_curve': [], 'dates': []},
                 'trades': []
-            }
\ No newline at end of file
+            }
+
+    def _plot_positions(self):
+        """Bar positions to plot when the equity curve is over the max_points budget, else None."""
+        if not self.max_points or len(self.equity_curve) <= self.max_points:
+            return None
+        timestamps = self.df.index[:len(self.equity_curve)].as_unit('ns').asi8
+        return downsample_indices(self.equity_curve, self.max_points, self.downsample, timestamps)
+
+    def _performance_stats(self) -> dict:
+        """Numeric risk and trade statistics (see performance.performance_stats)."""
+        records = self.trade_records
+        return performance_stats(
+            self.equity_curve,
+            self.df.index.as_unit('ns').asi8,
+            self.df['Close'].to_numpy(dtype='float64'),
+            [record[0] for record in records],
+            [record[1] for record in records],
+            [record[3] for record in records],
+            self.initial_cash,
+        )
+
+    def _rolling_series(self, positions) -> dict:
+        """Rolling Sharpe ratio and drawdown at the plotted positions, or {} without a rolling_window."""
+        if not self.rolling_window:
+            return {}
+        series = rolling_series(self.equity_curve, self.df.index.as_unit('ns').asi8, self.rolling_window)
+        if positions is not None:
+            series = {name: values[positions] for name, values in series.items()}
+        return series
+
+    def _plot_data(self) -> dict:
+        """Equity curve and bar dates for the chart, downsampled when over the max_points budget."""
+        positions = self._plot_positions()
+        if positions is None:
+            plot_data = {
+                'equity_curve': self.equity_curve,
+                'dates': self.df.index.strftime('%Y-%m-%d %H:%M').tolist()
+            }
+        else:
+            # Pick the points first so only the kept dates are formatted
+            equity = np.asarray(self.equity_curve, dtype='float64')[positions]
+            plot_data = {
+                'equity_curve': equity.tolist(),
+                'dates': self.df.index[positions].strftime('%Y-%m-%d %H:%M').tolist(),
+                'downsample': self.downsample,
+                'total_points': len(self.equity_curve)
+            }
+
+        # JSON has no NaN, so the warm-up bars of the rolling series are null
+        for name, values in self._rolling_series(positions).items():
+            column = values.astype(object)
+            column[np.isnan(values)] = None
+            plot_data[name] = column.tolist()
+        return plot_data
+
+    def columnar_results(self) -> dict:
+        """
+        Results as typed NumPy columns instead of formatted strings, for binary renderers.
+
+        Timestamps are int64 epoch milliseconds; equity, prices and P&L are float64.
+        Trade P&L is NaN where the JSON format shows '—' or 'N/A'.
+        """
+        if not self.equity_curve:
+            return {
+                'error': 'Backtest generated no data.',
+                'stats': {},
+                'plot_data': {'equity_curve': [], 'dates': []},
+                'trades': []
+            }
+
+        timestamps_ms = self.df.index.as_unit('ms').asi8
+        equity = np.asarray(self.equity_curve, dtype='float64')
+        plot_data = {}
+        positions = self._plot_positions()
+        if positions is not None:
+            plot_data = {'downsample': self.downsample, 'total_points': len(equity)}
+            equity = equity[positions]
+            plot_timestamps = timestamps_ms[positions]
+        else:
+            plot_timestamps = timestamps_ms[:len(equity)]
+        plot_data['timestamps'] = np.ascontiguousarray(plot_timestamps, dtype='<i8')
+        plot_data['equity_curve'] = equity
+        for name, values in self._rolling_series(positions).items():
+            plot_data[name] = np.ascontiguousarray(values, dtype='<f8')
+
+        records = self.trade_records
+        bars = np.fromiter((record[0] for record in records), dtype=np.int64, count=len(records))
+        final_equity = float(self.equity_curve[-1])
+        return {
+            'stats': {
+                'Start': int(timestamps_ms[0]),
+                'End': int(timestamps_ms[-1]),
+                'Equity Final [$]': final_equity,
+                'Return [%]': (final_equity - self.initial_cash) / self.initial_cash * 100,
+                '# Trades': len(records),
+                'Leverage': float(self.leverage),
+                **self._performance_stats()
+            },
+            'plot_data': plot_data,
+            'trades': {
+                'timestamp': np.ascontiguousarray(timestamps_ms[bars], dtype='<i8'),
+                'type': [record[1] for record in records],
+                'price': np.array([record[2] for record in records], dtype='<f8'),
+                'portfolio': np.array([record[3] for record in records], dtype='<f8'),
+                'pnl': np.array([record[4] for record in records], dtype='<f8'),
+                'pnl_pct': np.array([record[5] for record in records], dtype='<f8')
+            }
+        }
+
+class ArrayPortfolioSimulator(PortfolioSimulator):
+    """
+    Same trading rules as PortfolioSimulator, but prices, timestamps, signals and
+    the exit indicator are pulled out as plain arrays once, so the per-bar loop
+    only touches Python floats instead of indexing pandas objects.
+    """
+
+    def run_simulation(self, format_results: bool = True):
+        """
+        Run the portfolio simulation with proper buy/sell cycles.
+
+        With format_results=False the formatted stats and plot data are skipped
+        and an empty dict is returned; read equity_curve and trades instead.
+        """
+        try:
+            closes = self.df['Close'].to_numpy(dtype='float64').tolist()
+            timestamps = self.df.index.as_unit('ns').asi8.tolist()
+            signals = self.signals.to_numpy().tolist()
+            index = self.df.index
+
+            exit_type = self.exit_condition.get('type', 'manual')
+            exit_value = None
+            exit_value_error = None
+            exit_operator = None
+            exit_indicator = None
+            time_period = None
+            time_unit = None
+            try:
+                if exit_type == 'profit_target':
+                    exit_value = float(self.exit_condition.get('value', 5))
+                elif exit_type == 'stop_loss':
+                    exit_value = float(self.exit_condition.get('value', 2))
+                elif exit_type == 'trailing_stop':
+                    exit_value = float(self.exit_condition.get('value', 3))
+                elif exit_type == 'indicator_based':
+                    exit_value = float(self.exit_condition.get('indicatorValue', '70'))
+            except (TypeError, ValueError) as e:
+                # PortfolioSimulator only fails on a bad value once it checks an exit
+                exit_value_error = e
+
+            if exit_type == 'time_based':
+                time_period = self.exit_condition.get('timePeriod', 7)
+                time_unit = self.exit_condition.get('timeUnit', 'days')
+            elif exit_type == 'indicator_based':
+                exit_operator = self.exit_condition.get('operator', 'greater_than')
+                indicator = self.exit_condition.get('indicator', 'RSI')
+                indicator_col = indicator_column(indicator, indicator_params(indicator, self.exit_condition))
+                if indicator_col in self.df.columns:
+                    exit_indicator = self.df[indicator_col].to_numpy(dtype='float64').tolist()
+
+            leverage = self.leverage
+            leverage_label = f"{leverage}x"
+            cash = self.cash
+            position = self.position
+            in_position = self.in_position
+            position_type = self.position_type
+            position_signal = SIGNAL_CODES.get(position_type, SIGNAL_HOLD)
+            signal_names = SIGNAL_NAMES
+            entry_price = self.entry_price
+            entry_ts = None
+            entry_portfolio_value = None
+            highest_price = self.highest_price
+            lowest_price = self.lowest_price
+            trades = self.trades
+            trade_records = self.trade_records
+            equity_curve = self.equity_curve
+            append_equity = equity_curve.append
+            current_equity = None
+
+            for i in range(len(closes)):
+                current_price = closes[i]
+                signal = signals[i]
+
+                # Skip if price is invalid (NaN fails every comparison)
+                if not current_price > 0:
+                    append_equity(cash + (position * (closes[i - 1] if i > 0 else current_price)))
+                    continue
+
+                # Signals are ints: 0 is HOLD, 1 LONG and -1 SHORT
+                if signal and not in_position and cash > 0 and equity_curve and equity_curve[-1] > 0:
+                    current_portfolio_value = cash
+                    available_capital = current_portfolio_value * leverage
+                    position_type = signal_names[signal]
+                    position_signal = signal
+                    if signal > 0:
+                        position = available_capital / current_price
+                        highest_price = current_price
+                    else:
+                        position = -(available_capital / current_price)
+                        lowest_price = current_price
+                    cash = 0
+                    in_position = True
+                    entry_price = current_price
+                    entry_ts = timestamps[i]
+                    entry_portfolio_value = current_portfolio_value
+
+                    trades.append({
+                        'Date': index[i].strftime('%Y-%m-%d %H:%M'),
+                        'Type': position_type,
+                        'Price': f"{current_price:.2f}",
+                        'Portfolio': f"${current_portfolio_value:,.2f}",
+                        'P&L': '—',
+                        'Leverage': leverage_label
+                    })
+                    trade_records.append((i, position_type, current_price, current_portfolio_value, float('nan'), float('nan')))
+
+                elif in_position and position != 0:
+                    # Inline equivalent of should_exit_position
+                    should_exit = False
+                    if exit_value_error is not None:
+                        raise exit_value_error
+                    if exit_type == 'manual':
+                        should_exit = signal != position_signal
+                    elif exit_type == 'profit_target':
+                        if position_type == 'LONG':
+                            profit_pct = ((current_price - entry_price) / entry_price) * 100
+                        else:
+                            profit_pct = ((entry_price - current_price) / entry_price) * 100
+                        should_exit = profit_pct >= exit_value
+                    elif exit_type == 'stop_loss':
+                        if position_type == 'LONG':
+                            loss_pct = ((entry_price - current_price) / entry_price) * 100
+                        else:
+                            loss_pct = ((current_price - entry_price) / entry_price) * 100
+                        should_exit = loss_pct >= exit_value
+                    elif exit_type == 'trailing_stop':
+                        if position_type == 'LONG':
+                            if current_price > highest_price:
+                                highest_price = current_price
+                            if highest_price > 0:
+                                should_exit = ((highest_price - current_price) / highest_price) * 100 >= exit_value
+                        else:
+                            if current_price < lowest_price:
+                                lowest_price = current_price
+                            if lowest_price < float('inf'):
+                                should_exit = ((current_price - lowest_price) / lowest_price) * 100 >= exit_value
+                    elif exit_type == 'time_based':
+                        elapsed_ns = timestamps[i] - entry_ts
+                        if time_unit == 'minutes':
+                            should_exit = elapsed_ns / 1e9 / 60 >= time_period
+                        elif time_unit == 'hours':
+                            should_exit = elapsed_ns / 1e9 / 3600 >= time_period
+                        else:
+                            should_exit = elapsed_ns // 86_400_000_000_000 >= time_period
+                    elif exit_type == 'indicator_based' and exit_indicator is not None:
+                        current_indicator_value = exit_indicator[i]
+                        if current_indicator_value == current_indicator_value:  # not NaN
+                            if exit_operator == 'greater_than':
+                                should_exit = current_indicator_value > exit_value
+                            elif exit_operator == 'less_than':
+                                should_exit = current_indicator_value < exit_value
+                            elif exit_operator == 'equals':
+                                should_exit = abs(current_indicator_value - exit_value) < 0.01
+
+                    if should_exit:
+                        if position_type == 'LONG':
+                            trade_value = position * current_price
+                            price_change_pct = ((current_price - entry_price) / entry_price) * 100
+                            pnl_amount = (current_price - entry_price) * abs(position)
+                            profit_loss = trade_value - (entry_portfolio_value * leverage)
+                        else:
+                            trade_value = abs(position) * current_price
+                            price_change_pct = ((entry_price - current_price) / entry_price) * 100
+                            pnl_amount = (entry_price - current_price) * abs(position)
+                            profit_loss = (entry_portfolio_value * leverage) - trade_value
+                        pnl_pct = price_change_pct * leverage
+                        if pnl_amount >= 0:
+                            pnl_display = f"+${pnl_amount:,.2f} (+{pnl_pct:.2f}%)"
+                        else:
+                            pnl_display = f"-${abs(pnl_amount):,.2f} ({pnl_pct:.2f}%)"
+
+                        cash = entry_portfolio_value + profit_loss
+                        trades.append({
+                            'Date': index[i].strftime('%Y-%m-%d %H:%M'),
+                            'Type': f"EXIT {position_type}",
+                            'Price': f"{current_price:.2f}",
+                            'Portfolio': f"${cash:,.2f}",
+                            'P&L': pnl_display,
+                            'Leverage': leverage_label
+                        })
+                        trade_records.append((i, f"EXIT {position_type}", current_price, cash, pnl_amount, pnl_pct))
+                        position = 0
+                        in_position = False
+                        position_type = None
+
+                # Current equity (actual portfolio value, not leveraged position value)
+                if in_position:
+                    if position_type == 'LONG':
+                        current_equity = entry_portfolio_value + (current_price - entry_price) * abs(position)
+                    else:
+                        current_equity = entry_portfolio_value + (entry_price - current_price) * abs(position)
+                else:
+                    current_equity = cash
+
+                # Margin call: force the position closed instead of going negative
+                if current_equity <= 0:
+                    if in_position and position != 0:
+                        if position_type == 'LONG':
+                            pnl_amount = (current_price - entry_price) * abs(position)
+                        else:
+                            pnl_amount = (entry_price - current_price) * abs(position)
+                        if pnl_amount >= 0:
+                            pnl_display = f"+${pnl_amount:,.2f}"
+                        else:
+                            pnl_display = f"-${abs(pnl_amount):,.2f}"
+                        trades.append({
+                            'Date': index[i].strftime('%Y-%m-%d %H:%M'),
+                            'Type': f"MARGIN CALL {position_type}",
+                            'Price': f"{current_price:.2f}",
+                            'Portfolio': "$0.00",
+                            'P&L': pnl_display,
+                            'Leverage': leverage_label
+                        })
+                        trade_records.append((i, f"MARGIN CALL {position_type}", current_price, 0.0, pnl_amount, float('nan')))
+                        cash = 0
+                        position = 0
+                        in_position = False
+                        position_type = None
+                    current_equity = 0
+
+                append_equity(current_equity)
+
+            self.cash = cash
+            self.position = position
+            self.in_position = in_position
+            self.position_type = position_type
+            self.entry_price = entry_price
+            self.highest_price = highest_price
+            self.lowest_price = lowest_price
+
+            return self._format_results() if format_results else {}
+
+        except Exception as e:
+            return {
+                'error': f'Simulation failed: {str(e)}',
+                'stats': {},
+                'plot_data': {'equity_curve': [], 'dates': []},
+                'trades': []
+            }
+
+
+# Simulation engines selectable through run_backtest(engine=...)
+SIMULATION_ENGINES = {
+    'array': ArrayPortfolioSimulator,
+    'pandas': PortfolioSimulator,
+}
+DEFAULT_ENGINE = 'array'
@@ -0,0 +1,453 @@
+# backend/api/bar_store.py
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from .providers import ProviderEmpty, ProviderUnsupported
+from .single_flight import file_lock
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# One record per bar: UTC timestamp in nanoseconds followed by the OHLCV values
+BAR_DTYPE = np.dtype([('ts', '<i8')] + [(col, '<f8') for col in OHLCV_COLUMNS])
+
+# Days without bars a fetched window may have at either edge and still count as fully covered (weekend plus holidays)
+COVERAGE_SLACK_DAYS = 4
+
+# Days a window that no provider could serve, or that has no trading days, is left alone before it is asked for
+# again (e.g. after adding an API key)
+UNAVAILABLE_RETRY_DAYS = 7
+
+# Minutes a window reaching into the last day is left alone after a fetch: the current day is never marked as
+# covered, and an empty answer there may just mean the market hasn't opened yet
+RECENT_RETRY_MINUTES = 15
+
+
+def _to_date(value) -> date:
+    """Parse a 'YYYY-MM-DD' string (or date/datetime) into a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.to_datetime(value).date()
+
+
+def _merge_ranges(ranges: list) -> list:
+    """Merge overlapping or adjacent inclusive (start, end) date ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_ranges(start: date, end: date, covered: list) -> list:
+    """Return the parts of [start, end] that are not inside any covered range."""
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in _merge_ranges(covered):
+        if cov_end < cursor:
+            continue
+        if cov_start > end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, cov_start - timedelta(days=1)))
+        cursor = max(cursor, cov_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _chunk_range(start: date, end: date, days: int) -> list:
+    """Split start..end (inclusive) into windows of at most `days` days, newest first and anchored at end."""
+    chunks = []
+    while end >= start:
+        chunk_start = max(start, end - timedelta(days=days - 1))
+        chunks.append((chunk_start, end))
+        end = chunk_start - timedelta(days=1)
+    return chunks
+
+
+class BarStore:
+    """
+    Persistent on-disk OHLCV store keyed by ticker and timeframe.
+
+    Bars are kept in one memory-mapped NumPy file per calendar year under
+    <root>/<timeframe>/<TICKER>/, next to a meta.json that records which date
+    ranges have already been fetched from providers, and which ones no
+    provider could serve or had no bars for. Reads only open the partitions that overlap the
+    requested range and binary-search the timestamps inside them, so repeat
+    requests never touch a provider.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # --- Paths and metadata ---
+
+    def _series_dir(self, ticker: str, timeframe: str) -> str:
+        safe_ticker = re.sub(r'[^A-Z0-9._-]', '_', ticker.strip().upper())
+        safe_timeframe = re.sub(r'[^A-Za-z0-9_-]', '_', timeframe)
+        return os.path.join(self.root, safe_timeframe, safe_ticker)
+
+    def _partition_path(self, series_dir: str, year: int) -> str:
+        return os.path.join(series_dir, f"{year}.npy")
+
+    def _lock(self, ticker: str, timeframe: str, kind: str) -> threading.Lock:
+        key = (ticker.strip().upper(), timeframe, kind)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    @contextmanager
+    def _exclusive(self, ticker: str, timeframe: str, kind: str):
+        """A thread lock within this process plus a lock file under <root>/.locks shared by every process using the store."""
+        series_dir = self._series_dir(ticker, timeframe)
+        suffix = '' if kind == 'series' else f".{kind}"
+        name = f"{os.path.basename(os.path.dirname(series_dir))}-{os.path.basename(series_dir)}{suffix}.lock"
+        with self._lock(ticker, timeframe, kind), file_lock(os.path.join(self.root, '.locks', name)):
+            yield
+
+    def _series_lock(self, ticker: str, timeframe: str):
+        """Exclusive access to one series' files, held only while they are written."""
+        return self._exclusive(ticker, timeframe, 'series')
+
+    def _fetch_lock(self, ticker: str, timeframe: str):
+        """
+        One provider fetch per series at a time. Held during network I/O, but
+        only by loads with missing ranges: reads never wait for it.
+        """
+        return self._exclusive(ticker, timeframe, 'fetch')
+
+    def _read_meta(self, series_dir: str) -> dict:
+        path = os.path.join(series_dir, 'meta.json')
+        if not os.path.exists(path):
+            return {'tz': None, 'coverage': [], 'source': None, 'first': None, 'last': None, 'count': 0, 'partitions': []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_meta(self, series_dir: str, meta: dict) -> None:
+        path = os.path.join(series_dir, 'meta.json')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _coverage(self, meta: dict) -> list:
+        return [(_to_date(start), _to_date(end)) for start, end in meta.get('coverage', [])]
+
+    def _unavailable(self, meta: dict) -> list:
+        """Windows no provider could serve or had bars for, recorded within the last UNAVAILABLE_RETRY_DAYS."""
+        retry_from = date.today() - timedelta(days=UNAVAILABLE_RETRY_DAYS)
+        return [
+            (_to_date(start), _to_date(end))
+            for start, end, recorded in meta.get('unavailable', [])
+            if _to_date(recorded) > retry_from
+        ]
+
+    def _recent(self, meta: dict) -> list:
+        """Windows up to the current day fetched within the last RECENT_RETRY_MINUTES."""
+        retry_from = datetime.now(timezone.utc) - timedelta(minutes=RECENT_RETRY_MINUTES)
+        return [
+            (_to_date(start), _to_date(end))
+            for start, end, recorded in meta.get('recent', [])
+            if datetime.fromisoformat(recorded) > retry_from
+        ]
+
+    def _utc_bounds(self, start: date, end: date, tz) -> tuple:
+        """Nanosecond UTC bounds [lo, hi) for whole days start..end in the series timezone."""
+        lo = pd.Timestamp(start)
+        hi = pd.Timestamp(end + timedelta(days=1))
+        if tz:
+            lo = lo.tz_localize(tz).tz_convert('UTC').tz_localize(None)
+            hi = hi.tz_localize(tz).tz_convert('UTC').tz_localize(None)
+        return lo.value, hi.value
+
+    # --- Public API ---
+
+    def missing_ranges(self, ticker: str, timeframe: str, start_date, end_date) -> list:
+        """Return the (start, end) date ranges in the request that have not been fetched, or found unavailable, yet."""
+        meta = self._read_meta(self._series_dir(ticker, timeframe))
+        known = self._coverage(meta) + self._unavailable(meta) + self._recent(meta)
+        return _subtract_ranges(_to_date(start_date), _to_date(end_date), known)
+
+    def describe(self, ticker: str, timeframe: str) -> dict:
+        """Return first bar, last bar, bar count and source for a stored series."""
+        meta = self._read_meta(self._series_dir(ticker, timeframe))
+        return {key: meta.get(key) for key in ('first', 'last', 'count', 'source', 'tz')}
+
+    def read(self, ticker: str, timeframe: str, start_date, end_date) -> pd.DataFrame:
+        """Read stored bars between two dates (inclusive) without loading other partitions."""
+        series_dir = self._series_dir(ticker, timeframe)
+        meta = self._read_meta(series_dir)
+        tz = meta.get('tz')
+        lo, hi = self._utc_bounds(_to_date(start_date), _to_date(end_date), tz)
+
+        chunks = []
+        first_year = pd.Timestamp(lo).year
+        last_year = pd.Timestamp(hi - 1).year
+        for year in range(first_year, last_year + 1):
+            path = self._partition_path(series_dir, year)
+            if not os.path.exists(path):
+                continue
+            bars = np.load(path, mmap_mode='r')
+            ts = bars['ts']
+            i = np.searchsorted(ts, lo, side='left')
+            j = np.searchsorted(ts, hi, side='left')
+            if j > i:
+                chunks.append(np.array(bars[i:j]))
+
+        bars = np.concatenate(chunks) if chunks else np.empty(0, dtype=BAR_DTYPE)
+        return self._to_frame(bars, tz)
+
+    def write(self, ticker: str, timeframe: str, data: pd.DataFrame, covered=None, source=None) -> None:
+        """Merge bars into the store, replacing stored bars that share a timestamp."""
+        with self._series_lock(ticker, timeframe):
+            self._write(ticker, timeframe, data, covered, source)
+
+    def _fetch_windows(self, ticker: str, timeframe: str, windows: list, fetcher, max_workers: int):
+        """Yield (window, (data, info) or None, error or None) as each window's fetch finishes."""
+        def fetch(window):
+            # Providers differ on whether the end date is inclusive, so ask for one extra day
+            return fetcher(ticker, window[0].isoformat(), (window[1] + timedelta(days=1)).isoformat(), timeframe)
+
+        if max_workers <= 1 or len(windows) <= 1:
+            for window in windows:
+                try:
+                    yield window, fetch(window), None
+                except Exception as e:
+                    yield window, None, e
+            return
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows)), thread_name_prefix='bar-fetch') as pool:
+            futures = {pool.submit(fetch, window): window for window in windows}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def _missing_windows(self, ticker: str, timeframe: str, start: date, end: date, chunk_days: int, earliest: date) -> list:
+        if earliest is not None:
+            start = max(start, earliest)
+        if end < start:
+            return []
+        windows = []
+        for gap_start, gap_end in self.missing_ranges(ticker, timeframe, start, end):
+            windows.extend(_chunk_range(gap_start, gap_end, chunk_days) if chunk_days else [(gap_start, gap_end)])
+        return windows
+
+    def load(self, ticker: str, timeframe: str, start_date, end_date, fetcher, chunk_days: int = None,
+             max_workers: int = 1, earliest=None) -> tuple:
+        """
+        Return (data, data_range_info) for the request, calling
+        fetcher(ticker, start, end, timeframe) only for date ranges that are
+        not stored yet.
+
+        With chunk_days, missing ranges are fetched in windows of at most that
+        many days, up to max_workers at a time. Each window is written to the
+        store as soon as it arrives, so an interrupted load keeps what it got,
+        and bars repeated at window boundaries are merged by timestamp.
+        Nothing before earliest (the oldest day any provider serves) is asked
+        for. A window the fetcher rejects with ProviderUnsupported, or answers
+        with ProviderEmpty (no trading days in it), is recorded as unavailable
+        so later loads skip it; for a window reaching into the last day that
+        only lasts RECENT_RETRY_MINUTES.
+        """
+        start = _to_date(start_date)
+        end = _to_date(end_date)
+        earliest = _to_date(earliest) if earliest is not None else None
+        if end < start:
+            raise ValueError("End date must be after start date")
+
+        fetched = []
+        last_error = None
+        if self._missing_windows(ticker, timeframe, start, end, chunk_days, earliest):
+            # Another thread or worker fetching the same series finishes first; its bars may then cover our gaps
+            with self._fetch_lock(ticker, timeframe):
+                windows = self._missing_windows(ticker, timeframe, start, end, chunk_days, earliest)
+                for window, result, error in self._fetch_windows(ticker, timeframe, windows, fetcher, max_workers):
+                    if error is not None:
+                        print(f"Bar store: fetch for {ticker} {timeframe} {window[0]} to {window[1]} failed: {str(error)}")
+                        last_error = error
+                        if isinstance(error, (ProviderUnsupported, ProviderEmpty)):
+                            with self._series_lock(ticker, timeframe):
+                                self._mark_unavailable(ticker, timeframe, window, recent=isinstance(error, ProviderEmpty))
+                        continue
+                    data, info = result
+                    with self._series_lock(ticker, timeframe):
+                        self._write(ticker, timeframe, data, window, info.get('source'))
+                    fetched.append((data, info.get('source')))
+
+        data = self.read(ticker, timeframe, start, end)
+        source = self._read_meta(self._series_dir(ticker, timeframe)).get('source')
+
+        if data.empty:
+            if fetched:
+                # The provider ignored the requested range (e.g. yfinance intraday); return what it gave us
+                data = pd.concat([frame for frame, _ in fetched])
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+                source = fetched[-1][1]
+            elif last_error is not None:
+                raise last_error
+            elif earliest is not None and start < earliest:
+                raise ValueError(f"No data found for {ticker}: {timeframe} bars are only available from {earliest.isoformat()}")
+            else:
+                raise ValueError(f"No data found for {ticker}")
+
+        data_range_info = {
+            'requested_start': start_date,
+            'requested_end': end_date,
+            'actual_start': data.index.min().strftime('%Y-%m-%d'),
+            'actual_end': data.index.max().strftime('%Y-%m-%d'),
+            'data_points': len(data),
+            'source': source
+        }
+        return data, data_range_info
+
+    # --- Internals ---
+
+    def _to_records(self, data: pd.DataFrame) -> np.ndarray:
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        records = np.empty(len(data), dtype=BAR_DTYPE)
+        records['ts'] = index.as_unit('ns').asi8
+        for col in OHLCV_COLUMNS:
+            records[col] = data[col].to_numpy(dtype='float64') if col in data.columns else np.nan
+        return records
+
+    def _to_index(self, ts: np.ndarray, tz) -> pd.DatetimeIndex:
+        index = pd.to_datetime(ts, unit='ns')
+        if tz:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        index.name = 'Date'
+        return index
+
+    def _to_frame(self, bars: np.ndarray, tz) -> pd.DataFrame:
+        index = self._to_index(bars['ts'], tz)
+        return pd.DataFrame({col: bars[col] for col in OHLCV_COLUMNS}, index=index)
+
+    def _write(self, ticker: str, timeframe: str, data: pd.DataFrame, covered, source) -> None:
+        series_dir = self._series_dir(ticker, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+        meta = self._read_meta(series_dir)
+
+        if meta.get('tz') is None and meta.get('count', 0) == 0:
+            index_tz = getattr(data.index, 'tz', None)
+            meta['tz'] = str(index_tz) if index_tz is not None else None
+
+        records = self._to_records(data)
+        if len(records):
+            years = pd.to_datetime(records['ts'], unit='ns').year.to_numpy()
+            for year in np.unique(years):
+                self._merge_partition(series_dir, int(year), records[years == year])
+                if int(year) not in meta['partitions']:
+                    meta['partitions'].append(int(year))
+            meta['partitions'].sort()
+
+        if covered is not None and len(data):
+            cov_start, cov_end = covered
+            # The current day is still trading, so never mark it as complete; it is only fetched again once
+            # RECENT_RETRY_MINUTES have passed
+            yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+            if cov_end > yesterday:
+                self._add_recent(meta, (max(cov_start, yesterday + timedelta(days=1)), cov_end))
+            cov_end = min(cov_end, yesterday)
+            bar_dates = self._to_index(records['ts'], meta['tz'])
+            bar_start, bar_end = bar_dates.min().date(), bar_dates.max().date()
+            # Only the span the bars actually reach counts as fetched; an edge closer to the window's than a
+            # weekend plus holidays is taken as complete, a larger shortfall (truncated page, lookback limit,
+            # later listing) stays missing so the next load asks for it again
+            if bar_start - cov_start <= timedelta(days=COVERAGE_SLACK_DAYS):
+                bar_start = cov_start
+            if cov_end - bar_end <= timedelta(days=COVERAGE_SLACK_DAYS):
+                bar_end = cov_end
+            cov_start, cov_end = max(cov_start, bar_start), min(cov_end, bar_end)
+            if cov_start <= cov_end:
+                coverage = _merge_ranges(self._coverage(meta) + [(cov_start, cov_end)])
+                meta['coverage'] = [[s.isoformat(), e.isoformat()] for s, e in coverage]
+
+        if source:
+            meta['source'] = source
+        self._refresh_summary(series_dir, meta)
+        self._write_meta(series_dir, meta)
+
+    def _mark_unavailable(self, ticker: str, timeframe: str, window: tuple, recent: bool = False) -> None:
+        series_dir = self._series_dir(ticker, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+        meta = self._read_meta(series_dir)
+        # Bars for the last day may still be on their way, so an empty answer there is only trusted briefly
+        if recent and window[1] >= datetime.now(timezone.utc).date() - timedelta(days=1):
+            self._add_recent(meta, window)
+        else:
+            retry_from = date.today() - timedelta(days=UNAVAILABLE_RETRY_DAYS)
+            unavailable = [entry for entry in meta.get('unavailable', []) if _to_date(entry[2]) > retry_from]
+            unavailable.append([window[0].isoformat(), window[1].isoformat(), date.today().isoformat()])
+            meta['unavailable'] = unavailable
+        self._write_meta(series_dir, meta)
+
+    def _add_recent(self, meta: dict, window: tuple) -> None:
+        now = datetime.now(timezone.utc)
+        retry_from = now - timedelta(minutes=RECENT_RETRY_MINUTES)
+        recent = [entry for entry in meta.get('recent', []) if datetime.fromisoformat(entry[2]) > retry_from]
+        recent.append([window[0].isoformat(), window[1].isoformat(), now.isoformat()])
+        meta['recent'] = recent
+
+    def _merge_partition(self, series_dir: str, year: int, records: np.ndarray) -> None:
+        path = self._partition_path(series_dir, year)
+        if os.path.exists(path):
+            records = np.concatenate([np.load(path), records])
+        # Stable sort keeps the newest copy last among bars with the same timestamp
+        records = records[np.argsort(records['ts'], kind='stable')]
+        keep = np.append(records['ts'][1:] != records['ts'][:-1], True)
+        records = records[keep]
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, records)
+        os.replace(tmp_path, path)
+
+    def _refresh_summary(self, series_dir: str, meta: dict) -> None:
+        count = 0
+        first = last = None
+        for year in meta['partitions']:
+            bars = np.load(self._partition_path(series_dir, year), mmap_mode='r')
+            if len(bars) == 0:
+                continue
+            count += len(bars)
+            first = bars['ts'][0] if first is None else first
+            last = bars['ts'][-1]
+        meta['count'] = count
+        if first is not None:
+            span = self._to_index(np.array([first, last], dtype='<i8'), meta['tz'])
+            meta['first'] = span[0].isoformat()
+            meta['last'] = span[1].isoformat()
+
+
+_bar_store = None
+_bar_store_guard = threading.Lock()
+
+
+def get_bar_store() -> BarStore:
+    """Return the process-wide bar store rooted at settings.BAR_STORE_DIR."""
+    global _bar_store
+    with _bar_store_guard:
+        if _bar_store is None:
+            from django.conf import settings
+            _bar_store = BarStore(settings.BAR_STORE_DIR)
+        return _bar_store
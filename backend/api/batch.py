@@ -0,0 +1,156 @@
+# backend/api/batch.py
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+
+from .backtester import run_backtest, validate_strategy_config
+from .pipeline import BacktestRequestError, load_backtest_data
+from .process_pool import get_process_pool
+from .strategy_plan import StrategyPlan, compile_strategy
+
+
+def parse_tickers(value, max_tickers: int) -> list:
+    """Validate a list of ticker symbols, uppercasing and de-duplicating it in order."""
+    if not isinstance(value, list) or not value:
+        raise ValueError("'tickers' must be a non-empty list of ticker symbols.")
+
+    tickers = []
+    for ticker in value:
+        if not isinstance(ticker, str) or not ticker.strip():
+            raise ValueError("Every ticker must be a non-empty string.")
+        ticker = ticker.strip().upper()
+        if ticker not in tickers:
+            tickers.append(ticker)
+
+    if len(tickers) > max_tickers:
+        raise ValueError(f"A batch can include at most {max_tickers} tickers, got {len(tickers)}.")
+    return tickers
+
+
+def _load_ticker_data(ticker: str, start_date: str, end_date: str, timeframe: str) -> tuple:
+    """load_backtest_data() for a fetch thread, closing the thread's database connection (used for ticker metadata) afterwards."""
+    try:
+        return load_backtest_data(ticker, start_date, end_date, timeframe)
+    finally:
+        connection.close()
+
+
+def _backtest_ticker(ticker: str, data, strategy_config: dict, cash: float, leverage: float, engine: str, include_details: bool,
+                     max_points: int = None, downsample: str = 'lttb', plan: StrategyPlan = None) -> dict:
+    """Run one ticker's backtest in a worker process and trim the result for the batch response."""
+    try:
+        results = run_backtest(data, strategy_config, cash, leverage, engine, max_points, downsample, plan=plan)
+    except Exception as e:
+        return {'ticker': ticker, 'error': f"An error occurred during the backtest: {str(e)}"}
+
+    if 'error' in results:
+        return {'ticker': ticker, 'error': results['error']}
+
+    row = {'ticker': ticker, 'stats': results['stats']}
+    if include_details:
+        row['plot_data'] = results['plot_data']
+        row['trades'] = results['trades']
+    return row
+
+
+def _parse_number(value) -> float:
+    return float(str(value).replace(',', ''))
+
+
+def summarize_batch(rows: list) -> dict:
+    """Aggregate per-ticker results into a batch summary."""
+    succeeded = [row for row in rows if 'error' not in row]
+    returns = {row['ticker']: _parse_number(row['stats']['Return [%]']) for row in succeeded}
+
+    summary = {
+        'tickers': len(rows),
+        'succeeded': len(succeeded),
+        'failed': len(rows) - len(succeeded),
+        'total_trades': sum(row['stats']['# Trades'] for row in succeeded),
+    }
+    if returns:
+        best = max(returns, key=returns.get)
+        worst = min(returns, key=returns.get)
+        summary.update({
+            'average_return_pct': round(statistics.fmean(returns.values()), 2),
+            'median_return_pct': round(statistics.median(returns.values()), 2),
+            'profitable_tickers': sum(1 for value in returns.values() if value > 0),
+            'best': {'ticker': best, 'return_pct': returns[best]},
+            'worst': {'ticker': worst, 'return_pct': returns[worst]},
+        })
+    return summary
+
+
+def batch_fetch_workers() -> int:
+    """Number of threads a batch loads market data with."""
+    from django.conf import settings
+    return max(1, int(getattr(settings, 'BATCH_FETCH_WORKERS', 8)))
+
+
+def run_batch_backtest(tickers: list, strategy_config: dict, start_date: str, end_date: str, timeframe: str,
+                       cash: float, leverage: float = 1.0, engine: str = None, include_details: bool = False,
+                       fetch_workers: int = None, max_points: int = None,
+                       downsample: str = 'lttb', plan: StrategyPlan = None) -> dict:
+    """
+    Backtest one strategy over many tickers.
+
+    Market data is loaded on a bounded thread pool, and each ticker's backtest
+    is handed to the shared process pool as soon as its data arrives, so
+    provider I/O and simulation overlap. Results keep the order of the
+    requested tickers. The strategy is compiled once and the plan is shared
+    by every ticker.
+    """
+    if plan is None:
+        validate_strategy_config(strategy_config)
+        plan = compile_strategy(strategy_config)
+
+    fetch_workers = min(fetch_workers or batch_fetch_workers(), len(tickers))
+
+    started = time.perf_counter()
+    rows = {}
+    process_pool = get_process_pool()
+    backtests = {}
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+            loads = {
+                fetch_pool.submit(_load_ticker_data, ticker, start_date, end_date, timeframe): ticker
+                for ticker in tickers
+            }
+            data_ranges = {}
+            for future in as_completed(loads):
+                ticker = loads[future]
+                try:
+                    data, data_range_message = future.result()
+                except BacktestRequestError as e:
+                    rows[ticker] = {'ticker': ticker, 'error': e.message}
+                    continue
+                except Exception as e:
+                    rows[ticker] = {'ticker': ticker, 'error': f"Could not load market data: {str(e)}"}
+                    continue
+                data_ranges[ticker] = data_range_message
+                backtests[process_pool.submit(
+                    _backtest_ticker, ticker, data, strategy_config, cash, leverage, engine, include_details,
+                    max_points, downsample, plan
+                )] = ticker
+
+        for future in as_completed(backtests):
+            ticker = backtests[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {'ticker': ticker, 'error': f"An error occurred during the backtest: {str(e)}"}
+            row['data_range_info'] = data_ranges[ticker]
+            rows[ticker] = row
+    finally:
+        # The pool outlives this request, so don't leave it backtests nobody will collect
+        for future in backtests:
+            future.cancel()
+
+    ordered = [rows[ticker] for ticker in tickers]
+    return {
+        'results': ordered,
+        'summary': summarize_batch(ordered),
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
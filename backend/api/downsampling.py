@@ -0,0 +1,76 @@
+# backend/api/downsampling.py
+import numpy as np
+
+MIN_POINTS = 10
+
+
+def lttb_indices(values, target: int, x=None) -> np.ndarray:
+    """
+    Pick `target` point indices with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Every bucket in between keeps the
+    point that forms the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and troughs of the curve.
+    """
+    y = np.asarray(values, dtype='float64')
+    n = len(y)
+    if target >= n or target < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype='float64') if x is None else np.asarray(x, dtype='float64') - float(x[0])
+
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, target - 1).astype(np.int64)
+    selected = np.empty(target, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(target - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        area = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(values, target: int, x=None) -> np.ndarray:
+    """
+    Pick at most `target` point indices by keeping the minimum and maximum of each bucket.
+
+    The first and last points are always kept, so every peak and drawdown in the
+    series survives, in their original order.
+    """
+    y = np.asarray(values, dtype='float64')
+    n = len(y)
+    if target >= n or target < 4:
+        return np.arange(n)
+
+    buckets = (target - 2) // 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    selected = [0]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        segment = y[start:end]
+        selected.extend(sorted({start + int(np.argmin(segment)), start + int(np.argmax(segment))}))
+    selected.append(n - 1)
+    return np.asarray(selected, dtype=np.int64)
+
+
+DOWNSAMPLE_METHODS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices,
+}
+
+
+def downsample_indices(values, target: int, method: str = 'lttb', x=None) -> np.ndarray:
+    """Return the indices of the points to plot, using one of DOWNSAMPLE_METHODS."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Invalid downsample method: {method}. Must be one of {list(DOWNSAMPLE_METHODS)}")
+    return DOWNSAMPLE_METHODS[method](values, target, x)
@@ -0,0 +1,103 @@
+# backend/api/indicator_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_MB = 256
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Return a content hash of a DataFrame's index, column names and values."""
+    digest = hashlib.blake2b(digest_size=16)
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        digest.update(str(index.tz).encode())
+        index_values = index.as_unit('ns').asi8
+    else:
+        index_values = pd.util.hash_pandas_object(index).to_numpy()
+    digest.update(np.ascontiguousarray(index_values).tobytes())
+    for column in df.columns:
+        digest.update(str(column).encode())
+        digest.update(np.ascontiguousarray(df[column].to_numpy(dtype='float64')).tobytes())
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    Memoizes calculated indicator columns by (data fingerprint, indicator, parameters).
+
+    Entries are dicts of read-only NumPy arrays. The least recently used entries
+    are evicted once the cached arrays exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, fingerprint: str, indicator: str, params: tuple, compute) -> dict:
+        """Return the cached columns for this key, calling compute() on a miss."""
+        key = (fingerprint, indicator, params)
+        with self._lock:
+            columns = self._entries.get(key)
+            if columns is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return columns
+            self.misses += 1
+
+        columns = {}
+        for name, series in compute().items():
+            values = np.asarray(series, dtype='float64').copy()
+            values.setflags(write=False)
+            columns[name] = values
+        size = sum(values.nbytes for values in columns.values())
+
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = columns
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.current_bytes -= sum(values.nbytes for values in evicted.values())
+        return columns
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_indicator_cache = None
+_indicator_cache_guard = threading.Lock()
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """Return the process-wide indicator cache sized by settings.INDICATOR_CACHE_MAX_MB."""
+    global _indicator_cache
+    with _indicator_cache_guard:
+        if _indicator_cache is None:
+            from django.conf import settings
+            from django.core.exceptions import ImproperlyConfigured
+            try:
+                max_mb = getattr(settings, 'INDICATOR_CACHE_MAX_MB', DEFAULT_MAX_MB)
+            except ImproperlyConfigured:
+                max_mb = DEFAULT_MAX_MB
+            _indicator_cache = IndicatorCache(int(max_mb) * 1024 * 1024)
+        return _indicator_cache
@@ -2,6 +2,8 @@
 import pandas as pd
 import numpy as np
 
+from .indicator_cache import IndicatorCache, data_fingerprint, get_indicator_cache
+
 
 def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
     """Calculate RSI with proper handling of division by zero."""
@@ -91,54 +93,219 @@ def calculate_atr(
     return atr
 
 
-def add_indicators_to_data(df: pd.DataFrame) -> pd.DataFrame:
-    """This function takes a DataFrame and adds all supported indicator columns."""
+# Default parameters for each indicator name used in strategy configs
+# (mirrors INDICATOR_PARAMS in frontend/src/components/builder/types.ts)
+INDICATOR_PARAMS = {
+    "RSI": {"period": 14},
+    "MACD": {"fast_period": 12, "slow_period": 26, "signal_period": 9},
+    "SMA": {"period": 20},
+    "EMA": {"period": 20},
+    "BOLLINGER_BANDS": {"period": 20, "upper_band": 2, "lower_band": 2},
+    "STOCHASTIC": {"k_period": 14, "d_period": 3},
+    "WILLIAMS_R": {"period": 14},
+    "ATR": {"period": 14},
+    "VOLUME": {},
+    "CLOSE": {},
+}
+
+# Column compared by conditions and exits for each indicator
+PRIMARY_COLUMNS = {
+    "RSI": "rsi",
+    "MACD": "macd_line",
+    "SMA": "sma",
+    "EMA": "ema",
+    "BOLLINGER_BANDS": "bb_middle",
+    "STOCHASTIC": "stoch_k",
+    "WILLIAMS_R": "williams_r",
+    "ATR": "atr",
+    "VOLUME": "Volume",
+    "CLOSE": "Close",
+}
+
+# Indicators that can only be calculated when High and Low are available
+HIGH_LOW_INDICATORS = {"STOCHASTIC", "WILLIAMS_R", "ATR"}
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _coerce_param(key: str, value):
+    """Convert a parameter sent by the builder into an int period or float band width."""
+    if key.endswith("_band"):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Indicator parameter '{key}' must be a positive number")
+        if not number > 0:
+            raise ValueError(f"Indicator parameter '{key}' must be a positive number")
+        return number
+
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Indicator parameter '{key}' must be a positive integer")
+    if not number >= 1 or number != int(number):
+        raise ValueError(f"Indicator parameter '{key}' must be a positive integer")
+    return int(number)
+
+
+def indicator_params(name: str, source: dict, compare: bool = False) -> tuple:
+    """
+    Return the ((key, value), ...) parameters for an indicator, read from a
+    condition or exit dict and falling back to the defaults.
+
+    With compare=True the compare-indicator fields are read instead, accepting
+    both 'compareFastPeriod' and the builder's 'compareFast_period' spelling.
+    """
+    params = []
+    for key, default in INDICATOR_PARAMS.get(name.upper(), {}).items():
+        if compare:
+            candidates = [
+                "compare" + "".join(part.capitalize() for part in key.split("_")),
+                "compare" + key[0].upper() + key[1:],
+            ]
+        else:
+            candidates = [key]
+        value = next((source[c] for c in candidates if source.get(c) not in (None, "")), default)
+        params.append((key, _coerce_param(key, value)))
+    return tuple(params)
+
+
+def _format_param(value) -> str:
+    return f"{value:g}"
+
+
+def _column_name(base: str, name: str, params: tuple) -> str:
+    """Name an indicator column, keeping the historical names for default parameters."""
+    if name in ("SMA", "EMA"):
+        return f"{base}_{params[0][1]}"
+    if dict(params) == INDICATOR_PARAMS[name]:
+        return base
+    return base + "".join(f"_{_format_param(value)}" for _, value in params)
+
+
+def indicator_column(name: str, params: tuple = None) -> str:
+    """Return the column a condition compares for an indicator, or 'Close' if it is unknown."""
+    name = name.upper()
+    if name not in PRIMARY_COLUMNS:
+        return "Close"
+    if params is None:
+        params = tuple(INDICATOR_PARAMS[name].items())
+    if not params:
+        return PRIMARY_COLUMNS[name]
+    return _column_name(PRIMARY_COLUMNS[name], name, params)
+
+
+def required_indicators(config: dict) -> set:
+    """Return the (indicator, params) pairs a validated strategy configuration references."""
+    specs = set()
+    for cond in config.get("conditions", []):
+        name = cond.get("indicator", "").upper()
+        specs.add((name, indicator_params(name, cond)))
+        if cond.get("operator") in ["crosses_above", "crosses_below"]:
+            compare_name = cond.get("compareIndicator", "Close").upper()
+            specs.add((compare_name, indicator_params(compare_name, cond, compare=True)))
+
+    exit_condition = config.get("exitCondition", {})
+    if exit_condition.get("type") == "indicator_based":
+        name = exit_condition.get("indicator", "RSI").upper()
+        specs.add((name, indicator_params(name, exit_condition)))
+
+    # Unknown names fall back to Close when signals are generated
+    return {spec for spec in specs if spec[0] in INDICATOR_PARAMS}
+
+
+def _calculate_indicator(name: str, params: tuple, df: pd.DataFrame) -> dict:
+    """Calculate one indicator and return its columns keyed by column name."""
+    close_prices = df["Close"]
+    p = dict(params)
+    if name == "RSI":
+        return {_column_name("rsi", name, params): calculate_rsi(close_prices, p["period"])}
+    if name == "MACD":
+        macd_dict = calculate_macd(close_prices, p["fast_period"], p["slow_period"], p["signal_period"])
+        return {
+            _column_name("macd_line", name, params): macd_dict["macd_line"],
+            _column_name("macd_signal", name, params): macd_dict["signal_line"],
+        }
+    if name == "SMA":
+        return {_column_name("sma", name, params): calculate_sma(close_prices, p["period"])}
+    if name == "EMA":
+        return {_column_name("ema", name, params): calculate_ema(close_prices, p["period"])}
+    if name == "BOLLINGER_BANDS":
+        bb_dict = calculate_bollinger_bands(close_prices, p["period"], p["upper_band"], p["lower_band"])
+        return {
+            _column_name("bb_upper", name, params): bb_dict["upper"],
+            _column_name("bb_middle", name, params): bb_dict["middle"],
+            _column_name("bb_lower", name, params): bb_dict["lower"],
+        }
+    if name == "STOCHASTIC":
+        stoch_dict = calculate_stochastic(df["High"], df["Low"], close_prices, p["k_period"], p["d_period"])
+        return {
+            _column_name("stoch_k", name, params): stoch_dict["k_percent"],
+            _column_name("stoch_d", name, params): stoch_dict["d_percent"],
+        }
+    if name == "WILLIAMS_R":
+        return {_column_name("williams_r", name, params): calculate_williams_r(df["High"], df["Low"], close_prices, p["period"])}
+    if name == "ATR":
+        return {_column_name("atr", name, params): calculate_atr(df["High"], df["Low"], close_prices, p["period"])}
+    return {}
+
+
+def add_indicators_to_data(df: pd.DataFrame, config: dict = None, cache: IndicatorCache = None,
+                           specs: tuple = None) -> pd.DataFrame:
+    """
+    This function takes a DataFrame and adds indicator columns.
+
+    Without a config every supported indicator is added with its default
+    parameters. With a validated strategy config only the indicators it
+    references are calculated, using each condition's own parameters, and only
+    the OHLCV columns are carried over from the input. specs can pass those
+    (indicator, params) pairs precomputed, e.g. StrategyPlan.indicators.
+    Calculated columns are memoized in the shared indicator cache.
+    """
     if df.empty:
         raise ValueError("DataFrame is empty")
 
     if "Close" not in df.columns:
         raise ValueError("DataFrame must contain 'Close' column")
 
-    # Create a copy to avoid modifying the original
-    df_copy = df.copy()
-    close_prices = df_copy["Close"]
-
-    # Calculate basic indicators
-    df_copy["rsi"] = calculate_rsi(close_prices)
-    macd_dict = calculate_macd(close_prices)
-    df_copy["macd_line"] = macd_dict["macd_line"]
-    df_copy["macd_signal"] = macd_dict["signal_line"]
-
-    # Calculate moving averages
-    df_copy["sma_20"] = calculate_sma(close_prices, 20)
-    df_copy["ema_20"] = calculate_ema(close_prices, 20)
-
-    # Calculate Bollinger Bands
-    bb_dict = calculate_bollinger_bands(close_prices, 20, 2, 2)
-    df_copy["bb_upper"] = bb_dict["upper"]
-    df_copy["bb_middle"] = bb_dict["middle"]
-    df_copy["bb_lower"] = bb_dict["lower"]
-
-    # Calculate Stochastic (if we have High and Low data)
-    if "High" in df_copy.columns and "Low" in df_copy.columns:
-        stoch_dict = calculate_stochastic(df_copy["High"], df_copy["Low"], close_prices)
-        df_copy["stoch_k"] = stoch_dict["k_percent"]
-        df_copy["stoch_d"] = stoch_dict["d_percent"]
-
-        # Calculate Williams %R
-        df_copy["williams_r"] = calculate_williams_r(
-            df_copy["High"], df_copy["Low"], close_prices
+    ohlcv_columns = [col for col in OHLCV_COLUMNS if col in df.columns]
+    if config is None and specs is None:
+        # Create a copy to avoid modifying the original
+        df_copy = df.copy()
+        specs = [(name, tuple(params.items())) for name, params in INDICATOR_PARAMS.items()]
+    else:
+        df_copy = df[ohlcv_columns].copy()
+        order = list(INDICATOR_PARAMS)
+        if specs is None:
+            specs = required_indicators(config)
+        specs = sorted(specs, key=lambda spec: (order.index(spec[0]), spec[1]))
+
+    has_high_low = "High" in df_copy.columns and "Low" in df_copy.columns
+    # Close and Volume are already columns; Stochastic, Williams %R and ATR need High and Low data
+    specs = [
+        (name, params) for name, params in specs
+        if params and (has_high_low or name not in HIGH_LOW_INDICATORS)
+    ]
+
+    if cache is None:
+        cache = get_indicator_cache()
+    fingerprint = data_fingerprint(df_copy[ohlcv_columns]) if specs else None
+
+    for name, params in specs:
+        columns = cache.get_or_compute(
+            fingerprint, name, params, lambda: _calculate_indicator(name, params, df_copy)
         )
+        for column, values in columns.items():
+            # Cached arrays are shared, so the frame gets its own copy to fill in place
+            df_copy[column] = values.copy()
 
-        # Calculate ATR
-        df_copy["atr"] = calculate_atr(df_copy["High"], df_copy["Low"], close_prices)
-
-    # Fill NaN values with forward fill, then backward fill for any remaining NaNs
-    df_copy.ffill(inplace=True)
-    df_copy.bfill(inplace=True)
+    if df_copy.isna().values.any():
+        # Fill NaN values with forward fill, then backward fill for any remaining NaNs
+        df_copy.ffill(inplace=True)
+        df_copy.bfill(inplace=True)
 
-    # Only remove rows if they still have NaN values after filling
-    df_copy.dropna(inplace=True)
+        # Only remove rows if they still have NaN values after filling
+        df_copy.dropna(inplace=True)
 
     if df_copy.empty:
         raise ValueError("No valid data after calculating indicators")
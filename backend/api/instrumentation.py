@@ -0,0 +1,181 @@
+# backend/api/instrumentation.py
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = 'fluxtrader_backtest'
+
+# tracemalloc keeps one process-wide peak, so only one stage at a time may reset and read it
+_tracemalloc_peak_lock = threading.Lock()
+
+
+def _max_rss_mb():
+    """Process resident memory high-water mark in MB (ru_maxrss is KB on Linux)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def start_memory_tracing() -> None:
+    """Start tracemalloc (if it isn't already) so stages record 'peak_mb'; see settings.BACKTEST_TRACE_MEMORY."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _rss_mb():
+    """Current process resident memory in MB, from /proc (None where that isn't available)."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+class StageTimings:
+    """
+    Wall time, CPU time, row counts and memory of each stage of one backtest.
+
+    CPU time is for the calling thread only, so concurrent requests don't
+    inflate each other. 'rss_delta_mb' is how much the process's resident
+    memory grew (or shrank) over the stage, and 'rss_mb' where it ended up.
+
+    'peak_mb', the highest allocation above the stage's starting point, is
+    opt-in: it needs tracemalloc, which settings.BACKTEST_TRACE_MEMORY (or
+    PYTHONTRACEMALLOC=1) starts. Its peak counter is global, so a stage that
+    overlaps another traced stage can't reset it either. Without it a stage
+    records 'peak_mb_missing' with the reason instead. Both memory figures are
+    per process and include whatever concurrent requests allocate meanwhile.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.info = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as a stage. The yielded dict takes extra fields such as 'rows'."""
+        record = {'stage': name}
+        tracing = tracemalloc.is_tracing() and _tracemalloc_peak_lock.acquire(blocking=False)
+        if not tracing:
+            record['peak_mb_missing'] = 'overlapping_stage' if tracemalloc.is_tracing() else 'tracemalloc_off'
+        else:
+            traced_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        rss_start = _rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_seconds'] = round(time.thread_time() - cpu_start, 6)
+            if tracing:
+                record['peak_mb'] = round((tracemalloc.get_traced_memory()[1] - traced_start) / 2 ** 20, 3)
+                _tracemalloc_peak_lock.release()
+            rss_end = _rss_mb()
+            if rss_start is not None and rss_end is not None:
+                record['rss_delta_mb'] = round(rss_end - rss_start, 1)
+                record['rss_mb'] = round(rss_end, 1)
+            self.stages.append(record)
+
+    def total_seconds(self) -> float:
+        return round(sum(record['wall_seconds'] for record in self.stages), 6)
+
+    def as_dict(self) -> dict:
+        return {'stages': list(self.stages), 'total_seconds': self.total_seconds(), **self.info}
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value (durations in milliseconds)."""
+        return ', '.join(f"{record['stage']};dur={record['wall_seconds'] * 1000:.1f}" for record in self.stages)
+
+
+class StageMetrics:
+    """
+    Process-wide histograms of stage wall time plus CPU time and row totals.
+
+    Each server process keeps its own counts; Prometheus adds them up across
+    the scraped processes.
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._outcomes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, timings: StageTimings, outcome: str = 'success') -> None:
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            for record in timings.stages:
+                stage = self._stages.setdefault(record['stage'], {
+                    'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0, 'cpu': 0.0, 'rows': 0,
+                })
+                seconds = record['wall_seconds']
+                for i, bound in enumerate(self.buckets):
+                    if seconds <= bound:
+                        stage['buckets'][i] += 1
+                stage['count'] += 1
+                stage['sum'] += seconds
+                stage['cpu'] += record['cpu_seconds']
+                stage['rows'] += record.get('rows', 0)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            stages = {name: dict(values, buckets=list(values['buckets'])) for name, values in self._stages.items()}
+            outcomes = dict(self._outcomes)
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_requests_total Backtest requests by outcome.",
+            f"# TYPE {METRIC_PREFIX}_requests_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_requests_total{{outcome="{outcome}"}} {count}' for outcome, count in sorted(outcomes.items())]
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Wall time of each backtest pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds histogram",
+        ]
+        for name, stage in sorted(stages.items()):
+            for bound, count in zip(self.buckets, stage['buckets']):
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {stage["count"]}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{name}"}} {stage["sum"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_cpu_seconds_total CPU time of each backtest pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_cpu_seconds_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_cpu_seconds_total{{stage="{name}"}} {stage["cpu"]:.6f}' for name, stage in sorted(stages.items())]
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_rows_total Rows (bars, or bytes for serialization) handled by each stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_rows_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_rows_total{{stage="{name}"}} {stage["rows"]}' for name, stage in sorted(stages.items())]
+
+        max_rss = _max_rss_mb()
+        if max_rss is not None:
+            lines += [
+                "# HELP process_max_resident_memory_bytes Peak resident memory of this process.",
+                "# TYPE process_max_resident_memory_bytes gauge",
+                f"process_max_resident_memory_bytes {int(max_rss * 2 ** 20)}",
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+_stage_metrics = StageMetrics()
+
+
+def get_stage_metrics() -> StageMetrics:
+    return _stage_metrics
@@ -0,0 +1,136 @@
+# backend/api/jobs.py
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import BacktestJob
+from .pipeline import BacktestRequestError, load_backtest_data
+from .result_cache import cached_run_backtest
+
+
+def worker_name(index: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def claim_next_job(name: str):
+    """Atomically mark the oldest queued job as running and return it, or None if the queue is empty."""
+    with transaction.atomic():
+        job = (
+            BacktestJob.objects.select_for_update(skip_locked=True)
+            .filter(status=BacktestJob.STATUS_QUEUED)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = BacktestJob.STATUS_RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.worker = name
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'worker'])
+        return job
+
+
+@contextmanager
+def heartbeat(job: BacktestJob, interval: float):
+    """Refresh the job's heartbeat_at every interval seconds from a background thread while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    BacktestJob.objects.filter(pk=job.pk, status=BacktestJob.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+                except DatabaseError as e:
+                    print(f"Backtest job {job.pk}: could not record heartbeat: {str(e)}")
+        finally:
+            # Threads don't get Django's end-of-request cleanup
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def execute_job(job: BacktestJob) -> None:
+    """Run a claimed job and store its result or error."""
+    params = job.parameters
+    try:
+        data, data_range_message = load_backtest_data(params['ticker'], params['start_date'], params['end_date'], params['timeframe'])
+        results = cached_run_backtest(
+            data, params['configuration'], params['cash'], params['leverage'], params.get('engine'),
+            max_points=params.get('max_points'), downsample=params.get('downsample', 'lttb'),
+            rolling_window=params.get('rolling_window'), strategy_id=job.strategy_id
+        )
+        if 'error' in results:
+            job.status = BacktestJob.STATUS_FAILED
+            job.error = results['error']
+        else:
+            results['data_range_info'] = data_range_message
+            job.status = BacktestJob.STATUS_SUCCEEDED
+            job.result = results
+    except BacktestRequestError as e:
+        job.status = BacktestJob.STATUS_FAILED
+        job.error = e.message
+    except Exception as e:
+        job.status = BacktestJob.STATUS_FAILED
+        job.error = f"An error occurred during the backtest: {str(e)}"
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+
+
+def requeue_stale_jobs(max_silence: timedelta) -> int:
+    """
+    Put jobs whose worker died mid-run back on the queue: 'running' jobs
+    without a heartbeat for max_silence. Jobs of live workers keep beating,
+    however long they run, so they are left alone.
+    """
+    cutoff = timezone.now() - max_silence
+    return BacktestJob.objects.filter(status=BacktestJob.STATUS_RUNNING, heartbeat_at__lt=cutoff).update(
+        status=BacktestJob.STATUS_QUEUED, started_at=None, heartbeat_at=None, worker=''
+    )
+
+
+def worker_loop(name: str, poll_interval: float, should_stop, max_jobs: int = None, heartbeat_interval: float = 30,
+                stale_after: timedelta = None) -> int:
+    """
+    Claim and run jobs until should_stop() is true (or max_jobs have run). Returns the number of jobs run.
+
+    With stale_after, the worker also requeues jobs whose worker died (see
+    requeue_stale_jobs) when it starts and then at most once per stale_after,
+    so they are picked up again without restarting the workers.
+    """
+    processed = 0
+    next_requeue = time.monotonic()
+    while not should_stop() and (max_jobs is None or processed < max_jobs):
+        close_old_connections()
+        try:
+            if stale_after is not None and time.monotonic() >= next_requeue:
+                next_requeue = time.monotonic() + stale_after.total_seconds()
+                requeued = requeue_stale_jobs(stale_after)
+                if requeued:
+                    print(f"Worker {name}: requeued {requeued} stale backtest jobs")
+            job = claim_next_job(name)
+        except DatabaseError as e:
+            print(f"Worker {name}: could not claim a job: {str(e)}")
+            time.sleep(poll_interval)
+            continue
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        print(f"Worker {name}: running backtest job {job.id}")
+        with heartbeat(job, heartbeat_interval):
+            execute_job(job)
+        print(f"Worker {name}: job {job.id} {job.status}")
+        processed += 1
+    return processed
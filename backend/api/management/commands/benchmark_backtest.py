@@ -0,0 +1,174 @@
+# backend/api/management/commands/benchmark_backtest.py
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.backtester import DEFAULT_ENGINE, SIMULATION_ENGINES, generate_signals, validate_strategy_config
+from api.indicator_cache import IndicatorCache
+from api.indicators import add_indicators_to_data
+from api.synthetic import BARS_PER_YEAR, synthetic_ohlcv
+
+DEFAULT_SIZES = '1000,100000,1000000,10000000'
+
+# Representative strategies: each exit type and the condition operators the builder offers
+BENCHMARK_CONFIGS = {
+    'rsi_profit_target': {
+        'conditions': [{'indicator': 'RSI', 'operator': 'less_than', 'value': '30'}],
+        'action': 'LONG',
+        'exitCondition': {'type': 'profit_target', 'value': 2},
+    },
+    'sma_cross_trailing_stop': {
+        'conditions': [{'indicator': 'Close', 'operator': 'crosses_above', 'compareIndicator': 'SMA', 'value': '0'}],
+        'action': 'LONG',
+        'exitCondition': {'type': 'trailing_stop', 'value': 1.5},
+    },
+    'macd_cross_stop_loss': {
+        'conditions': [{'indicator': 'MACD', 'operator': 'crosses_below', 'compareIndicator': 'EMA', 'value': '0'}],
+        'action': 'SHORT',
+        'exitCondition': {'type': 'stop_loss', 'value': 1},
+    },
+    'rsi_stochastic_time_based': {
+        'conditions': [
+            {'indicator': 'RSI', 'operator': 'between', 'value': '30', 'compareValue': '50'},
+            {'indicator': 'Stochastic', 'operator': 'less_than', 'value': '30'},
+        ],
+        'logicalOperator': 'AND',
+        'action': 'LONG',
+        'exitCondition': {'type': 'time_based', 'timePeriod': 3, 'timeUnit': 'hours'},
+    },
+    'bollinger_williams_indicator_exit': {
+        'conditions': [
+            {'indicator': 'Bollinger_Bands', 'operator': 'outside', 'value': '95', 'compareValue': '105'},
+            {'indicator': 'Williams_R', 'operator': 'less_than', 'value': '-80'},
+        ],
+        'logicalOperator': 'OR',
+        'action': 'LONG',
+        'exitCondition': {'type': 'indicator_based', 'indicator': 'RSI', 'operator': 'greater_than', 'indicatorValue': '60'},
+    },
+    'atr_volume_manual': {
+        'conditions': [
+            {'indicator': 'ATR', 'operator': 'greater_than', 'value': '0.05'},
+            {'indicator': 'Volume', 'operator': 'greater_than', 'value': '40000'},
+        ],
+        'logicalOperator': 'AND',
+        'action': 'SHORT',
+        'exitCondition': {'type': 'manual'},
+    },
+}
+
+STAGES = ('indicators', 'signals', 'simulation')
+
+
+def _measure(func, memory: bool) -> tuple:
+    """Run func() and return (result, seconds, peak MB allocated above the starting point or None)."""
+    if not memory:
+        started = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - started, None
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, (peak - baseline) / 2 ** 20
+
+
+class Command(BaseCommand):
+    help = ("Benchmark indicators, signal generation and portfolio simulation on deterministic synthetic "
+            "bars. Runs offline; no market data provider is called.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"Comma-separated bar counts (default: {DEFAULT_SIZES}).")
+        parser.add_argument('--configs', help=f"Comma-separated benchmark strategies (default: all of {', '.join(BENCHMARK_CONFIGS)}).")
+        parser.add_argument('--engine', default=DEFAULT_ENGINE, choices=list(SIMULATION_ENGINES), help="Simulation engine.")
+        parser.add_argument('--freq', default='1min', choices=list(BARS_PER_YEAR), help="Synthetic bar frequency.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data generator.")
+        parser.add_argument('--repeat', type=int, default=1, help="Timed runs per stage; the fastest is reported.")
+        parser.add_argument('--no-memory', action='store_true',
+                            help="Skip the extra tracemalloc run of each stage that measures peak memory.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON instead of a table.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated whole numbers")
+        names = options['configs'].split(',') if options['configs'] else list(BENCHMARK_CONFIGS)
+        unknown = [name for name in names if name not in BENCHMARK_CONFIGS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark strategies: {unknown}. Choose from {list(BENCHMARK_CONFIGS)}")
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be positive")
+
+        rows = []
+        for size in sizes:
+            data, seconds, _ = _measure(lambda: synthetic_ohlcv(size, options['freq'], seed=options['seed']), False)
+            if not options['json']:
+                self.stdout.write(f"{size:,} bars generated in {seconds:.2f}s")
+            for name in names:
+                result = self._benchmark_config(data, name, options)
+                rows.extend(result)
+                if not options['json']:
+                    for row in result:
+                        self.stdout.write(self._format_row(row))
+            del data
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+
+    def _benchmark_config(self, data, name: str, options: dict) -> list:
+        config = BENCHMARK_CONFIGS[name]
+        validate_strategy_config(config)
+        exit_condition = config['exitCondition']
+        simulator_class = SIMULATION_ENGINES[options['engine']]
+        # A cache that never stores, so every run calculates its indicators
+        cache = IndicatorCache(0)
+
+        stage_funcs = {
+            'indicators': lambda: add_indicators_to_data(data, config, cache),
+            'signals': lambda: generate_signals(frame, config),
+            'simulation': lambda: simulator_class(frame, signals, 10000, 1.0, exit_condition).run_simulation(format_results=False),
+        }
+
+        rows = []
+        frame = signals = None
+        # The simulators print every trade; keep that I/O out of the timings
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for stage in STAGES:
+                timings = []
+                for _ in range(options['repeat']):
+                    result, seconds, _ = _measure(stage_funcs[stage], False)
+                    timings.append(seconds)
+                peak_mb = None
+                if not options['no_memory']:
+                    result, _, peak_mb = _measure(stage_funcs[stage], True)
+                if stage == 'indicators':
+                    frame = result
+                elif stage == 'signals':
+                    signals = result
+
+                seconds = min(timings)
+                rows.append({
+                    'bars': len(data),
+                    'config': name,
+                    'engine': options['engine'],
+                    'stage': stage,
+                    'seconds': round(seconds, 4),
+                    'bars_per_second': round(len(data) / seconds) if seconds > 0 else None,
+                    'peak_mb': round(peak_mb, 1) if peak_mb is not None else None,
+                })
+        return rows
+
+    def _format_row(self, row: dict) -> str:
+        peak = f"{row['peak_mb']:>9.1f} MB" if row['peak_mb'] is not None else ''
+        return (f"  {row['config']:<36} {row['stage']:<11} {row['seconds']:>9.4f}s "
+                f"{row['bars_per_second']:>14,} bars/s{peak}")
@@ -0,0 +1,68 @@
+# backend/api/management/commands/paper_trade.py
+import json
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bar_store import get_bar_store
+from api.models import Strategy
+from api.paper_trading import PaperTradingSession, follow_store, format_trade, replay_csv, replay_store
+
+
+class Command(BaseCommand):
+    help = "Run saved strategies forward bar by bar on a CSV replay or the bar store, printing trades as they happen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('strategy_ids', nargs='+', type=int, help="Strategy ids to run.")
+        parser.add_argument('--ticker', help="Ticker to replay from the bar store.")
+        parser.add_argument('--timeframe', default='1d', choices=['5m', '15m', '1h', '1d'],
+                            help="Bar store timeframe (default: 1d).")
+        parser.add_argument('--start', help="First date to replay from the bar store.")
+        parser.add_argument('--end', help="Last date to replay from the bar store (default: today).")
+        parser.add_argument('--csv', help="Replay bars from a CSV file with Date and OHLCV columns instead.")
+        parser.add_argument('--follow', action='store_true',
+                            help="After the replay, keep polling the bar store for newly appended bars.")
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds between bar store polls with --follow.")
+        parser.add_argument('--cash', type=float, default=10000, help="Starting cash per strategy.")
+        parser.add_argument('--leverage', type=float, default=1.0, help="Leverage per strategy (1-10).")
+
+    def handle(self, *args, **options):
+        strategies = list(Strategy.objects.filter(id__in=options['strategy_ids']))
+        missing = set(options['strategy_ids']) - {strategy.id for strategy in strategies}
+        if missing:
+            raise CommandError(f"Strategies not found: {sorted(missing)}")
+
+        tz = None
+        if options['csv']:
+            feed = replay_csv(options['csv'])
+        elif options['ticker'] and options['start']:
+            tz = get_bar_store().describe(options['ticker'], options['timeframe'])['tz']
+            if options['follow']:
+                stopped = []
+                signal.signal(signal.SIGTERM, lambda signum, frame: stopped.append(signum))
+                feed = follow_store(options['ticker'], options['timeframe'], options['start'],
+                                    options['poll_interval'], should_stop=lambda: bool(stopped))
+            else:
+                end = options['end'] or 'today'
+                feed = replay_store(options['ticker'], options['timeframe'], options['start'], end)
+        else:
+            raise CommandError("Pass --csv, or --ticker with --start to replay from the bar store.")
+
+        try:
+            session = PaperTradingSession(
+                [(f"{strategy.id}:{strategy.name}", strategy.configuration) for strategy in strategies],
+                options['cash'],
+                options['leverage'],
+            )
+        except ValueError as e:
+            raise CommandError(f"Invalid strategy configuration: {str(e)}")
+
+        def on_trade(name, trade):
+            self.stdout.write(json.dumps({'strategy': name, **format_trade(trade, tz)}))
+
+        try:
+            summary = session.run(feed, on_trade)
+        except KeyboardInterrupt:
+            summary = {'bars': session.bars, 'results': [runner.summary() for runner in session.runners]}
+
+        self.stdout.write(json.dumps(summary, indent=2))
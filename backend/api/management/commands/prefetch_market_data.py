@@ -0,0 +1,164 @@
+# backend/api/management/commands/prefetch_market_data.py
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.bar_store import get_bar_store
+from api.market_data import fetch_market_data
+from api.ticker_metadata import HISTORY_START, probe_start, record_ticker_metadata
+from api.ticker_universe import universe_tickers
+
+
+def _series_id(ticker: str, timeframe: str) -> str:
+    return f"{ticker}|{timeframe}"
+
+
+class Command(BaseCommand):
+    help = ("Warm the local bar store for a list of tickers and timeframes (default: the backtester's ticker "
+            "universe). Provider rate limits from settings.PROVIDER_RATE_LIMITS apply. Progress is saved after "
+            "every series, so an interrupted run picks up where it stopped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickers', help="Comma-separated tickers (default: every ticker in the universe).")
+        parser.add_argument('--categories', help="Comma-separated universe categories, e.g. 'Technology,ETF'.")
+        parser.add_argument('--timeframes', default='1d', help="Comma-separated timeframes (default: 1d).")
+        parser.add_argument('--start', default=HISTORY_START, help=f"First date to load (default: {HISTORY_START}).")
+        parser.add_argument('--end', help="Last date to load (default: today).")
+        parser.add_argument('--workers', type=int, default=4, help="Series fetched in parallel.")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Only load bars newer than the last stored bar of each series.")
+        parser.add_argument('--progress-file',
+                            help="Where progress is saved for resuming (default: <BAR_STORE_DIR>/.prefetch_progress.json).")
+        parser.add_argument('--restart', action='store_true', help="Ignore saved progress and warm every series again.")
+
+    def handle(self, *args, **options):
+        if options['tickers']:
+            tickers = []
+            for ticker in options['tickers'].split(','):
+                if ticker.strip() and ticker.strip().upper() not in tickers:
+                    tickers.append(ticker.strip().upper())
+        else:
+            categories = [category.strip() for category in options['categories'].split(',')] if options['categories'] else None
+            try:
+                tickers = universe_tickers(categories)
+            except ValueError as e:
+                raise CommandError(str(e))
+        timeframes = [timeframe.strip() for timeframe in options['timeframes'].split(',') if timeframe.strip()]
+        start = options['start']
+        end = options['end'] or date.today().isoformat()
+        if not tickers or not timeframes:
+            raise CommandError("Nothing to prefetch: give at least one ticker and one timeframe")
+        if options['workers'] < 1:
+            raise CommandError("--workers must be positive")
+        try:
+            if date.fromisoformat(end) < date.fromisoformat(start):
+                raise CommandError("--end must not be before --start")
+        except ValueError:
+            raise CommandError("--start and --end must be YYYY-MM-DD dates")
+
+        progress_path = options['progress_file'] or os.path.join(settings.BAR_STORE_DIR, '.prefetch_progress.json')
+        run = {'start': start, 'end': end, 'incremental': options['incremental']}
+        done = set() if options['restart'] else self._load_progress(progress_path, run)
+
+        series = [(ticker, timeframe) for timeframe in timeframes for ticker in tickers]
+        todo = [(ticker, timeframe) for ticker, timeframe in series if _series_id(ticker, timeframe) not in done]
+        skipped = len(series) - len(todo)
+        if skipped:
+            self.stdout.write(f"Resuming: {skipped} of {len(series)} series already warmed by an earlier run")
+        # A window that covers a timeframe's probe window doubles as DateRangeView's probe
+        probes = {
+            timeframe: not options['incremental'] and start <= probe_start(timeframe) and end >= date.today().isoformat()
+            for timeframe in timeframes
+        }
+
+        started = time.perf_counter()
+        finished = failed = new_bars = 0
+        pool = ThreadPoolExecutor(max_workers=min(options['workers'], max(1, len(todo))))
+        futures = {
+            pool.submit(self._warm, ticker, timeframe, start, end, options['incremental'], probes[timeframe]): (ticker, timeframe)
+            for ticker, timeframe in todo
+        }
+        try:
+            for future in as_completed(futures):
+                ticker, timeframe = futures[future]
+                finished += 1
+                prefix = f"[{finished + skipped}/{len(series)}] {ticker} {timeframe}"
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{prefix}: failed: {str(e)}")
+                    continue
+
+                new_bars += result['new_bars']
+                done.add(_series_id(ticker, timeframe))
+                self._save_progress(progress_path, run, done)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{prefix}: {result['new_bars']:+,} bars, {result['bars']:,} stored ({result['source'] or 'up to date'}) "
+                    f"in {result['seconds']:.1f}s; {finished / elapsed:.2f} series/s"
+                )
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.stderr.write(f"Interrupted after {finished} series; run the command again to resume")
+            return
+        pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Warmed {finished - failed} series ({failed} failed, {skipped} from an earlier run) in {elapsed:.1f}s: "
+            f"{(finished / elapsed) if elapsed else 0:.2f} series/s, {(new_bars / elapsed) if elapsed else 0:,.0f} new bars/s"
+        )
+        if failed:
+            self.stderr.write("Failed series stay unfinished; run the command again to retry them")
+        elif os.path.exists(progress_path):
+            os.remove(progress_path)
+
+    def _warm(self, ticker: str, timeframe: str, start: str, end: str, incremental: bool, probe: bool) -> dict:
+        """Load one series into the bar store and report how many bars were added."""
+        store = get_bar_store()
+        before = store.describe(ticker, timeframe)
+        if incremental and before.get('last'):
+            # The last stored day may be incomplete, so load it again along with everything after it
+            start = max(start, datetime.fromisoformat(before['last']).date().isoformat())
+        started = time.perf_counter()
+        source = None
+        if start <= end:
+            try:
+                _, data_range_info = fetch_market_data(ticker, start, end, timeframe)
+                source = data_range_info.get('source')
+                if probe:
+                    record_ticker_metadata(ticker, timeframe, probed=True)
+            finally:
+                # Threads don't get Django's end-of-request cleanup
+                connection.close()
+        stored = store.describe(ticker, timeframe).get('count') or 0
+        new_bars = stored - (before.get('count') or 0)
+        return {
+            'new_bars': new_bars,
+            'bars': stored,
+            'source': source if new_bars else None,
+            'seconds': time.perf_counter() - started,
+        }
+
+    def _load_progress(self, path: str, run: dict) -> set:
+        """Series finished by an earlier run with the same dates and mode."""
+        try:
+            with open(path) as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        return set(progress.get('done', [])) if progress.get('run') == run else set()
+
+    def _save_progress(self, path: str, run: dict, done: set) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'run': run, 'done': sorted(done)}, f)
+        os.replace(tmp_path, path)
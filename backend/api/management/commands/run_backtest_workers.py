@@ -0,0 +1,61 @@
+# backend/api/management/commands/run_backtest_workers.py
+import multiprocessing
+import signal
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.jobs import requeue_stale_jobs, worker_loop, worker_name
+
+
+def _run_worker(index: int, poll_interval: float, heartbeat_interval: float, stale_after: timedelta, stop_event) -> None:
+    # Connections inherited from the parent must not be shared between processes
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    worker_loop(worker_name(index), poll_interval, stop_event.is_set, heartbeat_interval=heartbeat_interval,
+                stale_after=stale_after)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run worker processes that execute queued backtest jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.BACKTEST_JOB_WORKERS,
+                            help="Number of worker processes (caps concurrent simulations).")
+        parser.add_argument('--poll-interval', type=float, default=settings.BACKTEST_JOB_POLL_SECONDS,
+                            help="Seconds to wait before checking an empty queue again.")
+        parser.add_argument('--stale-minutes', type=float, default=settings.BACKTEST_JOB_STALE_MINUTES,
+                            help="Requeue running jobs whose worker sent no heartbeat for this long (checked on startup and then every this many minutes).")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        requeued = requeue_stale_jobs(stale_after)
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale backtest jobs")
+        connections.close_all()
+
+        stop_event = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(target=_run_worker, daemon=True,
+                                    args=(index, options['poll_interval'], settings.BACKTEST_JOB_HEARTBEAT_SECONDS, stale_after,
+                                          stop_event))
+            for index in range(max(1, options['workers']))
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f"Started {len(workers)} backtest workers")
+
+        def stop(signum, frame):
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        # Workers finish their current job before exiting
+        for process in workers:
+            process.join()
+        self.stdout.write("Backtest workers stopped")
@@ -0,0 +1,292 @@
+# backend/api/market_data.py
+import os
+import threading
+from datetime import date, timedelta
+import pandas as pd
+import yfinance as yf
+from django.conf import settings
+
+from .bar_store import get_bar_store
+from .provider_clients import get_provider_clients
+from .providers import ProviderEmpty, ProviderHealth, ProviderOrchestrator, ProviderUnsupported
+from .single_flight import SingleFlight
+from .ticker_metadata import record_ticker_metadata
+
+# Identical market data requests in flight at the same time share one bar store load
+_fetch_flight = SingleFlight()
+
+# Intraday ranges are fetched in windows of this many days, several at once, so no single request
+# runs into a provider's bar or lookback limits (yfinance: 60 days of 5m/15m, 730 days of 1h)
+INTRADAY_CHUNK_DAYS = {'5m': 30, '15m': 30, '1h': 180}
+
+# How far back each provider serves intraday bars; older windows go straight to the next provider
+YFINANCE_INTRADAY_LOOKBACK_DAYS = {'5m': 59, '15m': 59, '1h': 729}
+ALPHA_VANTAGE_INTRADAY_LOOKBACK_DAYS = 30
+
+# Alpha Vantage reports US equity bars in exchange-local time without a timezone
+ALPHA_VANTAGE_TIMEZONE = 'America/New_York'
+
+
+def intraday_history_start(timeframe):
+    """
+    Oldest day any configured provider serves bars of this timeframe from, or
+    None without a limit: daily bars, or intraday bars with a Polygon API key
+    (Polygon keeps years of intraday history).
+    """
+    if timeframe not in YFINANCE_INTRADAY_LOOKBACK_DAYS or os.environ.get("POLYGON_API_KEY"):
+        return None
+    lookback_days = max(YFINANCE_INTRADAY_LOOKBACK_DAYS[timeframe], ALPHA_VANTAGE_INTRADAY_LOOKBACK_DAYS)
+    return date.today() - timedelta(days=lookback_days)
+
+
+def _check_lookback(provider: str, start_date, lookback_days: int) -> None:
+    earliest = date.today() - timedelta(days=lookback_days)
+    if pd.to_datetime(start_date).date() < earliest:
+        raise ProviderUnsupported(f"{provider} only serves intraday bars from {earliest.isoformat()}")
+
+def fetch_data_from_polygon(ticker, start_date, end_date, timeframe):
+    """Fetch data from Polygon.io"""
+    api_key = os.environ.get("POLYGON_API_KEY")
+    if not api_key:
+        raise ProviderUnsupported("Polygon API key not configured")
+    
+    client = get_provider_clients().polygon(api_key)
+    
+    # Map frontend timeframe to Polygon's 'timespan'
+    timespan_map = {'5m': 'minute', '15m': 'minute', '1h': 'hour', '1d': 'day'}
+    multiplier_map = {'5m': 5, '15m': 15, '1h': 1, '1d': 1}
+    
+    # Handle crypto tickers for Polygon
+    polygon_ticker = ticker.upper()
+    if ticker.endswith('USD') and len(ticker) > 3:  # Crypto ticker
+        polygon_ticker = f"X:{ticker.upper()}"  # Polygon crypto format
+    
+    # list_aggs follows Polygon's next_url pages, so long ranges aren't cut off at 50,000 bars
+    aggs = list(client.list_aggs(
+        ticker=polygon_ticker,
+        multiplier=multiplier_map.get(timeframe, 1),
+        timespan=timespan_map.get(timeframe, 'day'),
+        from_=start_date,
+        to=end_date,
+        limit=50000
+    ))
+    
+    if not aggs:
+        raise ProviderEmpty(f"No data found for {ticker}")
+    
+    # Convert to DataFrame
+    data = pd.DataFrame(aggs)
+    data['time'] = pd.to_datetime(data['timestamp'], unit='ms')
+    data.set_index('time', inplace=True)
+    
+    # Standardize column names
+    column_mapping = {
+        'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'v': 'Volume',
+        'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume',
+        'O': 'Open', 'H': 'High', 'L': 'Low', 'C': 'Close', 'V': 'Volume'
+    }
+    
+    existing_columns = list(data.columns)
+    for old_col, new_col in column_mapping.items():
+        if old_col in existing_columns:
+            data.rename(columns={old_col: new_col}, inplace=True)
+    
+    # Keep only the required OHLCV columns
+    required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    available_columns = [col for col in required_columns if col in data.columns]
+    
+    if len(available_columns) < 5:
+        raise ValueError(f"Missing required columns. Available: {available_columns}, Required: {required_columns}")
+    
+    # Select only the required columns
+    data = data[available_columns]
+    
+    # Add data range info
+    data_range_info = {
+        'requested_start': start_date,
+        'requested_end': end_date,
+        'actual_start': data.index.min().strftime('%Y-%m-%d'),
+        'actual_end': data.index.max().strftime('%Y-%m-%d'),
+        'data_points': len(data),
+        'source': 'polygon'
+    }
+    
+    return data, data_range_info
+
+def fetch_data_from_alpha_vantage(ticker, start_date, end_date, timeframe):
+    """Fetch data from Alpha Vantage"""
+    try:
+        api_key = os.environ.get("ALPHA_VANTAGE_API_KEY")
+        if not api_key:
+            raise ProviderUnsupported("Alpha Vantage API key not configured")
+        
+        ts = get_provider_clients().alpha_vantage(api_key)
+        
+        # Handle crypto tickers for Alpha Vantage
+        alpha_ticker = ticker
+        if ticker.endswith('USD') and len(ticker) > 3:  # Crypto ticker
+            alpha_ticker = f"{ticker}"  # Alpha Vantage crypto format
+        
+        # Map timeframe to Alpha Vantage function
+        if timeframe == '1d':
+            # Get daily data
+            data, meta_data = ts.get_daily(symbol=alpha_ticker, outputsize='full')
+        elif timeframe in ['5m', '15m', '1h']:
+            # Get intraday data (Alpha Vantage has 1min, 5min, 15min, 30min, 60min)
+            interval_map = {'5m': '5min', '15m': '15min', '1h': '60min'}
+            interval = interval_map.get(timeframe, '60min')
+            _check_lookback('Alpha Vantage', start_date, ALPHA_VANTAGE_INTRADAY_LOOKBACK_DAYS)
+            data, meta_data = ts.get_intraday(symbol=alpha_ticker, interval=interval, outputsize='full')
+        else:
+            raise ValueError(f"Unsupported timeframe for Alpha Vantage: {timeframe}")
+        
+        if data.empty:
+            raise ValueError(f"No data found for {ticker}")
+        
+        # Standardize Alpha Vantage columns to Open, High, Low, Close, Volume
+        av_column_mapping = {
+            '1. open': 'Open',
+            '2. high': 'High',
+            '3. low': 'Low',
+            '4. close': 'Close',
+            '5. volume': 'Volume',
+            'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
+        }
+        data.rename(columns=av_column_mapping, inplace=True)
+        
+        # Alpha Vantage returns data in reverse chronological order (newest first)
+        # Sort to chronological order (oldest first) for proper backtesting
+        data = data.sort_index()
+
+        # Timestamps are naive exchange-local time; localize them so the bar store converts them to UTC correctly
+        data.index = pd.DatetimeIndex(data.index).tz_localize(ALPHA_VANTAGE_TIMEZONE)
+        
+        # Filter by date range
+        start_dt = pd.to_datetime(start_date).tz_localize(ALPHA_VANTAGE_TIMEZONE)
+        end_dt = pd.to_datetime(end_date).tz_localize(ALPHA_VANTAGE_TIMEZONE)
+        data = data[(data.index >= start_dt) & (data.index <= end_dt)]
+        
+        if data.empty:
+            raise ProviderEmpty(f"No data found for {ticker} in the specified date range")
+        
+        # Add data range info
+        data_range_info = {
+            'requested_start': start_date,
+            'requested_end': end_date,
+            'actual_start': data.index.min().strftime('%Y-%m-%d'),
+            'actual_end': data.index.max().strftime('%Y-%m-%d'),
+            'data_points': len(data),
+            'source': 'alpha_vantage'
+        }
+        
+        return data, data_range_info
+        
+    except (ProviderUnsupported, ProviderEmpty):
+        raise
+    except Exception as e:
+        raise ValueError(f"Alpha Vantage error: {str(e)}")
+
+def fetch_data_from_yfinance(ticker, start_date, end_date, timeframe):
+    """Fetch data from yfinance as primary source"""
+    try:
+        # Handle crypto tickers for yfinance
+        yfinance_ticker = ticker
+        if ticker.endswith('USD') and len(ticker) > 3:  # Crypto ticker
+            yfinance_ticker = f"{ticker}-USD"  # yfinance crypto format
+        
+        # Download data from yfinance over the shared keep-alive session
+        ticker_obj = yf.Ticker(yfinance_ticker, session=get_provider_clients().session('yfinance'))
+        
+        # Map timeframe to yfinance interval
+        # Frontend sends: '5m', '15m', '1h', '1d'
+        # yfinance expects: '5m', '15m', '1h', '1d'
+        interval_map = {'5m': '5m', '15m': '15m', '1h': '1h', '1d': '1d'}
+        interval = interval_map.get(timeframe, '1d')
+        
+        print(f"yfinance: Using interval '{interval}' for timeframe '{timeframe}'")
+        
+        # Convert dates to datetime for better handling
+        start_dt = pd.to_datetime(start_date)
+        end_dt = pd.to_datetime(end_date)
+
+        # yfinance only keeps recent intraday bars; daily data goes back decades
+        if timeframe in YFINANCE_INTRADAY_LOOKBACK_DAYS:
+            _check_lookback('yfinance', start_date, YFINANCE_INTRADAY_LOOKBACK_DAYS[timeframe])
+        data = ticker_obj.history(start=start_dt, end=end_dt, interval=interval)
+        
+        if data.empty:
+            raise ProviderEmpty(f"No data found for {ticker}")
+        
+        # yfinance already has the correct column names (Open, High, Low, Close, Volume)
+        
+        # Add data range info
+        data_range_info = {
+            'requested_start': start_date,
+            'requested_end': end_date,
+            'actual_start': data.index.min().strftime('%Y-%m-%d'),
+            'actual_end': data.index.max().strftime('%Y-%m-%d'),
+            'data_points': len(data),
+            'source': 'yfinance'
+        }
+        
+        return data, data_range_info
+        
+    except (ProviderUnsupported, ProviderEmpty):
+        raise
+    except Exception as e:
+        raise ValueError(f"yfinance error: {str(e)}")
+
+# Providers in order of preference; see ProviderOrchestrator for how they are hedged
+PROVIDERS = (
+    ('yfinance', fetch_data_from_yfinance),  # Best historical coverage, free, no API key required
+    ('Polygon', fetch_data_from_polygon),  # Professional-grade, reliable when an API key is configured
+    ('Alpha Vantage', fetch_data_from_alpha_vantage),  # Good historical data, free tier
+)
+
+_orchestrator = None
+_orchestrator_guard = threading.Lock()
+
+
+def get_provider_orchestrator() -> ProviderOrchestrator:
+    """Return the process-wide provider orchestrator configured from settings.PROVIDER_*."""
+    global _orchestrator
+    with _orchestrator_guard:
+        if _orchestrator is None:
+            health = ProviderHealth(settings.PROVIDER_FAILURE_THRESHOLD, settings.PROVIDER_COOLDOWN_SECONDS)
+            _orchestrator = ProviderOrchestrator(PROVIDERS, settings.PROVIDER_DEADLINE_SECONDS,
+                                                 settings.PROVIDER_HEDGE_DELAY_SECONDS, health,
+                                                 rate_limits=settings.PROVIDER_RATE_LIMITS)
+        return _orchestrator
+
+
+def fetch_from_providers(ticker, start_date, end_date, timeframe):
+    """Fetch market data from yfinance, Polygon and Alpha Vantage, hedging slow or failing providers."""
+    return get_provider_orchestrator().fetch(ticker, start_date, end_date, timeframe)
+
+def _load_market_data(ticker, start_date, end_date, timeframe):
+    result = get_bar_store().load(ticker, timeframe, start_date, end_date, fetch_from_providers,
+                                  chunk_days=INTRADAY_CHUNK_DAYS.get(timeframe),
+                                  max_workers=settings.INTRADAY_FETCH_WORKERS,
+                                  earliest=intraday_history_start(timeframe))
+    # Keep the ticker's first/last bar and bar count current for DateRangeView
+    record_ticker_metadata(ticker, timeframe)
+    return result
+
+
+def fetch_market_data(ticker, start_date, end_date, timeframe):
+    """
+    Serve market data from the local bar store, fetching only missing ranges from providers.
+
+    Concurrent requests for the same (ticker, timeframe, range) share one load,
+    so a popular ticker is fetched once and a failing provider chain is tried
+    once; the bar store's lock file does the same across worker processes.
+    Every load also updates the ticker metadata index.
+    """
+    key = (str(ticker).strip().upper(), timeframe, str(start_date), str(end_date))
+    (data, data_range_info), shared = _fetch_flight.do(
+        key, lambda: _load_market_data(ticker, start_date, end_date, timeframe)
+    )
+    if shared:
+        # Callers may modify what they get back, so each joiner takes its own copy
+        return data.copy(), dict(data_range_info)
+    return data, data_range_info
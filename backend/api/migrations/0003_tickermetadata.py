@@ -0,0 +1,30 @@
+# Generated by Django 4.2.23 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_backtestjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickerMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=20)),
+                ('timeframe', models.CharField(max_length=10)),
+                ('first_date', models.DateField(blank=True, null=True)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('bar_count', models.IntegerField(default=0)),
+                ('source', models.CharField(blank=True, default='', max_length=50)),
+                ('probed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('ticker', 'timeframe')},
+            },
+        ),
+    ]
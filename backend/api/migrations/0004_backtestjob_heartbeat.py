@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-17 01:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_heartbeats(apps, schema_editor):
+    # Jobs already running when this is applied count as having beaten when they started
+    BacktestJob = apps.get_model('api', 'BacktestJob')
+    BacktestJob.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_tickermetadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_heartbeats, migrations.RunPython.noop),
+    ]
@@ -9,4 +9,51 @@ class Strategy(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"'{self.name}' by {self.user.username}"
\ No newline at end of file
+        return f"'{self.name}' by {self.user.username}"
+
+class BacktestJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="backtest_jobs")
+    strategy = models.ForeignKey(Strategy, on_delete=models.SET_NULL, null=True, related_name="backtest_jobs")
+    parameters = models.JSONField() # Backtest request fields plus a snapshot of the strategy configuration
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True) # Refreshed by the worker while the job is running
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Backtest job {self.id} ({self.status}) for {self.user.username}"
+
+class TickerMetadata(models.Model):
+    """Stored bar range of one (ticker, timeframe) series, kept current by market data fetches."""
+    ticker = models.CharField(max_length=20)
+    timeframe = models.CharField(max_length=10)
+    first_date = models.DateField(null=True, blank=True)
+    last_date = models.DateField(null=True, blank=True)
+    bar_count = models.IntegerField(default=0)
+    source = models.CharField(max_length=50, blank=True, default='')
+    probed_at = models.DateTimeField(null=True, blank=True) # Last load of the full history window; None until then
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [('ticker', 'timeframe')]
+
+    def __str__(self):
+        return f"{self.ticker} {self.timeframe}: {self.first_date} to {self.last_date} ({self.bar_count} bars)"
@@ -0,0 +1,106 @@
+# backend/api/monte_carlo.py
+import time
+
+import numpy as np
+
+from .performance import closed_trade_returns
+
+MONTE_CARLO_METHODS = ('bootstrap', 'permutation')
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 20
+# Resampled returns held in memory at once; 10,000 paths of 400 trades fit in one block
+BLOCK_CELLS = 4_000_000
+
+
+def trade_returns(columnar_results: dict) -> np.ndarray:
+    """
+    performance.closed_trade_returns of a columnar backtest result, the same
+    per-trade returns its stats are based on. A position still open at the end
+    of the data has no exit and is left out.
+    """
+    trades = columnar_results.get('trades') or {}
+    return closed_trade_returns(trades.get('type', []), trades.get('portfolio', []))
+
+
+def _resample(rng: np.random.Generator, returns: np.ndarray, paths: int, method: str) -> np.ndarray:
+    if method == 'bootstrap':
+        # Draw trades with replacement
+        return returns[rng.integers(0, len(returns), size=(paths, len(returns)))]
+    # Reorder the same trades: the final equity never changes, the path to it does
+    return rng.permuted(np.broadcast_to(returns, (paths, len(returns))), axis=1)
+
+
+def _path_stats(resampled: np.ndarray, initial_cash: float) -> tuple:
+    """Final equity and max drawdown (%) of every row of resampled trade returns."""
+    equity = initial_cash * np.cumprod(1 + resampled, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), initial_cash)
+    drawdowns = (1 - equity / peaks).max(axis=1) * 100
+    return equity[:, -1], drawdowns
+
+
+def _distribution(values: np.ndarray) -> dict:
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        'mean': round(float(values.mean()), 4),
+        'std': round(float(values.std()), 4),
+        'min': round(float(values.min()), 4),
+        'max': round(float(values.max()), 4),
+        'percentiles': {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        'histogram': {'counts': counts.tolist(), 'edges': [round(float(edge), 4) for edge in edges]},
+    }
+
+
+def run_monte_carlo(returns, initial_cash: float, simulations: int = 1000, method: str = 'bootstrap',
+                    ruin_drawdown_pct: float = 50.0, seed: int = None) -> dict:
+    """
+    Resample trade returns into `simulations` equity paths.
+
+    All paths are built as one (simulations, trades) array and reduced with
+    NumPy, in blocks of BLOCK_CELLS values to bound memory for long trade lists.
+    A path is ruined when its drawdown from the running peak reaches
+    ruin_drawdown_pct.
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Invalid method: {method}. Must be one of {list(MONTE_CARLO_METHODS)}")
+    if simulations < 1:
+        raise ValueError("simulations must be positive")
+    if not 0 < ruin_drawdown_pct <= 100:
+        raise ValueError("ruin_drawdown_pct must be between 0 and 100")
+
+    returns = np.asarray(returns, dtype='float64')
+    if returns.ndim != 1 or not np.isfinite(returns).all():
+        raise ValueError("Trade returns must be a flat list of numbers")
+    if len(returns) < 2:
+        raise ValueError("Monte Carlo analysis needs at least 2 closed trades")
+    if (returns < -1).any():
+        raise ValueError("A trade cannot lose more than 100%")
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    final_equity = np.empty(simulations)
+    max_drawdown = np.empty(simulations)
+    block = max(1, BLOCK_CELLS // len(returns))
+    for start in range(0, simulations, block):
+        end = min(start + block, simulations)
+        final_equity[start:end], max_drawdown[start:end] = _path_stats(
+            _resample(rng, returns, end - start, method), initial_cash
+        )
+
+    original_final, original_drawdown = _path_stats(returns[np.newaxis, :], initial_cash)
+    return {
+        'method': method,
+        'simulations': simulations,
+        'trades': len(returns),
+        'initial_cash': initial_cash,
+        'original': {
+            'final_equity': round(float(original_final[0]), 2),
+            'max_drawdown_pct': round(float(original_drawdown[0]), 4),
+        },
+        'final_equity': _distribution(final_equity),
+        'return_pct': _distribution((final_equity / initial_cash - 1) * 100),
+        'max_drawdown_pct': _distribution(max_drawdown),
+        'ruin_drawdown_pct': ruin_drawdown_pct,
+        'ruin_probability': round(float((max_drawdown >= ruin_drawdown_pct).mean()), 4),
+        'loss_probability': round(float((final_equity < initial_cash).mean()), 4),
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,365 @@
+# backend/api/paper_trading.py
+import time
+
+import numpy as np
+import pandas as pd
+
+from .backtester import validate_strategy_config
+from .bar_store import OHLCV_COLUMNS, get_bar_store
+from .indicators import indicator_column, indicator_params, required_indicators
+from .strategy_plan import SIGNAL_CODES, SIGNAL_HOLD, SIGNAL_NAMES, compile_strategy
+from .streaming_indicators import IndicatorStream
+
+NAN = float('nan')
+
+# --- Feeds: iterables of (timestamp_ns, open, high, low, close, volume) ---
+
+def frame_bars(data: pd.DataFrame):
+    """Yield the bars of an OHLCV DataFrame as plain tuples."""
+    index = pd.DatetimeIndex(data.index)
+    columns = [
+        data[col].to_numpy(dtype='float64').tolist() if col in data.columns else [NAN] * len(data)
+        for col in OHLCV_COLUMNS
+    ]
+    yield from zip(index.as_unit('ns').asi8.tolist(), *columns)
+
+
+def replay_csv(path: str, date_column: str = 'Date'):
+    """Replay bars from a CSV file with a date column and OHLCV columns."""
+    data = pd.read_csv(path, parse_dates=[date_column], index_col=date_column)
+    data.columns = [str(col).strip().title() for col in data.columns]
+    yield from frame_bars(data.sort_index())
+
+
+def replay_store(ticker: str, timeframe: str, start_date, end_date):
+    """Replay bars already in the bar store."""
+    yield from frame_bars(get_bar_store().read(ticker, timeframe, start_date, end_date))
+
+
+def follow_store(ticker: str, timeframe: str, start_date, poll_interval: float = 5.0, should_stop=None):
+    """Replay stored bars from start_date, then keep yielding bars as they are appended to the store."""
+    store = get_bar_store()
+    last_ts = None
+    cursor = pd.Timestamp(start_date).date()
+    while should_stop is None or not should_stop():
+        today = pd.Timestamp.now(tz='UTC').date()
+        data = store.read(ticker, timeframe, cursor, today)
+        for bar in frame_bars(data):
+            if last_ts is None or bar[0] > last_ts:
+                last_ts = bar[0]
+                yield bar
+        if last_ts is not None:
+            cursor = pd.Timestamp(last_ts, unit='ns').date()
+        time.sleep(poll_interval)
+
+
+# --- Signal logic ---
+
+def compile_conditions(config: dict, available_columns) -> list:
+    """
+    Turn a strategy's conditions into per-bar predicates over a {column: value} row.
+
+    Uses the conditions and kernels of the strategy's StrategyPlan, so the rules
+    are those of generate_signals: conditions whose columns are missing are
+    skipped, NaN never satisfies a condition, and a cross needs the previous
+    bar on the other side.
+    """
+    available = set(available_columns)
+    predicates = []
+    for cond in compile_strategy(config).conditions:
+        if cond.kind == 'never':
+            predicates.append(lambda row: False)
+        elif any(column not in available for column in cond.columns()):
+            continue
+        elif cond.kind == 'cross':
+            predicates.append(_cross_predicate(cond))
+        else:
+            predicates.append(lambda row, c=cond.column, k=cond.kernel, o=cond.operands: k(row[c], *o))
+    return predicates
+
+
+def _cross_predicate(cond):
+    previous = [NAN, NAN]
+
+    def crossed(row) -> bool:
+        main, compare = row[cond.column], row[cond.compare_column]
+        prev_main, prev_compare = previous
+        previous[0], previous[1] = main, compare
+        return cond.kernel(prev_main, prev_compare, main, compare)
+
+    return crossed
+
+
+# --- Position and exit rules ---
+
+class StreamingPortfolio:
+    """
+    The position and exit rules of ArrayPortfolioSimulator, one bar at a time.
+
+    on_bar() returns the trades made on that bar as dicts with numeric fields.
+    """
+
+    def __init__(self, initial_cash: float, leverage: float = 1.0, exit_condition: dict = None):
+        self.initial_cash = initial_cash
+        self.leverage = max(1.0, min(10.0, leverage))  # Clamp leverage between 1x and 10x
+        self.exit_condition = exit_condition if exit_condition is not None else {'type': 'manual'}
+        self.cash = initial_cash
+        self.position = 0.0
+        self.in_position = False
+        self.position_type = None
+        self.entry_price = None
+        self.entry_ts = None
+        self.entry_portfolio_value = None
+        self.highest_price = 0
+        self.lowest_price = float('inf')
+        self.equity = None
+        self.trade_count = 0
+        self._prev_close = NAN
+
+        self.exit_type = self.exit_condition.get('type', 'manual')
+        defaults = {'profit_target': 5, 'stop_loss': 2, 'trailing_stop': 3}
+        self.exit_value = None
+        if self.exit_type in defaults:
+            self.exit_value = float(self.exit_condition.get('value', defaults[self.exit_type]))
+        elif self.exit_type == 'indicator_based':
+            self.exit_value = float(self.exit_condition.get('indicatorValue', '70'))
+        self.time_period = self.exit_condition.get('timePeriod', 7)
+        self.time_unit = self.exit_condition.get('timeUnit', 'days')
+        self.exit_operator = self.exit_condition.get('operator', 'greater_than')
+
+    def _should_exit(self, price: float, ts: int, signal: int, exit_indicator_value: float) -> bool:
+        exit_type = self.exit_type
+        if exit_type == 'manual':
+            return signal != SIGNAL_CODES[self.position_type]
+        if exit_type == 'profit_target':
+            if self.position_type == 'LONG':
+                return ((price - self.entry_price) / self.entry_price) * 100 >= self.exit_value
+            return ((self.entry_price - price) / self.entry_price) * 100 >= self.exit_value
+        if exit_type == 'stop_loss':
+            if self.position_type == 'LONG':
+                return ((self.entry_price - price) / self.entry_price) * 100 >= self.exit_value
+            return ((price - self.entry_price) / self.entry_price) * 100 >= self.exit_value
+        if exit_type == 'trailing_stop':
+            if self.position_type == 'LONG':
+                if price > self.highest_price:
+                    self.highest_price = price
+                return self.highest_price > 0 and ((self.highest_price - price) / self.highest_price) * 100 >= self.exit_value
+            if price < self.lowest_price:
+                self.lowest_price = price
+            return self.lowest_price < float('inf') and ((price - self.lowest_price) / self.lowest_price) * 100 >= self.exit_value
+        if exit_type == 'time_based':
+            elapsed_ns = ts - self.entry_ts
+            if self.time_unit == 'minutes':
+                return elapsed_ns / 1e9 / 60 >= self.time_period
+            if self.time_unit == 'hours':
+                return elapsed_ns / 1e9 / 3600 >= self.time_period
+            return elapsed_ns // 86_400_000_000_000 >= self.time_period
+        if exit_type == 'indicator_based' and exit_indicator_value == exit_indicator_value:
+            if self.exit_operator == 'greater_than':
+                return exit_indicator_value > self.exit_value
+            if self.exit_operator == 'less_than':
+                return exit_indicator_value < self.exit_value
+            if self.exit_operator == 'equals':
+                return abs(exit_indicator_value - self.exit_value) < 0.01
+        return False
+
+    def _trade(self, ts: int, trade_type: str, price: float, portfolio: float, pnl: float = NAN, pnl_pct: float = NAN) -> dict:
+        self.trade_count += 1
+        return {'timestamp': ts, 'type': trade_type, 'price': price, 'portfolio': portfolio,
+                'pnl': pnl, 'pnl_pct': pnl_pct, 'leverage': self.leverage}
+
+    def on_bar(self, ts: int, price: float, signal: int, exit_indicator_value: float = NAN) -> list:
+        trades = []
+        prev_close = self._prev_close
+        self._prev_close = price
+
+        # Skip if price is invalid (NaN fails every comparison)
+        if not price > 0:
+            self.equity = self.cash + (self.position * (prev_close if self.equity is not None else price))
+            return trades
+
+        # signal is an int8 code from strategy_plan: 0 HOLD, 1 LONG, -1 SHORT
+        if signal and not self.in_position and self.cash > 0 and self.equity is not None and self.equity > 0:
+            portfolio_value = self.cash
+            available_capital = portfolio_value * self.leverage
+            if signal > 0:
+                self.position = available_capital / price
+                self.highest_price = price
+            else:
+                self.position = -(available_capital / price)
+                self.lowest_price = price
+            self.cash = 0
+            self.in_position = True
+            self.position_type = SIGNAL_NAMES[signal]
+            self.entry_price = price
+            self.entry_ts = ts
+            self.entry_portfolio_value = portfolio_value
+            trades.append(self._trade(ts, self.position_type, price, portfolio_value))
+
+        elif self.in_position and self.position != 0 and self._should_exit(price, ts, signal, exit_indicator_value):
+            entry_value = self.entry_portfolio_value * self.leverage
+            if self.position_type == 'LONG':
+                price_change_pct = ((price - self.entry_price) / self.entry_price) * 100
+                pnl_amount = (price - self.entry_price) * abs(self.position)
+                profit_loss = self.position * price - entry_value
+            else:
+                price_change_pct = ((self.entry_price - price) / self.entry_price) * 100
+                pnl_amount = (self.entry_price - price) * abs(self.position)
+                profit_loss = entry_value - abs(self.position) * price
+            self.cash = self.entry_portfolio_value + profit_loss
+            trades.append(self._trade(ts, f"EXIT {self.position_type}", price, self.cash, pnl_amount, price_change_pct * self.leverage))
+            self.position = 0
+            self.in_position = False
+            self.position_type = None
+
+        # Current equity (actual portfolio value, not leveraged position value)
+        if self.in_position:
+            if self.position_type == 'LONG':
+                equity = self.entry_portfolio_value + (price - self.entry_price) * abs(self.position)
+            else:
+                equity = self.entry_portfolio_value + (self.entry_price - price) * abs(self.position)
+        else:
+            equity = self.cash
+
+        # Margin call: force the position closed instead of going negative
+        if equity <= 0:
+            if self.in_position and self.position != 0:
+                if self.position_type == 'LONG':
+                    pnl_amount = (price - self.entry_price) * abs(self.position)
+                else:
+                    pnl_amount = (self.entry_price - price) * abs(self.position)
+                trades.append(self._trade(ts, f"MARGIN CALL {self.position_type}", price, 0.0, pnl_amount))
+                self.cash = 0
+                self.position = 0
+                self.in_position = False
+                self.position_type = None
+            equity = 0
+
+        self.equity = equity
+        return trades
+
+
+class StrategyRunner:
+    """Runs one strategy configuration forward on a stream of indicator rows."""
+
+    def __init__(self, config: dict, available_columns, initial_cash: float = 10000, leverage: float = 1.0, name=None):
+        validate_strategy_config(config)
+        self.name = name
+        self.signal = SIGNAL_CODES.get(config.get('action', 'LONG'), SIGNAL_HOLD)
+        logical_op = config.get('logicalOperator', 'AND')
+        self._combine = any if logical_op == 'OR' else all
+        self._predicates = compile_conditions(config, available_columns)
+        self.portfolio = StreamingPortfolio(initial_cash, leverage, config.get('exitCondition', {'type': 'manual'}))
+
+        self._exit_column = None
+        exit_condition = self.portfolio.exit_condition
+        if self.portfolio.exit_type == 'indicator_based':
+            indicator = exit_condition.get('indicator', 'RSI')
+            column = indicator_column(indicator, indicator_params(indicator, exit_condition))
+            if column in set(available_columns):
+                self._exit_column = column
+
+    def on_row(self, ts: int, row: dict) -> list:
+        """Evaluate one bar's (forward-filled) row and return the trades it caused."""
+        predicates = self._predicates
+        # Every predicate is evaluated so cross conditions always see the previous bar
+        triggered = bool(predicates) and self._combine([predicate(row) for predicate in predicates])
+        signal = self.signal if triggered else SIGNAL_HOLD
+        exit_value = row[self._exit_column] if self._exit_column is not None else NAN
+        return self.portfolio.on_bar(ts, row['Close'], signal, exit_value)
+
+    def summary(self) -> dict:
+        portfolio = self.portfolio
+        equity = portfolio.equity if portfolio.equity is not None else portfolio.initial_cash
+        return {
+            'strategy': self.name,
+            'equity': equity,
+            'return_pct': (equity - portfolio.initial_cash) / portfolio.initial_cash * 100,
+            'trades': portfolio.trade_count,
+            'position': portfolio.position_type,
+        }
+
+
+class PaperTradingSession:
+    """
+    Drives many strategies from one bar feed.
+
+    Every distinct (indicator, params) pair across the strategies is updated
+    once per bar, so adding strategies only adds their condition checks and
+    position bookkeeping. Indicator and price values are forward-filled like the
+    batch pipeline; warm-up values stay NaN because future bars can't be back-filled.
+    """
+
+    def __init__(self, configs, initial_cash: float = 10000, leverage: float = 1.0, has_high_low: bool = True):
+        configs = list(configs)
+        specs = set()
+        for _, config in configs:
+            validate_strategy_config(config)
+            specs |= required_indicators(config)
+        self.indicators = IndicatorStream(specs, has_high_low)
+        ohlcv = OHLCV_COLUMNS if has_high_low else ['Open', 'Close', 'Volume']
+        self.columns = list(ohlcv) + self.indicators.columns
+        self.runners = [
+            StrategyRunner(config, self.columns, initial_cash, leverage, name=name)
+            for name, config in configs
+        ]
+        self.bars = 0
+        self._row = dict.fromkeys(self.columns, NAN)
+
+    def on_bar(self, ts: int, open_: float, high: float, low: float, close: float, volume: float) -> list:
+        """Feed one bar to every strategy and return (strategy name, trade) pairs."""
+        self.bars += 1
+        row = self._row
+        values = {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+        values.update(self.indicators.update(close, high, low))
+        for column, value in values.items():
+            if value == value and column in row:
+                row[column] = value
+
+        events = []
+        for runner in self.runners:
+            for trade in runner.on_row(ts, row):
+                events.append((runner.name, trade))
+        return events
+
+    def run(self, feed, on_trade=None) -> dict:
+        """Consume a feed, calling on_trade(strategy name, trade) as trades happen."""
+        # Only time spent processing bars is counted, not time waiting on the feed
+        elapsed = 0.0
+        for bar in feed:
+            started = time.perf_counter()
+            for name, trade in self.on_bar(*bar):
+                if on_trade is not None:
+                    on_trade(name, trade)
+            elapsed += time.perf_counter() - started
+        return {
+            'bars': self.bars,
+            'strategies': len(self.runners),
+            'processing_seconds': round(elapsed, 3),
+            'us_per_bar_per_strategy': round(elapsed / max(1, self.bars) / max(1, len(self.runners)) * 1e6, 2),
+            'results': [runner.summary() for runner in self.runners],
+        }
+
+
+def format_trade(trade: dict, tz=None) -> dict:
+    """Display form of a trade event, matching the rows of a backtest's trade list."""
+    date = pd.Timestamp(trade['timestamp'], unit='ns', tz='UTC')
+    if tz:
+        date = date.tz_convert(tz)
+    pnl = trade['pnl']
+    if np.isnan(pnl):
+        pnl_display = '—'
+    elif np.isnan(trade['pnl_pct']):
+        pnl_display = f"+${pnl:,.2f}" if pnl >= 0 else f"-${abs(pnl):,.2f}"
+    elif pnl >= 0:
+        pnl_display = f"+${pnl:,.2f} (+{trade['pnl_pct']:.2f}%)"
+    else:
+        pnl_display = f"-${abs(pnl):,.2f} ({trade['pnl_pct']:.2f}%)"
+    return {
+        'Date': date.strftime('%Y-%m-%d %H:%M'),
+        'Type': trade['type'],
+        'Price': f"{trade['price']:.2f}",
+        'Portfolio': f"${trade['portfolio']:,.2f}",
+        'P&L': pnl_display,
+        'Leverage': f"{trade['leverage']}x"
+    }
@@ -0,0 +1,145 @@
+# backend/api/performance.py
+import numpy as np
+import pandas as pd
+
+NS_PER_YEAR = 365.25 * 24 * 3600 * 10 ** 9
+NS_PER_DAY = 24 * 3600 * 10 ** 9
+ENTRY_TYPES = ('LONG', 'SHORT')
+
+
+def bar_returns(equity: np.ndarray) -> np.ndarray:
+    """Simple return of each bar after the first; a wiped-out account returns 0 from then on."""
+    previous = equity[:-1]
+    return np.divide(equity[1:] - previous, previous, out=np.zeros(len(previous)), where=previous > 0)
+
+
+def periods_per_year(timestamps_ns: np.ndarray) -> float:
+    """Bars per calendar year, measured from the data itself so any timeframe annualizes correctly."""
+    span = float(timestamps_ns[-1] - timestamps_ns[0]) if len(timestamps_ns) > 1 else 0.0
+    if span <= 0:
+        return float('nan')
+    return (len(timestamps_ns) - 1) / (span / NS_PER_YEAR)
+
+
+def drawdown_series(equity: np.ndarray) -> np.ndarray:
+    """Fractional drawdown of every bar from the highest equity so far (0 at a new high, negative below it)."""
+    peaks = np.maximum.accumulate(equity)
+    return np.divide(equity, peaks, out=np.ones(len(equity)), where=peaks > 0) - 1
+
+
+def closed_trade_returns(trade_types, trade_portfolio) -> np.ndarray:
+    """
+    Fractional equity change of every closed trade.
+
+    Entries and exits alternate, so each exit is compared with the portfolio
+    value recorded at the entry just before it; a margin call counts as -100%.
+    """
+    types = np.asarray(trade_types, dtype=object)
+    portfolio = np.asarray(trade_portfolio, dtype='float64')
+    exits = np.flatnonzero(~np.isin(types, ENTRY_TYPES))
+    exits = exits[exits > 0]
+    entry_values = portfolio[exits - 1]
+    return np.divide(portfolio[exits], entry_values, out=np.full(len(exits), -1.0), where=entry_values > 0) - 1
+
+
+def exposure_bars(trade_bars, trade_types, total_bars: int) -> int:
+    """Bars spent in a position: from each entry bar up to its exit bar, or the end of the data if still open."""
+    bars = np.asarray(trade_bars, dtype=np.int64)
+    is_entry = np.isin(np.asarray(trade_types, dtype=object), ENTRY_TYPES)
+    entries, exits = bars[is_entry], bars[~is_entry]
+    if len(entries) > len(exits):
+        exits = np.append(exits, total_bars)
+    return int((exits - entries).sum())
+
+
+def _nan_if_empty(func, values: np.ndarray) -> float:
+    return float(func(values)) if len(values) else float('nan')
+
+
+def performance_stats(equity, timestamps_ns, closes, trade_bars, trade_types, trade_portfolio, initial_cash: float) -> dict:
+    """
+    Risk and trade statistics of one backtest, as floats (NaN where undefined).
+
+    Every metric is a single vectorized pass over the equity curve or the trade
+    arrays, so the cost grows linearly with the bars and trades. Sharpe and
+    Sortino use a zero risk-free rate and are annualized with the bars per year
+    of the data.
+    """
+    equity = np.asarray(equity, dtype='float64')
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)[:len(equity)]
+    closes = np.asarray(closes, dtype='float64')[:len(equity)]
+
+    returns = bar_returns(equity)
+    ppy = periods_per_year(timestamps_ns)
+    annualizer = np.sqrt(ppy) if ppy > 0 else float('nan')
+    mean = _nan_if_empty(np.mean, returns)
+    std = float(returns.std(ddof=1)) if len(returns) > 1 else float('nan')
+    downside = _nan_if_empty(lambda values: np.sqrt(np.mean(np.minimum(values, 0) ** 2)), returns)
+
+    years = (timestamps_ns[-1] - timestamps_ns[0]) / NS_PER_YEAR if len(timestamps_ns) else 0
+    final_equity = equity[-1]
+    if final_equity <= 0:
+        cagr = -1.0
+    elif years > 0:
+        cagr = (final_equity / initial_cash) ** (1 / years) - 1
+    else:
+        cagr = float('nan')
+
+    drawdowns = drawdown_series(equity)
+    # Index of the latest equity high at each bar; the gap to it is the time spent under water
+    bar_index = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(drawdowns >= 0, bar_index, 0))
+    underwater_ns = timestamps_ns - timestamps_ns[last_peak]
+
+    trade_returns = closed_trade_returns(trade_types, trade_portfolio)
+    gross_profit = trade_returns[trade_returns > 0].sum()
+    gross_loss = -trade_returns[trade_returns < 0].sum()
+
+    valid_closes = closes[np.isfinite(closes) & (closes > 0)]
+    buy_and_hold = valid_closes[-1] / valid_closes[0] - 1 if len(valid_closes) else float('nan')
+
+    return {
+        'Exposure Time [%]': exposure_bars(trade_bars, trade_types, len(equity)) / len(equity) * 100,
+        'Buy & Hold Return [%]': buy_and_hold * 100,
+        'CAGR [%]': cagr * 100,
+        'Sharpe Ratio': mean / std * annualizer if std > 0 else float('nan'),
+        'Sortino Ratio': mean / downside * annualizer if downside > 0 else float('nan'),
+        'Max. Drawdown [%]': float(drawdowns.min()) * 100,
+        'Max. Drawdown Duration [days]': float(underwater_ns.max()) / NS_PER_DAY,
+        'Max. Drawdown Duration [bars]': int((bar_index - last_peak).max()),
+        '# Closed Trades': len(trade_returns),
+        'Win Rate [%]': _nan_if_empty(lambda values: (values > 0).mean() * 100, trade_returns),
+        'Profit Factor': gross_profit / gross_loss if gross_loss > 0 else float('nan'),
+        'Avg. Trade [%]': _nan_if_empty(np.mean, trade_returns) * 100,
+    }
+
+
+def rolling_series(equity, timestamps_ns, window: int) -> dict:
+    """
+    Rolling annualized Sharpe ratio and drawdown over the last `window` bars, aligned with the equity curve.
+
+    Bars before a full window of returns has passed are NaN for the Sharpe
+    ratio; the drawdown is measured from the highest equity within the window.
+    """
+    equity = pd.Series(np.asarray(equity, dtype='float64'))
+    ppy = periods_per_year(np.asarray(timestamps_ns, dtype=np.int64)[:len(equity)])
+    returns = pd.Series(np.concatenate([[np.nan], bar_returns(equity.to_numpy())]))
+
+    rolling = returns.rolling(window)
+    std = rolling.std()
+    sharpe = rolling.mean() / std.where(std > 0) * (np.sqrt(ppy) if ppy > 0 else np.nan)
+    peaks = equity.rolling(window, min_periods=1).max()
+    drawdown = equity / peaks.where(peaks > 0) - 1
+    return {
+        'rolling_sharpe': sharpe.to_numpy(dtype='float64'),
+        'rolling_drawdown': drawdown.to_numpy(dtype='float64'),
+    }
+
+
+def format_stat(value):
+    """Display form of a numeric stat: two decimals, 'N/A' where undefined."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if not np.isfinite(value):
+        return 'N/A'
+    return f"{value:.2f}"
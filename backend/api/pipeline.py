@@ -0,0 +1,206 @@
+# backend/api/pipeline.py
+import logging
+
+import pandas as pd
+from rest_framework import status
+
+from .backtester import SIMULATION_ENGINES
+from .downsampling import DOWNSAMPLE_METHODS, MIN_POINTS
+from .market_data import fetch_market_data
+from .models import Strategy
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestRequestError(Exception):
+    """A backtest request problem that should be returned to the client as an error response."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def parse_backtest_params(data) -> dict:
+    """Read and validate the common backtest request fields."""
+    params = {
+        'strategy_id': data.get('strategy_id'),
+        'ticker': data.get('ticker', 'AAPL'),
+        'start_date': data.get('start_date', '2022-01-01'),
+        'end_date': data.get('end_date', '2023-01-01'),
+        'timeframe': data.get('timeframe', 'day'),  # Polygon uses 'day', 'hour', 'minute'
+        'cash': int(data.get('cash', 10000)),
+        'leverage': float(data.get('leverage', 1.0)),
+        'engine': data.get('engine'),
+        'max_points': data.get('max_points'),  # Omit for the full-resolution equity curve
+        'downsample': data.get('downsample', 'lttb'),
+        'rolling_window': data.get('rolling_window'),  # Bars for rolling Sharpe/drawdown series; omit to skip them
+    }
+
+    # Validate inputs
+    if not params['strategy_id']:
+        raise BacktestRequestError("Strategy ID is required.")
+
+    if params['cash'] <= 0:
+        raise BacktestRequestError("Initial cash must be positive.")
+
+    if params['leverage'] < 1.0 or params['leverage'] > 10.0:
+        raise BacktestRequestError("Leverage must be between 1x and 10x.")
+
+    if not params['ticker'] or not params['ticker'].strip():
+        raise BacktestRequestError("Ticker symbol is required.")
+
+    if params['engine'] is not None and params['engine'] not in SIMULATION_ENGINES:
+        raise BacktestRequestError(f"Invalid engine. Must be one of: {', '.join(SIMULATION_ENGINES)}.")
+
+    if params['max_points'] is not None:
+        try:
+            params['max_points'] = int(params['max_points'])
+        except (TypeError, ValueError):
+            raise BacktestRequestError("max_points must be a whole number.")
+        if params['max_points'] < MIN_POINTS:
+            raise BacktestRequestError(f"max_points must be at least {MIN_POINTS}.")
+
+    if params['downsample'] not in DOWNSAMPLE_METHODS:
+        raise BacktestRequestError(f"Invalid downsample method. Must be one of: {', '.join(DOWNSAMPLE_METHODS)}.")
+
+    if params['rolling_window'] is not None:
+        try:
+            params['rolling_window'] = int(params['rolling_window'])
+        except (TypeError, ValueError):
+            raise BacktestRequestError("rolling_window must be a whole number.")
+        if params['rolling_window'] < 2:
+            raise BacktestRequestError("rolling_window must be at least 2 bars.")
+
+    return params
+
+
+def get_user_strategy(user, strategy_id) -> Strategy:
+    """Return the user's strategy or raise a 404 request error."""
+    try:
+        return Strategy.objects.get(id=strategy_id, user=user)
+    except Strategy.DoesNotExist:
+        raise BacktestRequestError("Strategy not found.", status.HTTP_404_NOT_FOUND)
+
+
+def load_backtest_data(ticker: str, start_date: str, end_date: str, timeframe: str) -> tuple:
+    """
+    Fetch and validate market data for a backtest.
+
+    Returns (data, data_range_message), where the message describes how well
+    the available data covers the requested range.
+    """
+    try:
+        data, data_range_info = fetch_market_data(ticker, start_date, end_date, timeframe)
+        
+        logger.debug("%s %s: columns %s, shape %s, source %s\n%s", ticker, timeframe, list(data.columns), data.shape,
+                     data_range_info.get('source', 'unknown'), data.head())
+        
+        # Check if we have the required 'Close' column
+        if 'Close' not in data.columns:
+            available_columns = list(data.columns)
+            raise BacktestRequestError(
+                f"Data format error: 'Close' column not found. Available columns: {available_columns}. Please check your data source."
+            )
+        
+        # Ensure we have all required columns
+        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+        missing_columns = [col for col in required_columns if col not in data.columns]
+        if missing_columns:
+            raise BacktestRequestError(
+                f"Missing required columns: {missing_columns}. Available columns: {list(data.columns)}"
+            )
+        
+        # Validate data quality
+        if data.empty:
+            raise BacktestRequestError(f"No valid data found for {ticker} in the specified date range.")
+        
+        if len(data) < 30:  # Need at least 30 data points for indicators
+            raise BacktestRequestError(f"Insufficient data for {ticker}. Need at least 30 data points, got {len(data)}.")
+        
+        # Check if the requested date range matches the available data range
+        requested_start = pd.to_datetime(start_date)
+        requested_end = pd.to_datetime(end_date)
+        actual_start = pd.to_datetime(data_range_info['actual_start'])
+        actual_end = pd.to_datetime(data_range_info['actual_end'])
+
+        # Calculate the coverage of the requested range
+        requested_days = (requested_end - requested_start).days
+        actual_days = (actual_end - actual_start).days
+        
+        logger.debug("%s: requested %s to %s (%s days), got %s to %s (%s days)", ticker, start_date, end_date, requested_days,
+                     data_range_info['actual_start'], data_range_info['actual_end'], actual_days)
+        
+        # Calculate what percentage of the requested range we actually have
+        # We'll consider it a full range if we have at least 80% of the requested days
+        # and the actual range overlaps significantly with the requested range
+        coverage_threshold = 0.8  # 80% coverage
+        
+        # Check if the actual range significantly overlaps with the requested range
+        overlap_start = max(requested_start, actual_start)
+        overlap_end = min(requested_end, actual_end)
+        overlap_days = max(0, (overlap_end - overlap_start).days)
+        
+        # Calculate coverage percentage
+        coverage_percentage = overlap_days / requested_days if requested_days > 0 else 0
+        
+        logger.debug("%s: overlap %s to %s (%s days), coverage %.1f%%", ticker, overlap_start, overlap_end, overlap_days,
+                     coverage_percentage * 100)
+        
+        # Determine if this is a significant portion of the requested range
+        is_significant_coverage = coverage_percentage >= coverage_threshold
+        
+        # Check if we have limited overlap with the requested range
+        # This should be based on overlap, not total actual days
+        is_limited_data = overlap_days < (requested_days * 0.5)  # Less than 50% overlap
+        
+        if is_limited_data or not is_significant_coverage:
+            # Check if there's no overlap at all
+            if overlap_days == 0:
+                message = f"⚠️ No data available for requested range. You requested {start_date} to {end_date}, but data is only available from {data_range_info['actual_start']} to {data_range_info['actual_end']} for {ticker}."
+            else:
+                message = f"⚠️ Limited data available for requested range. You requested {start_date} to {end_date} ({requested_days} days), but only {overlap_days} days overlap with available data from {data_range_info['actual_start']} to {data_range_info['actual_end']} for {ticker}."
+            
+            data_range_message = {
+                'warning': True,
+                'message': message,
+                'requested_range': f"{start_date} to {end_date}",
+                'available_range': f"{data_range_info['actual_start']} to {data_range_info['actual_end']}",
+                'data_points': data_range_info['data_points'],
+                'data_source': data_range_info['source'],
+                'coverage_percentage': round(coverage_percentage * 100, 1),
+                'overlap_days': overlap_days
+            }
+        elif coverage_percentage >= 0.95:  # 95% or more coverage
+            data_range_message = {
+                'warning': False,
+                'message': f"✅ Full data range available: {start_date} to {end_date}",
+                'requested_range': f"{start_date} to {end_date}",
+                'available_range': f"{data_range_info['actual_start']} to {data_range_info['actual_end']}",
+                'data_points': data_range_info['data_points'],
+                'data_source': data_range_info['source'],
+                'coverage_percentage': round(coverage_percentage * 100, 1)
+            }
+        else:
+            data_range_message = {
+                'warning': False,
+                'message': f"📊 Partial data range available: {data_range_info['actual_start']} to {data_range_info['actual_end']} (requested {start_date} to {end_date})",
+                'requested_range': f"{start_date} to {end_date}",
+                'available_range': f"{data_range_info['actual_start']} to {data_range_info['actual_end']}",
+                'data_points': data_range_info['data_points'],
+                'data_source': data_range_info['source'],
+                'coverage_percentage': round(coverage_percentage * 100, 1)
+            }
+
+    except BacktestRequestError:
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        if "API key" in error_msg.lower():
+            raise BacktestRequestError("Invalid API key. Please check your Alpha Vantage or Polygon API configuration.", status.HTTP_500_INTERNAL_SERVER_ERROR)
+        elif "not found" in error_msg.lower() or "invalid" in error_msg.lower():
+            raise BacktestRequestError(f"Invalid ticker symbol: {ticker}. Please check the symbol and try again.")
+        else:
+            raise BacktestRequestError(f"Could not fetch market data from Polygon, yfinance, or Alpha Vantage: {error_msg}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return data, data_range_message
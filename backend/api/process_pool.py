@@ -0,0 +1,79 @@
+# backend/api/process_pool.py
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# Indicator frames a pool worker keeps unpickled, newest last; a sweep's chunks mostly land on workers that already have it
+_SHARED_FRAMES_KEPT = 2
+_shared_frames = OrderedDict()
+
+
+def _init_worker() -> None:
+    # Workers are spawned, not forked, so they start without the web process's threads and set Django up themselves
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+
+def pool_workers() -> int:
+    """Size of the shared process pool."""
+    from django.conf import settings
+    configured = getattr(settings, 'BACKTEST_POOL_WORKERS', None)
+    return max(1, int(configured or os.cpu_count() or 1))
+
+
+_pool = None
+_pool_guard = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the process-wide pool for CPU-bound backtest work (sweeps,
+    walk-forward runs, batches), sized by settings.BACKTEST_POOL_WORKERS.
+
+    Every request in this process queues its tasks on the same pool, so
+    concurrent requests share a fixed number of worker processes instead of
+    each starting its own. A pool broken by a crashed worker is replaced.
+    """
+    global _pool
+    with _pool_guard:
+        if _pool is None or getattr(_pool, '_broken', False):
+            _pool = ProcessPoolExecutor(max_workers=pool_workers(), mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+        return _pool
+
+
+@contextmanager
+def shared_frame(frame):
+    """
+    Pickle a frame to a temporary file for the duration of the block and
+    yield its path, so pool tasks can pass the path and each worker loads the
+    frame once with load_shared_frame() instead of receiving it with every task.
+    """
+    # Workers cache frames by path, so a path must never come back for a different frame
+    fd, path = tempfile.mkstemp(prefix=f'fluxtrader-frame-{uuid.uuid4().hex}-', suffix='.pkl')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def load_shared_frame(path: str):
+    """Frame written by shared_frame(), unpickled at most once per worker process."""
+    if path in _shared_frames:
+        _shared_frames.move_to_end(path)
+        return _shared_frames[path]
+    with open(path, 'rb') as f:
+        frame = pickle.load(f)
+    _shared_frames[path] = frame
+    while len(_shared_frames) > _SHARED_FRAMES_KEPT:
+        _shared_frames.popitem(last=False)
+    return frame
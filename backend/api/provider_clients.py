@@ -0,0 +1,184 @@
+# backend/api/provider_clients.py
+import threading
+
+import requests
+from alpha_vantage.timeseries import TimeSeries
+from polygon import RESTClient
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+METRIC_PREFIX = 'fluxtrader_provider'
+
+
+class ConnectionStats:
+    """HTTP requests sent and TCP/TLS connections opened for one provider."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            requests_sent, connections = self.requests, self.connections
+        reused = max(0, requests_sent - connections)
+        return {
+            'requests': requests_sent,
+            'connections': connections,
+            'reused': reused,
+            'reuse_rate': round(reused / requests_sent, 4) if requests_sent else None,
+        }
+
+
+def _counting_pool_classes(stats: ConnectionStats) -> dict:
+    """urllib3 pool classes that count requests and socket connects into stats."""
+    def counting(pool_cls):
+        class CountingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                stats.record_connection()
+                super().connect()
+
+        class CountingPool(pool_cls):
+            ConnectionCls = CountingConnection
+
+            def _make_request(self, *args, **kwargs):
+                stats.record_request()
+                return super()._make_request(*args, **kwargs)
+
+        return CountingPool
+
+    return {'http': counting(HTTPConnectionPool), 'https': counting(HTTPSConnectionPool)}
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """requests adapter whose keep-alive pools report to a ConnectionStats."""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self.stats)
+
+
+class PooledTimeSeries(TimeSeries):
+    """alpha_vantage TimeSeries that sends its calls through a shared requests.Session instead of requests.get."""
+
+    def __init__(self, *args, session: requests.Session = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session or requests.Session()
+
+    def _handle_api_call(self, url):
+        # Overrides a private method of alpha_vantage 3.0.0 (pinned in requirements.txt) with the same JSON/pandas
+        # response handling; compare it with AlphaVantage._handle_api_call before upgrading that package
+        response = self.session.get(url, proxies=self.proxy, headers=self.headers)
+        json_response = response.json()
+        if not json_response:
+            raise ValueError('Error getting data from the api, no return was given.')
+        if "Error Message" in json_response:
+            raise ValueError(json_response["Error Message"])
+        if "Information" in json_response and self.treat_info_as_error:
+            raise ValueError(json_response["Information"])
+        if "Note" in json_response and self.treat_info_as_error:
+            raise ValueError(json_response["Note"])
+        return json_response
+
+
+class ProviderClients:
+    """
+    Per-process registry of market data provider clients.
+
+    Each provider gets one keep-alive connection pool that every request and
+    thread shares, so repeat fetches skip the TCP and TLS handshakes. Polygon
+    clients wrap a thread-safe urllib3 PoolManager. Sessions are only used for
+    plain GETs, which is how yfinance itself shares one session across threads.
+    """
+
+    def __init__(self, pool_size: int = 10):
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._polygon = {}
+        self._alpha_vantage = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def stats_for(self, provider: str) -> ConnectionStats:
+        with self._lock:
+            if provider not in self._stats:
+                self._stats[provider] = ConnectionStats()
+            return self._stats[provider]
+
+    def session(self, provider: str) -> requests.Session:
+        """Shared keep-alive requests.Session of a provider."""
+        stats = self.stats_for(provider)
+        with self._lock:
+            if provider not in self._sessions:
+                session = requests.Session()
+                adapter = CountingHTTPAdapter(stats, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[provider] = session
+            return self._sessions[provider]
+
+    def polygon(self, api_key: str, **kwargs) -> RESTClient:
+        """Shared Polygon RESTClient for an API key."""
+        stats = self.stats_for('polygon')
+        with self._lock:
+            if api_key not in self._polygon:
+                client = RESTClient(api_key, **kwargs)
+                client.client.pool_classes_by_scheme = _counting_pool_classes(stats)
+                # Keep up to pool_size idle connections per host instead of urllib3's default of one
+                client.client.connection_pool_kw['maxsize'] = self.pool_size
+                self._polygon[api_key] = client
+            return self._polygon[api_key]
+
+    def alpha_vantage(self, api_key: str) -> PooledTimeSeries:
+        """Shared Alpha Vantage TimeSeries (pandas output) for an API key."""
+        session = self.session('alpha_vantage')
+        with self._lock:
+            if api_key not in self._alpha_vantage:
+                self._alpha_vantage[api_key] = PooledTimeSeries(key=api_key, output_format='pandas', session=session)
+            return self._alpha_vantage[api_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            providers = dict(self._stats)
+        return {provider: stats.as_dict() for provider, stats in sorted(providers.items())}
+
+    def render(self) -> str:
+        """Connection counters in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_http_requests_total HTTP requests sent to each market data provider.",
+            f"# TYPE {METRIC_PREFIX}_http_requests_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_http_requests_total{{provider="{name}"}} {values["requests"]}' for name, values in stats.items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_http_connections_total TCP/TLS connections opened to each market data provider.",
+            f"# TYPE {METRIC_PREFIX}_http_connections_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_http_connections_total{{provider="{name}"}} {values["connections"]}' for name, values in stats.items()]
+        return '\n'.join(lines) + '\n'
+
+
+_provider_clients = None
+_provider_clients_guard = threading.Lock()
+
+
+def get_provider_clients() -> ProviderClients:
+    """Return the process-wide provider client registry sized by settings.PROVIDER_HTTP_POOL_SIZE."""
+    global _provider_clients
+    with _provider_clients_guard:
+        if _provider_clients is None:
+            from django.conf import settings
+            _provider_clients = ProviderClients(settings.PROVIDER_HTTP_POOL_SIZE)
+        return _provider_clients
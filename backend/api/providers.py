@@ -0,0 +1,243 @@
+# backend/api/providers.py
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+
+class ProviderUnsupported(ValueError):
+    """The provider can't serve this request by design (e.g. outside its history or not configured); not a health failure."""
+
+
+class ProviderEmpty(ValueError):
+    """The provider answered but has no bars in the range (e.g. a weekend, a holiday, or today before the open); not a health failure."""
+
+
+class ProviderRateLimited(ValueError):
+    """The provider's rate limit had no budget left before the deadline; says nothing about its health."""
+
+
+class RateLimiter:
+    """Token bucket allowing `per_minute` calls per minute, with bursts of up to that many."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Take a token, waiting up to timeout seconds (forever if None); False if none became available."""
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.per_minute, self._tokens + (now - self._updated) * self.per_minute / 60)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_seconds = (1 - self._tokens) * 60 / self.per_minute
+            if give_up_at is not None:
+                if now + wait_seconds > give_up_at:
+                    return False
+            time.sleep(wait_seconds)
+
+
+class ProviderHealth:
+    """
+    Recent outcome of each market data provider.
+
+    After failure_threshold consecutive failures (errors or missed deadlines) a
+    provider is cooling down for cooldown_seconds and is skipped; one success
+    resets it. Each call counts once, whichever way it ends.
+    """
+
+    def __init__(self, failure_threshold: int = 2, cooldown_seconds: float = 60):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = {}
+        self._cooldown_until = {}
+        self._lock = threading.Lock()
+
+    def available(self, name: str) -> bool:
+        with self._lock:
+            return time.monotonic() >= self._cooldown_until.get(name, 0)
+
+    def record_success(self, name: str) -> None:
+        with self._lock:
+            self._failures[name] = 0
+            self._cooldown_until.pop(name, None)
+
+    def record_failure(self, name: str) -> None:
+        with self._lock:
+            self._failures[name] = self._failures.get(name, 0) + 1
+            if self._failures[name] >= self.failure_threshold:
+                self._cooldown_until[name] = time.monotonic() + self.cooldown_seconds
+                print(f"Provider {name} failed {self._failures[name]} times in a row; skipping it for {self.cooldown_seconds}s")
+
+    def snapshot(self) -> dict:
+        """Consecutive failures and remaining cool-down seconds of each provider seen so far."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    'consecutive_failures': failures,
+                    'cooldown_seconds_left': round(max(0.0, self._cooldown_until.get(name, 0) - now), 1),
+                }
+                for name, failures in self._failures.items()
+            }
+
+
+class _Attempt:
+    """
+    One provider call. Its deadline starts once the rate limiter lets it run.
+    Either the call finishes first or the deadline sweep expires it first;
+    only that outcome updates the provider's health.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.launched_at = time.monotonic()
+        self.started_at = None
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def deadline(self, seconds: float) -> float:
+        return (self.started_at or self.launched_at) + seconds
+
+    def settle(self) -> bool:
+        """Claim the attempt's outcome; False if it was already claimed."""
+        with self._lock:
+            if self._settled:
+                return False
+            self._settled = True
+            return True
+
+
+class ProviderOrchestrator:
+    """
+    Fetch from a prioritized list of (name, fetcher) providers with hedging.
+
+    The first available provider starts right away. The next one starts as soon
+    as the running ones have failed, or after hedge_delay seconds without an
+    answer, and the first valid frame wins. A provider that hasn't answered
+    within deadline_seconds counts as failed; its thread is left to finish in
+    the background since it can't be interrupted. Providers cooling down in
+    ProviderHealth are skipped unless every provider is.
+
+    rate_limits maps provider names to calls per minute. A call waits for its
+    provider's budget before its deadline starts, and gives up if none frees
+    up within deadline_seconds. Waiting on the budget is not a health failure.
+    """
+
+    def __init__(self, providers, deadline_seconds: float = 20, hedge_delay: float = 3,
+                 health: ProviderHealth = None, max_workers: int = 8, rate_limits: dict = None):
+        self.providers = list(providers)
+        self.deadline_seconds = deadline_seconds
+        self.hedge_delay = hedge_delay
+        self.health = health or ProviderHealth()
+        self.rate_limiters = {name: RateLimiter(limit) for name, limit in (rate_limits or {}).items() if limit}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='provider')
+
+    def _call(self, attempt: _Attempt, fetcher, ticker, start_date, end_date, timeframe):
+        limiter = self.rate_limiters.get(attempt.name)
+        if limiter is not None and not limiter.acquire(timeout=self.deadline_seconds):
+            raise ProviderRateLimited(f"rate limit of {limiter.per_minute:g} requests per minute reached")
+        attempt.started_at = time.monotonic()
+        data, data_range_info = fetcher(ticker, start_date, end_date, timeframe)
+        if not isinstance(data, pd.DataFrame) or data.empty:
+            raise ProviderEmpty(f"No data found for {ticker}")
+        return data, data_range_info
+
+    def _launch(self, name: str, fetcher, ticker, start_date, end_date, timeframe) -> tuple:
+        print(f"Attempting to fetch data from {name} for {ticker}")
+        attempt = _Attempt(name)
+        future = self._executor.submit(self._call, attempt, fetcher, ticker, start_date, end_date, timeframe)
+
+        # Every finished call updates the provider's health, including hedged calls nobody waits for any more,
+        # unless the deadline sweep already counted it as failed
+        def record(done):
+            if done.cancelled() or isinstance(done.exception(), (ProviderUnsupported, ProviderEmpty, ProviderRateLimited)):
+                return
+            if not attempt.settle():
+                return
+            if done.exception() is None:
+                self.health.record_success(name)
+            else:
+                self.health.record_failure(name)
+        future.add_done_callback(record)
+        return future, attempt
+
+    def fetch(self, ticker, start_date, end_date, timeframe) -> tuple:
+        """
+        Return (data, data_range_info) from the first provider with a valid
+        answer, else raise ValueError: ProviderUnsupported when every provider
+        was asked and none of them serves this request, ProviderEmpty when
+        every provider was asked and the ones that serve it have no bars in
+        the range.
+        """
+        queue = [(name, fetcher) for name, fetcher in self.providers if self.health.available(name)]
+        if not queue:
+            print("All providers are cooling down; trying them anyway")
+            queue = list(self.providers)
+        # Only a verdict from every provider makes the request unservable, not from the ones that happen to be healthy
+        unsupported = len(queue) == len(self.providers)
+        empty = False
+
+        errors = []
+        pending = {}  # future -> _Attempt
+        next_hedge = None
+        while queue or pending:
+            now = time.monotonic()
+            if queue and (not pending or now >= next_hedge):
+                name, fetcher = queue.pop(0)
+                future, attempt = self._launch(name, fetcher, ticker, start_date, end_date, timeframe)
+                pending[future] = attempt
+                next_hedge = now + self.hedge_delay
+                continue
+
+            wake_at = min(attempt.deadline(self.deadline_seconds) for attempt in pending.values())
+            if queue:
+                wake_at = min(wake_at, next_hedge)
+            # A call still waiting on its rate limit gives up by itself, so never spin while it does
+            done, _ = wait(pending, timeout=max(0.01, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = pending.pop(future).name
+                try:
+                    data, data_range_info = future.result()
+                except Exception as e:
+                    if isinstance(e, ProviderEmpty):
+                        empty = True
+                    else:
+                        unsupported = unsupported and isinstance(e, ProviderUnsupported)
+                    error_msg = f"{name} failed: {str(e)}"
+                    print(error_msg)
+                    errors.append(error_msg)
+                    continue
+                print(f"Successfully fetched data from {name}: {data.shape}")
+                for other in pending:
+                    other.cancel()
+                return data, data_range_info
+
+            now = time.monotonic()
+            for future, attempt in list(pending.items()):
+                # Calls still waiting on their rate limit have no deadline yet
+                if attempt.started_at is None or now < attempt.deadline(self.deadline_seconds):
+                    continue
+                if not attempt.settle():
+                    continue  # It finished just now; the next wait() picks it up
+                del pending[future]
+                unsupported = False
+                self.health.record_failure(attempt.name)
+                error_msg = f"{attempt.name} failed: no response within {self.deadline_seconds}s"
+                print(error_msg)
+                errors.append(error_msg)
+
+        if unsupported and empty:
+            raise ProviderEmpty(f"No data source has bars in this range. Errors: {'; '.join(errors)}")
+        if unsupported:
+            raise ProviderUnsupported(f"No data source serves this request. Errors: {'; '.join(errors)}")
+        raise ValueError(f"All data sources failed. Errors: {'; '.join(errors)}")
@@ -0,0 +1,33 @@
+# backend/api/renderers.py
+import msgpack
+import numpy as np
+from rest_framework.renderers import BaseRenderer
+
+
+def _encode_value(value):
+    """msgpack fallback for NumPy values. Arrays become {dtype, shape, data} with little-endian raw bytes."""
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        if array.dtype.byteorder == '>':
+            array = array.astype(array.dtype.newbyteorder('<'))
+        return {'dtype': array.dtype.str, 'shape': list(array.shape), 'data': array.tobytes()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to msgpack")
+
+
+class MsgPackRenderer(BaseRenderer):
+    """
+    Renders responses as msgpack. Selected with 'Accept: application/msgpack'
+    or '?format=msgpack'; typed columns are sent as raw little-endian buffers
+    that map directly onto JavaScript typed arrays.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode_value, use_bin_type=True)
@@ -0,0 +1,200 @@
+# backend/api/result_cache.py
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from .backtester import DEFAULT_ENGINE, run_backtest
+from .indicator_cache import data_fingerprint
+from .instrumentation import StageTimings
+from .strategy_plan import StrategyPlan
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_MB = 256
+DEFAULT_TTL_SECONDS = 3600
+
+
+def _strip_ids(value):
+    """Drop client-side 'id' keys, which don't affect the backtest."""
+    if isinstance(value, dict):
+        return {key: _strip_ids(item) for key, item in value.items() if key != 'id'}
+    if isinstance(value, list):
+        return [_strip_ids(item) for item in value]
+    return value
+
+
+def canonical_config(config: dict) -> str:
+    """
+    Return a canonical JSON form of a strategy configuration.
+
+    Conditions are combined with a single AND or OR, so their order does not
+    change the signals and they are sorted. The logical operator is dropped when
+    there is only one condition.
+    """
+    config = _strip_ids(config)
+    conditions = config.get('conditions')
+    if isinstance(conditions, list):
+        config['conditions'] = sorted(conditions, key=lambda cond: json.dumps(cond, sort_keys=True, default=str))
+        if len(conditions) < 2:
+            config.pop('logicalOperator', None)
+    return json.dumps(config, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def result_cache_key(config: dict, fingerprint: str, run_params: dict) -> str:
+    """Hash of the canonical config, the market data fingerprint and the run parameters."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(canonical_config(config).encode())
+    digest.update(fingerprint.encode())
+    digest.update(json.dumps(run_params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of backtest results with a time-to-live.
+
+    Results are stored pickled, which gives every get() its own deep copy to
+    modify and measures each entry's size. The least recently used entries are
+    evicted once there are more than max_entries or they exceed max_bytes.
+    Entries can carry tags (e.g. the strategy id) so every result computed for
+    a strategy is dropped when that strategy changes.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            blob = entry[1]
+        return pickle.loads(blob)
+
+    def set(self, key: str, value, tags=()) -> None:
+        """Store a copy of value; values larger than max_bytes on their own are not cached."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(blob) > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, blob, tuple(tags))
+            self.current_bytes += len(blob)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tag(self, tag) -> int:
+        """Drop every entry stored with this tag and return how many were removed."""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, blob, tags = self._entries.pop(key)
+        self.current_bytes -= len(blob)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+_result_cache = None
+_result_cache_guard = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache sized by settings.RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_MB and RESULT_CACHE_TTL_SECONDS."""
+    global _result_cache
+    with _result_cache_guard:
+        if _result_cache is None:
+            from django.conf import settings
+            _result_cache = ResultCache(
+                int(getattr(settings, 'RESULT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                float(getattr(settings, 'RESULT_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+                int(getattr(settings, 'RESULT_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024,
+            )
+        return _result_cache
+
+
+def strategy_tag(strategy_id) -> str:
+    return f"strategy:{strategy_id}"
+
+
+def cached_run_backtest(data_df: pd.DataFrame, strategy_config: dict, initial_cash: float, leverage: float = 1.0,
+                        engine: str = None, max_points: int = None, downsample: str = 'lttb', columnar: bool = False,
+                        strategy_id=None, timings: StageTimings = None, plan: StrategyPlan = None,
+                        rolling_window: int = None) -> dict:
+    """
+    run_backtest() behind the result cache.
+
+    New bars change the data fingerprint and therefore the key, so stale
+    results are never returned for updated data. Errors are not cached. Every
+    caller gets its own copy of the whole result, so it may modify it freely.
+    A StageTimings records whether the cache was hit, and the pipeline stages on a miss.
+    """
+    cache = get_result_cache()
+    run_params = {
+        'cash': float(initial_cash),
+        'leverage': float(leverage),
+        'engine': engine or DEFAULT_ENGINE,
+        'max_points': max_points,
+        'downsample': downsample,
+        'columnar': columnar,
+        'rolling_window': rolling_window,
+    }
+    key = result_cache_key(strategy_config, data_fingerprint(data_df), run_params)
+
+    results = cache.get(key)
+    if timings is not None:
+        timings.info['result_cache'] = 'miss' if results is None else 'hit'
+    if results is None:
+        results = run_backtest(data_df, strategy_config, initial_cash, leverage, engine, max_points, downsample, columnar,
+                               timings, plan, rolling_window)
+        if 'error' in results:
+            return results
+        tags = [strategy_tag(strategy_id)] if strategy_id is not None else []
+        cache.set(key, results, tags)
+    return results
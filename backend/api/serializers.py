@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Strategy 
+from .models import Strategy, BacktestJob
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,4 +21,16 @@ class StrategySerializer(serializers.ModelSerializer):
     class Meta:
         model = Strategy
         fields = ['id', 'name', 'configuration', 'created_at', 'updated_at']
-        read_only_fields = ['user']
\ No newline at end of file
+        read_only_fields = ['user']
+
+class BacktestJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BacktestJob
+        fields = ['id', 'strategy', 'parameters', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+
+class BacktestJobListSerializer(BacktestJobSerializer):
+    class Meta(BacktestJobSerializer.Meta):
+        fields = ['id', 'strategy', 'parameters', 'status', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,15 @@
+# backend/api/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Strategy
+from .result_cache import get_result_cache, strategy_tag
+from .strategy_plan import invalidate_strategy_plans
+
+
+@receiver(post_save, sender=Strategy)
+@receiver(post_delete, sender=Strategy)
+def invalidate_strategy_results(sender, instance, **kwargs):
+    """Drop cached backtest results and compiled plans for a strategy when it is edited or deleted."""
+    get_result_cache().invalidate_tag(strategy_tag(instance.pk))
+    invalidate_strategy_plans(instance.pk)
@@ -0,0 +1,218 @@
+# backend/api/strategy_plan.py
+import operator
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .indicators import indicator_column, indicator_params, required_indicators
+
+PLAN_CACHE_MAX_ENTRIES = 512
+
+# Signals are int8 codes: one byte per bar, and the simulators compare small ints instead of strings
+SIGNAL_HOLD = 0
+SIGNAL_LONG = 1
+SIGNAL_SHORT = -1
+SIGNAL_CODES = {'LONG': SIGNAL_LONG, 'SHORT': SIGNAL_SHORT}
+SIGNAL_NAMES = {SIGNAL_LONG: 'LONG', SIGNAL_SHORT: 'SHORT'}
+
+COMPARISON_OPERATORS = {
+    'less_than': operator.lt,
+    'greater_than': operator.gt,
+    'equals': operator.eq,
+    'not_equals': operator.ne,
+}
+
+
+# --- Operator kernels: work on NumPy arrays and on plain floats alike; NaN never satisfies a bound ---
+
+def _between(values, low, high):
+    return (values >= low) & (values <= high)
+
+
+def _outside(values, low, high):
+    return (values < low) | (values > high)
+
+
+def _crosses_above(previous, previous_compare, values, compare):
+    return (previous < previous_compare) & (values > compare)
+
+
+def _crosses_below(previous, previous_compare, values, compare):
+    return (previous > previous_compare) & (values < compare)
+
+
+RANGE_OPERATORS = {'between': _between, 'outside': _outside}
+CROSS_OPERATORS = {'crosses_above': _crosses_above, 'crosses_below': _crosses_below}
+
+
+class CompiledCondition(NamedTuple):
+    """
+    One condition with its columns resolved and its value parsed.
+
+    kind is 'compare' (kernel(values, value)), 'range' (kernel(values, low, high)),
+    'cross' (kernel(previous, previous_compare, values, compare)) or 'never' for
+    an operator without a kernel, which is never met.
+    """
+    kind: str
+    kernel: object = None
+    column: str = None
+    compare_column: str = None
+    operands: tuple = ()
+
+    def columns(self) -> tuple:
+        return tuple(column for column in (self.column, self.compare_column) if column is not None)
+
+
+class StrategyPlan(NamedTuple):
+    """
+    Immutable execution plan for a validated strategy configuration.
+
+    Identical conditions are kept once, and each column a cross condition
+    needs from the previous bar is shifted once, however many conditions use it.
+    """
+    action: str
+    logical_operator: str
+    conditions: tuple
+    columns: tuple
+    shifted_columns: tuple
+    indicators: tuple
+
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        """Boolean array of the bars where the combined conditions are met."""
+        available = set(df.columns)
+        values = {column: df[column].to_numpy(dtype='float64') for column in self.columns if column in available}
+        previous = {}
+        for column in self.shifted_columns:
+            if column in values:
+                shifted = np.empty_like(values[column])
+                shifted[:1] = np.nan
+                shifted[1:] = values[column][:-1]
+                previous[column] = shifted
+
+        masks = []
+        for cond in self.conditions:
+            if cond.kind == 'never':
+                masks.append(np.zeros(len(df), dtype=bool))
+                continue
+            # Like the interpreter before it, skip conditions whose columns were not calculated
+            if any(column not in values for column in cond.columns()):
+                continue
+            if cond.kind == 'cross':
+                masks.append(cond.kernel(previous[cond.column], previous[cond.compare_column],
+                                         values[cond.column], values[cond.compare_column]))
+            else:
+                masks.append(cond.kernel(values[cond.column], *cond.operands))
+
+        if not masks:
+            return np.zeros(len(df), dtype=bool)
+        if self.logical_operator == 'AND':
+            return np.logical_and.reduce(masks)
+        return np.logical_or.reduce(masks)
+
+    def generate_signals(self, df: pd.DataFrame) -> pd.Series:
+        """int8 signals: the action's code (SIGNAL_LONG or SIGNAL_SHORT) where the conditions are met, SIGNAL_HOLD elsewhere."""
+        signals = np.zeros(len(df), dtype=np.int8)
+        signals[self.evaluate(df)] = SIGNAL_CODES.get(self.action, SIGNAL_HOLD)
+        return pd.Series(signals, index=df.index, copy=False)
+
+
+def _compile_condition(cond: dict):
+    """Return the CompiledCondition for a condition dict, or None when it can't be evaluated."""
+    name = cond.get('indicator', '').upper()
+    op_str = cond.get('operator')
+    value = cond.get('value', 0)
+    try:
+        if op_str in CROSS_OPERATORS:
+            compare_name = cond.get('compareIndicator', 'Close').upper()
+            return CompiledCondition(
+                'cross', CROSS_OPERATORS[op_str],
+                indicator_column(name, indicator_params(name, cond)),
+                indicator_column(compare_name, indicator_params(compare_name, cond, compare=True)),
+            )
+        if op_str in RANGE_OPERATORS:
+            low = float(value)
+            high = float(cond.get('compareValue', value))
+            return CompiledCondition('range', RANGE_OPERATORS[op_str], indicator_column(name, indicator_params(name, cond)),
+                                     operands=(low, high))
+        if op_str in COMPARISON_OPERATORS:
+            return CompiledCondition('compare', COMPARISON_OPERATORS[op_str], indicator_column(name, indicator_params(name, cond)),
+                                     operands=(float(value),))
+        return CompiledCondition('never')
+    except (ValueError, TypeError):
+        return None
+
+
+def compile_strategy(config: dict) -> StrategyPlan:
+    """
+    Compile a validated strategy configuration into a StrategyPlan.
+
+    Conditions that can't be evaluated (unparseable values or parameters) are
+    dropped, matching how signals were always generated for them.
+    """
+    logical_operator = config.get('logicalOperator', 'AND')
+    if logical_operator not in ('AND', 'OR'):
+        logical_operator = 'AND'
+
+    conditions = []
+    for cond in config.get('conditions', []):
+        compiled = _compile_condition(cond)
+        # AND/OR of a condition with itself changes nothing, so evaluate repeats once
+        if compiled is not None and compiled not in conditions:
+            conditions.append(compiled)
+
+    columns = []
+    shifted_columns = []
+    for cond in conditions:
+        for column in cond.columns():
+            if column not in columns:
+                columns.append(column)
+            if cond.kind == 'cross' and column not in shifted_columns:
+                shifted_columns.append(column)
+
+    return StrategyPlan(
+        action=config.get('action', 'LONG'),
+        logical_operator=logical_operator,
+        conditions=tuple(conditions),
+        columns=tuple(columns),
+        shifted_columns=tuple(shifted_columns),
+        indicators=tuple(sorted(required_indicators(config))),
+    )
+
+
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def get_strategy_plan(strategy) -> StrategyPlan:
+    """
+    Validated, compiled plan for a saved Strategy.
+
+    Plans are cached by (id, updated_at), so saving the strategy compiles a new
+    one and repeat runs skip validation and parsing.
+    """
+    key = (strategy.pk, strategy.updated_at)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    from .backtester import validate_strategy_config
+    validate_strategy_config(strategy.configuration)
+    plan = compile_strategy(strategy.configuration)
+
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > PLAN_CACHE_MAX_ENTRIES:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def invalidate_strategy_plans(strategy_id) -> None:
+    """Drop every cached plan of a strategy, e.g. when it is deleted."""
+    with _plan_cache_lock:
+        for key in [key for key in _plan_cache if key[0] == strategy_id]:
+            del _plan_cache[key]
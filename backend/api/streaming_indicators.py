@@ -0,0 +1,430 @@
+# backend/api/streaming_indicators.py
+
+# Incremental versions of the indicators in indicators.py. Each object keeps its
+# running state and takes one bar per update() call in O(1) (amortized for the
+# rolling min/max deques). The value returned by update() equals the last value
+# of the batch function run over every bar seen so far: the recurrences follow
+# the ones pandas uses for ewm(), rolling().mean(), .std(), .min() and .max(),
+# including their compensation terms.
+import math
+from collections import deque
+
+from .indicators import HIGH_LOW_INDICATORS, INDICATOR_PARAMS, PRIMARY_COLUMNS, _column_name, required_indicators
+
+NAN = float('nan')
+
+
+def _divide(a: float, b: float) -> float:
+    """a / b with NumPy semantics: division by zero gives inf or NaN instead of raising."""
+    if b != 0:
+        return a / b
+    if a == 0 or a != a:
+        return NAN
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+# --- Building blocks ---
+
+class ExponentialMean:
+    """Series.ewm(adjust=False).mean(), one value at a time."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.weighted = NAN
+        self._old_wt = 1.0
+
+    @classmethod
+    def from_span(cls, span: float) -> 'ExponentialMean':
+        return cls(1.0 / (1.0 + (span - 1) / 2.0))
+
+    @classmethod
+    def from_alpha(cls, alpha: float) -> 'ExponentialMean':
+        # pandas converts alpha to a centre of mass and back
+        return cls(1.0 / (1.0 + (1.0 - alpha) / alpha))
+
+    def update(self, value: float) -> float:
+        is_observation = value == value
+        if self.weighted == self.weighted:
+            # Missing values still decay the weight of the running mean
+            self._old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = (self._old_wt * self.weighted + self.alpha * value) / (self._old_wt + self.alpha)
+                self._old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted
+
+
+class RollingMean:
+    """Series.rolling(window).mean() over a ring buffer with compensated running sums."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._started = False
+        self._nobs = 0
+        self._neg_ct = 0
+        self._sum = 0.0
+        self._compensation_add = 0.0
+        self._compensation_remove = 0.0
+        self._same_count = 0
+        self._prev_value = NAN
+
+    def _add(self, value: float) -> None:
+        if value != value:
+            return
+        self._nobs += 1
+        y = value - self._compensation_add
+        t = self._sum + y
+        self._compensation_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, value) < 0:
+            self._neg_ct += 1
+        # Runs of identical values return the value itself, avoiding floating point drift
+        if value == self._prev_value:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev_value = value
+
+    def _remove(self, value: float) -> None:
+        if value != value:
+            return
+        self._nobs -= 1
+        y = -value - self._compensation_remove
+        t = self._sum + y
+        self._compensation_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, value) < 0:
+            self._neg_ct -= 1
+
+    def update(self, value: float) -> float:
+        if not self._started:
+            self._started = True
+            self._prev_value = value
+        elif len(self._values) == self.window:
+            self._remove(self._values[0])
+        self._values.append(value)
+        self._add(value)
+
+        if self._nobs < self.window or self._nobs == 0:
+            return NAN
+        result = self._sum / self._nobs
+        if self._same_count >= self._nobs:
+            return self._prev_value
+        if self._neg_ct == 0 and result < 0:
+            return 0.0
+        if self._neg_ct == self._nobs and result > 0:
+            return 0.0
+        return result
+
+
+class RollingStd:
+    """Series.rolling(window).std() (ddof=1) using Welford's method over a ring buffer."""
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self._values = deque(maxlen=window)
+        self._started = False
+        self._nobs = 0.0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._compensation_add = 0.0
+        self._compensation_remove = 0.0
+        self._same_count = 0
+        self._prev_value = NAN
+
+    def _add(self, value: float) -> None:
+        if value != value:
+            return
+        self._nobs += 1
+        if value == self._prev_value:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev_value = value
+        prev_mean = self._mean - self._compensation_add
+        y = value - self._compensation_add
+        t = y - self._mean
+        self._compensation_add = t + self._mean - y
+        self._mean = self._mean + t / self._nobs if self._nobs else 0.0
+        self._ssqdm = self._ssqdm + (value - prev_mean) * (value - self._mean)
+
+    def _remove(self, value: float) -> None:
+        if value != value:
+            return
+        self._nobs -= 1
+        if self._nobs:
+            prev_mean = self._mean - self._compensation_remove
+            y = value - self._compensation_remove
+            t = y - self._mean
+            self._compensation_remove = t + self._mean - y
+            self._mean = self._mean - t / self._nobs
+            self._ssqdm = self._ssqdm - (value - prev_mean) * (value - self._mean)
+        else:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+
+    def update(self, value: float) -> float:
+        if not self._started:
+            self._started = True
+            self._prev_value = value
+        elif len(self._values) == self.window:
+            self._remove(self._values[0])
+        self._values.append(value)
+        self._add(value)
+
+        if self._nobs < self.window or self._nobs <= self.ddof:
+            return NAN
+        if self._nobs == 1 or self._same_count >= self._nobs:
+            return 0.0
+        variance = self._ssqdm / (self._nobs - self.ddof)
+        return 0.0 if variance < 0 else math.sqrt(variance)
+
+
+class RollingExtreme:
+    """Series.rolling(window).max() (or .min()) with a monotonic deque."""
+
+    def __init__(self, window: int, maximum: bool = True):
+        self.window = window
+        self.maximum = maximum
+        self._count = 0
+        self._valid = deque(maxlen=window)  # 1 for each non-NaN value in the window
+        self._nobs = 0
+        self._candidates = deque()  # (position, value), values monotonic from the front
+
+    def update(self, value: float) -> float:
+        position = self._count
+        self._count += 1
+        if len(self._valid) == self.window:
+            self._nobs -= self._valid[0]
+        is_observation = value == value
+        self._valid.append(1 if is_observation else 0)
+        self._nobs += self._valid[-1]
+
+        candidates = self._candidates
+        while candidates and candidates[0][0] <= position - self.window:
+            candidates.popleft()
+        if is_observation:
+            if self.maximum:
+                while candidates and candidates[-1][1] <= value:
+                    candidates.pop()
+            else:
+                while candidates and candidates[-1][1] >= value:
+                    candidates.pop()
+            candidates.append((position, value))
+
+        if self._nobs < self.window:
+            return NAN
+        return candidates[0][1]
+
+
+# --- Indicators ---
+
+class StreamingRSI:
+    """Incremental calculate_rsi: Wilder smoothing of gains and losses."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._gain = ExponentialMean.from_alpha(1 / period)
+        self._loss = ExponentialMean.from_alpha(1 / period)
+        self._prev_close = NAN
+
+    def update(self, close: float) -> float:
+        delta = close - self._prev_close
+        self._prev_close = close
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-(delta if delta < 0 else 0.0))
+        rs = gain / loss if loss != 0 else 0.0
+        rsi = 100 - (100 / (1 + rs))
+        return 50.0 if rsi != rsi else rsi
+
+
+class StreamingMACD:
+    """Incremental calculate_macd, returning {'macd_line', 'signal_line'}."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.slow = slow
+        self._fast = ExponentialMean.from_span(fast)
+        self._slow = ExponentialMean.from_span(slow)
+        self._signal = ExponentialMean.from_span(signal)
+        self._count = 0
+
+    def update(self, close: float) -> dict:
+        self._count += 1
+        macd_line = self._fast.update(close) - self._slow.update(close)
+        signal_line = self._signal.update(macd_line)
+        if self._count < self.slow:
+            # The batch version returns no MACD until it has `slow` bars
+            return {'macd_line': NAN, 'signal_line': NAN}
+        return {'macd_line': macd_line, 'signal_line': signal_line}
+
+
+class StreamingSMA:
+    """Incremental calculate_sma."""
+
+    def __init__(self, period: int = 20):
+        self._mean = RollingMean(period)
+
+    def update(self, close: float) -> float:
+        return self._mean.update(close)
+
+
+class StreamingEMA:
+    """Incremental calculate_ema."""
+
+    def __init__(self, period: int = 20):
+        self._ema = ExponentialMean.from_span(period)
+
+    def update(self, close: float) -> float:
+        return self._ema.update(close)
+
+
+class StreamingBollingerBands:
+    """Incremental calculate_bollinger_bands, returning {'upper', 'middle', 'lower'}."""
+
+    def __init__(self, period: int = 20, upper_band: float = 2, lower_band: float = 2):
+        self.upper_band = upper_band
+        self.lower_band = lower_band
+        self._mean = RollingMean(period)
+        self._std = RollingStd(period)
+
+    def update(self, close: float) -> dict:
+        sma = self._mean.update(close)
+        std = self._std.update(close)
+        return {'upper': sma + (std * self.upper_band), 'middle': sma, 'lower': sma - (std * self.lower_band)}
+
+
+class StreamingStochastic:
+    """Incremental calculate_stochastic, returning {'k_percent', 'd_percent'}."""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self._lowest = RollingExtreme(k_period, maximum=False)
+        self._highest = RollingExtreme(k_period, maximum=True)
+        self._d = RollingMean(d_period)
+
+    def update(self, high: float, low: float, close: float) -> dict:
+        lowest_low = self._lowest.update(low)
+        highest_high = self._highest.update(high)
+        k_percent = 100 * _divide(close - lowest_low, highest_high - lowest_low)
+        return {'k_percent': k_percent, 'd_percent': self._d.update(k_percent)}
+
+
+class StreamingWilliamsR:
+    """Incremental calculate_williams_r."""
+
+    def __init__(self, period: int = 14):
+        self._highest = RollingExtreme(period, maximum=True)
+        self._lowest = RollingExtreme(period, maximum=False)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        highest_high = self._highest.update(high)
+        lowest_low = self._lowest.update(low)
+        return -100 * _divide(highest_high - close, highest_high - lowest_low)
+
+
+class StreamingATR:
+    """Incremental calculate_atr."""
+
+    def __init__(self, period: int = 14):
+        self._mean = RollingMean(period)
+        self._prev_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        ranges = [
+            value for value in (high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+            if value == value
+        ]
+        self._prev_close = close
+        return self._mean.update(max(ranges) if ranges else NAN)
+
+
+class IndicatorStream:
+    """
+    Streaming counterpart of add_indicators_to_data.
+
+    Tracks a set of (indicator, params) specs and returns each bar's values
+    under the same column names. Unlike the batch function nothing is
+    back-filled: values are NaN until an indicator has enough history.
+    """
+
+    def __init__(self, specs, has_high_low: bool = True):
+        self._indicators = []
+        order = list(INDICATOR_PARAMS)
+        for name, params in sorted(specs, key=lambda spec: (order.index(spec[0]), spec[1])):
+            if not params or (name in HIGH_LOW_INDICATORS and not has_high_low):
+                continue
+            self._indicators.append((name, params, _create_streaming_indicator(name, dict(params))))
+
+    @classmethod
+    def for_config(cls, config: dict = None, has_high_low: bool = True) -> 'IndicatorStream':
+        """Track the indicators a strategy config references, or every indicator with default parameters."""
+        if config is None:
+            specs = [(name, tuple(params.items())) for name, params in INDICATOR_PARAMS.items()]
+        else:
+            specs = required_indicators(config)
+        return cls(specs, has_high_low)
+
+    @property
+    def columns(self) -> list:
+        return [column for name, params, _ in self._indicators for column in _output_columns(name, params)]
+
+    def update(self, close: float, high: float = NAN, low: float = NAN) -> dict:
+        """Add one bar and return {column: value} for every tracked indicator."""
+        row = {}
+        for name, params, indicator in self._indicators:
+            if name == "RSI":
+                row[_column_name("rsi", name, params)] = indicator.update(close)
+            elif name == "MACD":
+                values = indicator.update(close)
+                row[_column_name("macd_line", name, params)] = values['macd_line']
+                row[_column_name("macd_signal", name, params)] = values['signal_line']
+            elif name == "SMA":
+                row[_column_name("sma", name, params)] = indicator.update(close)
+            elif name == "EMA":
+                row[_column_name("ema", name, params)] = indicator.update(close)
+            elif name == "BOLLINGER_BANDS":
+                values = indicator.update(close)
+                row[_column_name("bb_upper", name, params)] = values['upper']
+                row[_column_name("bb_middle", name, params)] = values['middle']
+                row[_column_name("bb_lower", name, params)] = values['lower']
+            elif name == "STOCHASTIC":
+                values = indicator.update(high, low, close)
+                row[_column_name("stoch_k", name, params)] = values['k_percent']
+                row[_column_name("stoch_d", name, params)] = values['d_percent']
+            elif name == "WILLIAMS_R":
+                row[_column_name("williams_r", name, params)] = indicator.update(high, low, close)
+            elif name == "ATR":
+                row[_column_name("atr", name, params)] = indicator.update(high, low, close)
+        return row
+
+
+def _output_columns(name: str, params: tuple) -> list:
+    bases = {
+        "MACD": ["macd_line", "macd_signal"],
+        "BOLLINGER_BANDS": ["bb_upper", "bb_middle", "bb_lower"],
+        "STOCHASTIC": ["stoch_k", "stoch_d"],
+    }.get(name, [PRIMARY_COLUMNS[name]])
+    return [_column_name(base, name, params) for base in bases]
+
+
+def _create_streaming_indicator(name: str, p: dict):
+    if name == "RSI":
+        return StreamingRSI(p["period"])
+    if name == "MACD":
+        return StreamingMACD(p["fast_period"], p["slow_period"], p["signal_period"])
+    if name == "SMA":
+        return StreamingSMA(p["period"])
+    if name == "EMA":
+        return StreamingEMA(p["period"])
+    if name == "BOLLINGER_BANDS":
+        return StreamingBollingerBands(p["period"], p["upper_band"], p["lower_band"])
+    if name == "STOCHASTIC":
+        return StreamingStochastic(p["k_period"], p["d_period"])
+    if name == "WILLIAMS_R":
+        return StreamingWilliamsR(p["period"])
+    if name == "ATR":
+        return StreamingATR(p["period"])
+    raise ValueError(f"Unsupported indicator: {name}")
@@ -0,0 +1,186 @@
+# backend/api/sweep.py
+import copy
+import itertools
+import math
+import re
+import time
+
+import pandas as pd
+
+from .backtester import SIMULATION_ENGINES, DEFAULT_ENGINE, generate_signals, validate_strategy_config
+from .indicators import add_indicators_to_data
+from .process_pool import get_process_pool, load_shared_frame, pool_workers, shared_frame
+
+# Fields a sweep may vary. None of them change which indicator columns are needed,
+# so indicators are calculated once for the whole sweep.
+SWEEPABLE_PATHS = [
+    re.compile(r'^conditions\.(\d+)\.(value|compareValue)$'),
+    re.compile(r'^exitCondition\.(value|timePeriod)$'),
+    re.compile(r'^leverage$'),
+]
+
+RANK_KEYS = {
+    'return': 'Return [%]',
+    'final_equity': 'Equity Final [$]',
+    'trades': '# Trades',
+}
+
+
+def expand_range(path: str, spec) -> list:
+    """Expand a list of values or a {start, stop, step} dict (stop inclusive) into values."""
+    if isinstance(spec, list):
+        values = spec
+    elif isinstance(spec, dict) and 'start' in spec and 'stop' in spec:
+        start = float(spec['start'])
+        stop = float(spec['stop'])
+        step = float(spec.get('step', 1))
+        if step <= 0:
+            raise ValueError(f"Range for '{path}' must have a positive step")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [round(start + i * step, 10) for i in range(max(count, 0))]
+    else:
+        raise ValueError(f"Range for '{path}' must be a list of values or a {{start, stop, step}} object")
+
+    if not values:
+        raise ValueError(f"Range for '{path}' is empty")
+    return values
+
+
+def build_grid(config: dict, ranges: dict, max_combinations: int) -> list:
+    """Return every combination of the requested ranges as a list of {path: value} dicts."""
+    if not isinstance(ranges, dict) or not ranges:
+        raise ValueError("At least one parameter range is required")
+
+    paths = sorted(ranges)
+    for path in paths:
+        match = next((pattern.match(path) for pattern in SWEEPABLE_PATHS if pattern.match(path)), None)
+        if match is None:
+            raise ValueError(f"Parameter '{path}' cannot be swept")
+        if path.startswith('conditions.') and int(match.group(1)) >= len(config.get('conditions', [])):
+            raise ValueError(f"Parameter '{path}' refers to a condition that does not exist")
+
+    value_lists = [expand_range(path, ranges[path]) for path in paths]
+    total = math.prod(len(values) for values in value_lists)
+    if total > max_combinations:
+        raise ValueError(f"Sweep has {total} combinations; the maximum is {max_combinations}")
+
+    return [dict(zip(paths, combo)) for combo in itertools.product(*value_lists)]
+
+
+def apply_params(config: dict, leverage: float, params: dict) -> tuple:
+    """Return (config, leverage) with the swept values substituted."""
+    config = copy.deepcopy(config)
+    for path, value in params.items():
+        parts = path.split('.')
+        if parts[0] == 'leverage':
+            leverage = float(value)
+        elif parts[0] == 'conditions':
+            config['conditions'][int(parts[1])][parts[2]] = value
+        elif parts[1] == 'timePeriod':
+            config['exitCondition']['timePeriod'] = int(value)
+        else:
+            config['exitCondition'][parts[1]] = float(value)
+    return config, leverage
+
+
+def evaluate_params(df_with_indicators: pd.DataFrame, config: dict, cash: float, leverage: float, engine: str) -> dict:
+    """Run one strategy variant on precomputed indicators and return its numeric summary."""
+    try:
+        validate_strategy_config(config)
+        if leverage < 1.0 or leverage > 10.0:
+            raise ValueError("Leverage must be between 1x and 10x")
+
+        signals = generate_signals(df_with_indicators, config)
+        simulator = SIMULATION_ENGINES[engine](df_with_indicators, signals, cash, leverage, config['exitCondition'])
+        results = simulator.run_simulation(format_results=False)
+        if 'error' in results:
+            return {'error': results['error']}
+        if not simulator.equity_curve:
+            return {'error': 'Backtest generated no data.'}
+
+        final_equity = float(simulator.equity_curve[-1])
+        return {
+            'Equity Final [$]': round(final_equity, 2),
+            'Return [%]': round((final_equity - cash) / cash * 100, 4),
+            '# Trades': len(simulator.trades),
+        }
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _run_chunk(tasks: list, frame_path: str, cash: float, engine: str) -> list:
+    df_with_indicators = load_shared_frame(frame_path)
+    return [
+        (index, evaluate_params(df_with_indicators, config, cash, leverage, engine))
+        for index, config, leverage in tasks
+    ]
+
+
+def sweep_workers() -> int:
+    """Number of shared pool processes one sweep spreads its work over."""
+    from django.conf import settings
+    configured = getattr(settings, 'SWEEP_MAX_WORKERS', None)
+    return max(1, min(int(configured or pool_workers()), pool_workers()))
+
+
+def run_parameter_sweep(data_df: pd.DataFrame, strategy_config: dict, ranges: dict, initial_cash: float,
+                        leverage: float = 1.0, engine: str = None, rank_by: str = 'return',
+                        max_workers: int = None, max_combinations: int = 5000) -> dict:
+    """
+    Backtest every combination of the given parameter ranges over one dataset.
+
+    Indicators are calculated once, then the combinations are split into
+    chunks and simulated on the shared process pool. Returns the ranked
+    results table.
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine not in SIMULATION_ENGINES:
+        raise ValueError(f"Invalid engine: {engine}. Must be one of {list(SIMULATION_ENGINES)}")
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"Invalid rank_by: {rank_by}. Must be one of {list(RANK_KEYS)}")
+
+    validate_strategy_config(strategy_config)
+    grid = build_grid(strategy_config, ranges, max_combinations)
+
+    started = time.perf_counter()
+    df_with_indicators = add_indicators_to_data(data_df, strategy_config)
+
+    tasks = []
+    for index, params in enumerate(grid):
+        config, task_leverage = apply_params(strategy_config, leverage, params)
+        tasks.append((index, config, task_leverage))
+
+    workers = min(max_workers or sweep_workers(), len(tasks))
+    if workers <= 1:
+        outcomes = [(index, evaluate_params(df_with_indicators, config, initial_cash, task_leverage, engine))
+                    for index, config, task_leverage in tasks]
+    else:
+        # A few chunks per worker keeps them busy without paying IPC per combination
+        chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+        outcomes = []
+        with shared_frame(df_with_indicators) as frame_path:
+            for chunk_outcomes in get_process_pool().map(_run_chunk, chunks, [frame_path] * len(chunks),
+                                                         [initial_cash] * len(chunks), [engine] * len(chunks)):
+                outcomes.extend(chunk_outcomes)
+
+    results = []
+    errors = []
+    for index, outcome in outcomes:
+        if 'error' in outcome:
+            errors.append({'params': grid[index], 'error': outcome['error']})
+        else:
+            results.append({'params': grid[index], **outcome})
+
+    results.sort(key=lambda row: row[RANK_KEYS[rank_by]], reverse=True)
+    for rank, row in enumerate(results, start=1):
+        row['rank'] = rank
+
+    return {
+        'combinations': len(grid),
+        'workers': workers,
+        'rank_by': rank_by,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'results': results,
+        'errors': errors,
+    }
@@ -0,0 +1,67 @@
+# backend/api/synthetic.py
+import numpy as np
+import pandas as pd
+
+# Annualized (drift, volatility) of each market regime
+REGIMES = {
+    'bull': (0.25, 0.15),
+    'bear': (-0.30, 0.30),
+    'sideways': (0.0, 0.10),
+    'volatile': (0.05, 0.60),
+}
+
+# Bars per year for the frequencies the generator is usually asked for
+BARS_PER_YEAR = {
+    '1min': 252 * 390,
+    '5min': 252 * 78,
+    '15min': 252 * 26,
+    '1h': 252 * 7,
+    '1D': 252,
+}
+
+
+def regime_path(bars: int, rng: np.random.Generator, mean_regime_bars: int = 2000) -> np.ndarray:
+    """Regime index for each bar; regimes last a geometrically distributed number of bars."""
+    lengths = rng.geometric(1 / mean_regime_bars, size=bars // mean_regime_bars * 2 + 2)
+    while lengths.sum() < bars:
+        lengths = np.concatenate([lengths, rng.geometric(1 / mean_regime_bars, size=len(lengths))])
+    labels = rng.integers(0, len(REGIMES), size=len(lengths))
+    return np.repeat(labels, lengths)[:bars]
+
+
+def synthetic_ohlcv(bars: int, freq: str = '1min', start: str = '2000-01-03', seed: int = 0,
+                    start_price: float = 100.0, mean_regime_bars: int = 2000) -> pd.DataFrame:
+    """
+    Deterministic OHLCV bars from geometric Brownian motion with switching regimes.
+
+    The same (bars, freq, seed) always gives the same frame. Regimes from
+    REGIMES change drift and volatility so strategies see trends, ranges and
+    volatility spikes. High and Low bracket Open and Close, and Volume rises
+    with the size of the move.
+    """
+    if bars < 2:
+        raise ValueError("At least 2 bars are required")
+    if freq not in BARS_PER_YEAR:
+        raise ValueError(f"Invalid freq: {freq}. Must be one of {list(BARS_PER_YEAR)}")
+
+    rng = np.random.default_rng(seed)
+    dt = 1 / BARS_PER_YEAR[freq]
+    params = np.array(list(REGIMES.values()))
+    regimes = regime_path(bars, rng, mean_regime_bars)
+    drift, vol = params[regimes, 0], params[regimes, 1]
+
+    shocks = rng.standard_normal(bars)
+    log_returns = (drift - 0.5 * vol ** 2) * dt + vol * np.sqrt(dt) * shocks
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    # Open near the previous close, with a small gap
+    open_ = np.empty(bars)
+    open_[0] = start_price
+    open_[1:] = close[:-1] * np.exp(vol[1:] * np.sqrt(dt) * 0.1 * rng.standard_normal(bars - 1))
+    wick = vol * np.sqrt(dt) * np.abs(rng.standard_normal((2, bars)))
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    volume = np.round(rng.lognormal(10, 0.5, bars) * (1 + np.abs(shocks)))
+
+    index = pd.date_range(start, periods=bars, freq=freq, name='Date')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
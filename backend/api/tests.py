@@ -1,3 +1,321 @@
-from django.test import TestCase
+import contextlib
+import io
+import json
+import operator
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from alpha_vantage.alphavantage import AlphaVantage
+from django.test import SimpleTestCase
+
+from .backtester import SIMULATION_ENGINES, generate_signals, run_backtest
+from .indicators import INDICATOR_PARAMS, _calculate_indicator, add_indicators_to_data, indicator_column, indicator_params
+from .provider_clients import ProviderClients
+from .strategy_plan import SIGNAL_HOLD, SIGNAL_NAMES, compile_strategy
+from .streaming_indicators import IndicatorStream
+from .synthetic import synthetic_ohlcv
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Keep-alive JSON server standing in for a provider API: GET /<name> answers RESPONSES[name]."""
+    protocol_version = 'HTTP/1.1'
+    RESPONSES = {
+        'ok': {'status': 'ok'},
+        'error': {'Error Message': 'Invalid API call.'},
+        'note': {'Note': 'API call frequency is 5 calls per minute.'},
+        'daily': {
+            'Meta Data': {'1. Information': 'Daily Prices', '2. Symbol': 'TEST'},
+            'Time Series (Daily)': {
+                '2024-01-03': {'1. open': '2.0', '2. high': '2.5', '3. low': '1.5', '4. close': '2.2', '5. volume': '200'},
+                '2024-01-02': {'1. open': '1.0', '2. high': '1.5', '3. low': '0.5', '4. close': '1.2', '5. volume': '100'},
+            },
+        },
+    }
+
+    def do_GET(self):
+        name = self.path.lstrip('/').split('?')[0]
+        if name == 'query':  # alpha_vantage's own URL layout
+            name = 'daily'
+        body = json.dumps(self.RESPONSES.get(name, {})).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProviderClientsTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_session_reuses_connections(self):
+        clients = ProviderClients(pool_size=4)
+        session = clients.session('stand_in')
+        for _ in range(20):
+            self.assertEqual(session.get(f"{self.base_url}/ok").json(), {'status': 'ok'})
+
+        stats = clients.stats()['stand_in']
+        self.assertEqual(stats['requests'], 20)
+        self.assertLess(stats['connections'], stats['requests'])
+        self.assertEqual(stats['reused'], stats['requests'] - stats['connections'])
+        self.assertGreater(stats['reuse_rate'], 0.9)
+        self.assertIn('fluxtrader_provider_http_connections_total{provider="stand_in"}', clients.render())
+
+    def test_one_client_is_shared_across_threads(self):
+        clients = ProviderClients(pool_size=4)
+        sessions, time_series, errors = [], [], []
+
+        def fetch():
+            try:
+                session = clients.session('stand_in')
+                sessions.append(session)
+                time_series.append(clients.alpha_vantage('test-key'))
+                for _ in range(5):
+                    session.get(f"{self.base_url}/ok").raise_for_status()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len({id(session) for session in sessions}), 1)
+        self.assertEqual(len({id(ts) for ts in time_series}), 1)
+        stats = clients.stats()['stand_in']
+        self.assertEqual(stats['requests'], 40)
+        # Eight threads share one pool; it never holds more than pool_size idle connections per host
+        self.assertLess(stats['connections'], stats['requests'])
+
+    def test_alpha_vantage_calls_go_through_the_pooled_session(self):
+        clients = ProviderClients(pool_size=2)
+        ts = clients.alpha_vantage('test-key')
+        with mock.patch.object(AlphaVantage, '_ALPHA_VANTAGE_API_URL', f"{self.base_url}/query?"):
+            data, _ = ts.get_daily(symbol='TEST')
+            ts.get_daily(symbol='TEST')
+
+        self.assertEqual(list(data['4. close']), [2.2, 1.2])
+        stats = clients.stats()['alpha_vantage']
+        self.assertEqual((stats['requests'], stats['connections']), (2, 1))
+
+    def test_alpha_vantage_error_payloads_raise(self):
+        ts = ProviderClients(pool_size=2).alpha_vantage('test-key')
+        with self.assertRaisesMessage(ValueError, 'Invalid API call.'):
+            ts._handle_api_call(f"{self.base_url}/error")
+        with self.assertRaisesMessage(ValueError, 'API call frequency'):
+            ts._handle_api_call(f"{self.base_url}/note")
+        with self.assertRaisesMessage(ValueError, 'no return was given'):
+            ts._handle_api_call(f"{self.base_url}/missing")
+        self.assertEqual(ts._handle_api_call(f"{self.base_url}/ok"), {'status': 'ok'})
+
+
+class SimulationEngineParityTests(SimpleTestCase):
+    EXIT_CONDITIONS = [
+        {'type': 'manual'},
+        {'type': 'profit_target', 'value': 1},
+        {'type': 'stop_loss', 'value': 1},
+        {'type': 'trailing_stop', 'value': 1},
+        {'type': 'time_based', 'timePeriod': 2, 'timeUnit': 'hours'},
+        {'type': 'indicator_based', 'indicator': 'RSI', 'operator': 'greater_than', 'indicatorValue': '55'},
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.data = synthetic_ohlcv(1500, freq='15min', seed=2, mean_regime_bars=200)
+
+    def run_engine(self, config, engine, leverage):
+        # The simulators print every trade
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_backtest(self.data, config, 10000, leverage=leverage, engine=engine, columnar=True)
+
+    def test_engines_agree_on_trades_and_final_portfolio(self):
+        self.assertEqual(set(SIMULATION_ENGINES), {'array', 'pandas'})
+        for exit_condition in self.EXIT_CONDITIONS:
+            for action in ('LONG', 'SHORT'):
+                for leverage in (1.0, 2.0):
+                    config = {
+                        'conditions': [{'indicator': 'RSI', 'operator': 'less_than', 'value': '45'}],
+                        'action': action,
+                        'exitCondition': exit_condition,
+                    }
+                    with self.subTest(exit=exit_condition['type'], action=action, leverage=leverage):
+                        array = self.run_engine(config, 'array', leverage)
+                        pandas = self.run_engine(config, 'pandas', leverage)
+                        self.assertNotIn('error', array)
+                        self.assertNotIn('error', pandas)
+
+                        trades, expected = array['trades'], pandas['trades']
+                        self.assertGreater(len(expected['timestamp']), 1)
+                        np.testing.assert_array_equal(trades['timestamp'], expected['timestamp'])
+                        self.assertEqual(trades['type'], expected['type'])
+                        for column in ('price', 'portfolio', 'pnl', 'pnl_pct'):
+                            np.testing.assert_allclose(trades[column], expected[column], rtol=1e-9, equal_nan=True)
+
+                        np.testing.assert_allclose(array['plot_data']['equity_curve'], pandas['plot_data']['equity_curve'],
+                                                   rtol=1e-9)
+                        self.assertAlmostEqual(array['stats']['Equity Final [$]'], pandas['stats']['Equity Final [$]'],
+                                               places=6)
+                        self.assertEqual(array['stats']['# Trades'], pandas['stats']['# Trades'])
+
+
+class StreamingIndicatorParityTests(SimpleTestCase):
+    SPECS = [(name, tuple(params.items())) for name, params in INDICATOR_PARAMS.items()] + [
+        ('SMA', (('period', 5),)),
+        ('BOLLINGER_BANDS', (('period', 10), ('upper_band', 1.5), ('lower_band', 2.5))),
+    ]
+
+    def test_each_update_matches_the_batch_indicator_over_the_bars_so_far(self):
+        data = synthetic_ohlcv(120, freq='5min', seed=3)
+        # A missing close must not throw the running state off either
+        data.iloc[60, data.columns.get_loc('Close')] = np.nan
+        stream = IndicatorStream(self.SPECS)
+
+        rows = []
+        for i, (close, high, low) in enumerate(zip(data['Close'], data['High'], data['Low'])):
+            row = stream.update(close, high, low)
+            rows.append(row)
+            for name, params in self.SPECS:
+                for column, values in _calculate_indicator(name, params, data.iloc[:i + 1]).items():
+                    np.testing.assert_allclose(row[column], values.iloc[-1], rtol=1e-9, atol=1e-9, equal_nan=True,
+                                               err_msg=f"{column} at bar {i}")
+
+        self.assertEqual(sorted(rows[0]), sorted(stream.columns))
+        # Warm-up bars are NaN, as in the batch functions, until each indicator has enough history
+        for column, warm_up in (('sma_5', 4), ('sma_20', 19), ('bb_middle_10_1.5_2.5', 9), ('stoch_k', 13),
+                                ('stoch_d', 15), ('macd_line', 25), ('atr', 13)):
+            values = np.array([row[column] for row in rows])
+            self.assertTrue(np.isnan(values[:warm_up]).all(), column)
+            self.assertFalse(np.isnan(values[warm_up]), column)
+
+
+def _baseline_signals(df, config):
+    """The condition interpreter generate_signals ran before strategies were compiled: a 'LONG'/'SHORT'/'HOLD' Series."""
+    comparisons = {'less_than': operator.lt, 'greater_than': operator.gt, 'equals': operator.eq, 'not_equals': operator.ne}
+    logical_op = config.get('logicalOperator', 'AND')
+    if logical_op not in ['AND', 'OR']:
+        logical_op = 'AND'
+
+    condition_signals = []
+    for cond in config.get('conditions', []):
+        name = cond.get('indicator', '').upper()
+        op_str = cond.get('operator')
+        value = cond.get('value', 0)
+        condition_met = pd.Series(False, index=df.index)
+        try:
+            if op_str in ['crosses_above', 'crosses_below']:
+                compare_name = cond.get('compareIndicator', 'Close').upper()
+                main_col = indicator_column(name, indicator_params(name, cond))
+                compare_col = indicator_column(compare_name, indicator_params(compare_name, cond, compare=True))
+                if main_col not in df.columns or compare_col not in df.columns:
+                    continue
+                main_line, compare_line = df[main_col], df[compare_col]
+                valid_mask = ~(main_line.isna() | compare_line.isna())
+                if op_str == 'crosses_above':
+                    condition_met = (main_line.shift(1) < compare_line.shift(1)) & (main_line > compare_line) & valid_mask
+                else:
+                    condition_met = (main_line.shift(1) > compare_line.shift(1)) & (main_line < compare_line) & valid_mask
+            elif op_str in ['between', 'outside']:
+                column = indicator_column(name, indicator_params(name, cond))
+                if column not in df.columns:
+                    continue
+                try:
+                    low, high = float(value), float(cond.get('compareValue', value))
+                except (ValueError, TypeError):
+                    continue
+                if op_str == 'between':
+                    condition_met = (df[column] >= low) & (df[column] <= high)
+                else:
+                    condition_met = (df[column] < low) | (df[column] > high)
+            elif op_str in comparisons:
+                column = indicator_column(name, indicator_params(name, cond))
+                if column not in df.columns:
+                    continue
+                try:
+                    condition_met = comparisons[op_str](df[column], float(value))
+                except (ValueError, TypeError):
+                    continue
+            condition_signals.append(condition_met.fillna(False))
+        except Exception:
+            continue
+
+    final_signal = pd.Series('HOLD', index=df.index)
+    if not condition_signals:
+        return final_signal
+    if logical_op == 'AND':
+        triggered = pd.concat(condition_signals, axis=1).all(axis=1)
+    else:
+        triggered = pd.concat(condition_signals, axis=1).any(axis=1)
+    final_signal[triggered] = config.get('action', 'LONG')
+    return final_signal
+
+
+class StrategyPlanParityTests(SimpleTestCase):
+    CONDITION_SETS = [
+        [{'indicator': 'RSI', 'operator': 'less_than', 'value': '45'}],
+        [{'indicator': 'RSI', 'operator': 'greater_than', 'value': 55},
+         {'indicator': 'Williams_R', 'operator': 'not_equals', 'value': '-50'}],
+        [{'indicator': 'RSI', 'operator': 'between', 'value': '35', 'compareValue': '60'},
+         {'indicator': 'Stochastic', 'operator': 'outside', 'value': '20', 'compareValue': '80'}],
+        [{'indicator': 'Close', 'operator': 'crosses_above', 'compareIndicator': 'SMA', 'comparePeriod': 10},
+         {'indicator': 'MACD', 'operator': 'crosses_below', 'compareIndicator': 'EMA'}],
+        # Repeated conditions, an unparseable value and a comparison that is never exactly met
+        [{'indicator': 'RSI', 'operator': 'less_than', 'value': '50'},
+         {'indicator': 'RSI', 'operator': 'less_than', 'value': '50'},
+         {'indicator': 'SMA', 'operator': 'greater_than', 'value': 'not a number'},
+         {'indicator': 'Close', 'operator': 'equals', 'value': '100'}],
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.data = synthetic_ohlcv(800, freq='15min', seed=5, mean_regime_bars=200)
+
+    def indicator_frame(self, config):
+        df = add_indicators_to_data(self.data, config)
+        # Indicator gaps (back-filled here, but not necessarily in a caller's frame) must never trigger a signal
+        for column in df.columns[5:]:
+            df.iloc[100:103, df.columns.get_loc(column)] = np.nan
+        return df
+
+    def test_compiled_plan_matches_the_baseline_interpreter(self):
+        for i, conditions in enumerate(self.CONDITION_SETS):
+            for action in ('LONG', 'SHORT'):
+                for logical_operator in ('AND', 'OR'):
+                    config = {'conditions': conditions, 'action': action, 'logicalOperator': logical_operator,
+                              'exitCondition': {'type': 'manual'}}
+                    with self.subTest(conditions=i, action=action, logical_operator=logical_operator):
+                        df = self.indicator_frame(config)
+                        signals = compile_strategy(config).generate_signals(df)
+                        expected = _baseline_signals(df, config)
+
+                        self.assertEqual(signals.dtype, np.int8)
+                        self.assertTrue(signals.index.equals(expected.index))
+                        names = signals.map(lambda code: SIGNAL_NAMES.get(code, 'HOLD'))
+                        pd.testing.assert_series_equal(names, expected, check_names=False, check_dtype=False)
+                        pd.testing.assert_series_equal(generate_signals(df, config), signals)
+
+        # The data moves the plans in and out of their entry signal
+        config = {'conditions': self.CONDITION_SETS[0], 'action': 'SHORT', 'exitCondition': {'type': 'manual'}}
+        signals = compile_strategy(config).generate_signals(self.indicator_frame(config)).to_numpy()
+        self.assertGreater(np.count_nonzero(np.diff(signals)), 10)
+        self.assertTrue((signals == SIGNAL_HOLD).any())
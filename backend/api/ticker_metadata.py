@@ -0,0 +1,115 @@
+# backend/api/ticker_metadata.py
+import threading
+from datetime import date, datetime, timedelta
+
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from .bar_store import get_bar_store
+from .models import TickerMetadata
+
+# Start of the history window loaded when a ticker's daily range is first requested (see probe_start)
+HISTORY_START = '2020-01-01'
+
+# Series with a background refresh running in this process
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _series_key(ticker: str) -> str:
+    return ticker.strip().upper()
+
+
+def _to_date(value) -> date:
+    return datetime.fromisoformat(value).date() if value else None
+
+
+def record_ticker_metadata(ticker: str, timeframe: str, probed: bool = False) -> TickerMetadata:
+    """
+    Copy the bar store summary of a series into the metadata index.
+
+    Called after every market data fetch. probed=True marks that the probe's
+    history window was loaded, so the row describes everything available rather
+    than only the ranges backtests happened to request. Database errors are
+    logged, never raised: the fetch itself already succeeded. The returned row
+    is unsaved in that case.
+    """
+    summary = get_bar_store().describe(ticker, timeframe)
+    values = {
+        'first_date': _to_date(summary.get('first')),
+        'last_date': _to_date(summary.get('last')),
+        'bar_count': summary.get('count') or 0,
+        'source': summary.get('source') or '',
+    }
+    if probed:
+        values['probed_at'] = timezone.now()
+    try:
+        metadata, _ = TickerMetadata.objects.update_or_create(
+            ticker=_series_key(ticker), timeframe=timeframe, defaults=values
+        )
+    except DatabaseError as e:
+        print(f"Ticker metadata: could not record {ticker} {timeframe}: {str(e)}")
+        metadata = TickerMetadata(ticker=_series_key(ticker), timeframe=timeframe, **values)
+    return metadata
+
+
+def probe_start(timeframe: str) -> str:
+    """
+    First day a probe loads: HISTORY_START for daily bars, and for intraday
+    bars the oldest day yfinance still serves. Older intraday bars only come
+    from rate-limited Polygon, so probes leave them to the backtests that ask
+    for them (their fetches extend first_date too).
+    """
+    from .market_data import YFINANCE_INTRADAY_LOOKBACK_DAYS
+    lookback_days = YFINANCE_INTRADAY_LOOKBACK_DAYS.get(timeframe)
+    if lookback_days is None:
+        return HISTORY_START
+    return max(HISTORY_START, (date.today() - timedelta(days=lookback_days)).isoformat())
+
+
+def probe_ticker_metadata(ticker: str, timeframe: str) -> TickerMetadata:
+    """Load the history window from probe_start() (only the days not stored yet reach a provider) and record it as probed."""
+    from .market_data import fetch_market_data
+    end = date.today().isoformat()
+    fetch_market_data(ticker, probe_start(timeframe), end, timeframe)
+    return record_ticker_metadata(ticker, timeframe, probed=True)
+
+
+def _refresh(ticker: str, timeframe: str) -> None:
+    try:
+        probe_ticker_metadata(ticker, timeframe)
+    except Exception as e:
+        print(f"Ticker metadata: background refresh of {ticker} {timeframe} failed: {str(e)}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard((_series_key(ticker), timeframe))
+        # Threads don't get Django's end-of-request cleanup
+        connection.close()
+
+
+def _start_refresh(ticker: str, timeframe: str) -> None:
+    key = (_series_key(ticker), timeframe)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh, args=(ticker, timeframe), daemon=True).start()
+
+
+def get_ticker_metadata(ticker: str, timeframe: str, max_age: timedelta) -> TickerMetadata:
+    """
+    Available range of a ticker from the metadata index.
+
+    A series that was never probed is loaded now. A probe older than max_age is
+    answered from the index straight away while a background thread refreshes
+    it, at most one refresh per series at a time.
+    """
+    metadata = TickerMetadata.objects.filter(
+        ticker=_series_key(ticker), timeframe=timeframe, probed_at__isnull=False
+    ).first()
+    if metadata is None:
+        return probe_ticker_metadata(ticker, timeframe)
+
+    if timezone.now() - metadata.probed_at > max_age:
+        _start_refresh(ticker, timeframe)
+    return metadata
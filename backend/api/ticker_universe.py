@@ -0,0 +1,27 @@
+# backend/api/ticker_universe.py
+
+# Tickers offered in the backtester, by category.
+# Mirrors frontend/src/components/backtester/tickerData.ts; keep the two in sync.
+TICKER_UNIVERSE = {
+    'Technology': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'NFLX', 'AMD', 'CRM', 'ADBE', 'INTC', 'ORCL', 'CSCO', 'IBM', 'VZ', 'T'],
+    'Financial': ['JPM', 'BAC', 'WFC', 'GS', 'MS', 'BRK-B', 'V', 'MA'],
+    'Healthcare': ['JNJ', 'PFE', 'UNH', 'ABBV', 'TMO'],
+    'Consumer': ['KO', 'PG', 'WMT', 'HD', 'DIS'],
+    'Energy': ['XOM', 'CVX', 'COP'],
+    'Industrial': ['BA', 'CAT', 'GE'],
+    'ETF': ['SPY', 'QQQ', 'IWM', 'VTI', 'VOO', 'ARKK'],
+    'Cryptocurrency': ['BTCUSD', 'ETHUSD', 'SOLUSD', 'ADAUSD', 'DOTUSD'],
+}
+
+
+def universe_tickers(categories=None) -> list:
+    """Tickers of the universe in order, optionally limited to some categories."""
+    if categories is not None:
+        unknown = [category for category in categories if category not in TICKER_UNIVERSE]
+        if unknown:
+            raise ValueError(f"Unknown categories: {unknown}. Must be among {list(TICKER_UNIVERSE)}")
+    tickers = []
+    for category, symbols in TICKER_UNIVERSE.items():
+        if categories is None or category in categories:
+            tickers.extend(symbol for symbol in symbols if symbol not in tickers)
+    return tickers
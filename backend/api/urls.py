@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegisterView, ProfileView, StrategyViewSet, BacktestView, DateRangeView
+from .views import RegisterView, ProfileView, StrategyViewSet, BacktestView, SweepView, WalkForwardView, MonteCarloView, BatchBacktestView, BacktestJobListView, BacktestJobDetailView, DateRangeView, MetricsView
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -15,5 +15,12 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('backtest/', BacktestView.as_view(), name='backtest'),
+    path('backtest/sweep/', SweepView.as_view(), name='backtest-sweep'),
+    path('backtest/walk-forward/', WalkForwardView.as_view(), name='backtest-walk-forward'),
+    path('backtest/monte-carlo/', MonteCarloView.as_view(), name='backtest-monte-carlo'),
+    path('backtest/batch/', BatchBacktestView.as_view(), name='backtest-batch'),
+    path('backtest/jobs/', BacktestJobListView.as_view(), name='backtest-jobs'),
+    path('backtest/jobs/<int:pk>/', BacktestJobDetailView.as_view(), name='backtest-job-detail'),
     path('date-range/', DateRangeView.as_view(), name='date-range'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -1,10 +1,6 @@
-import os
-from polygon import RESTClient
-from datetime import datetime
-import pandas as pd
-import yfinance as yf  # Add yfinance as fallback
-from alpha_vantage.timeseries import TimeSeries
-import numpy as np
+import hmac
+import logging
+from datetime import timedelta
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -12,240 +8,26 @@ from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import generics
+from rest_framework.settings import api_settings
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Strategy
-from .serializers import UserSerializer, StrategySerializer
-from .backtester import run_backtest
-
-def fetch_data_from_polygon(ticker, start_date, end_date, timeframe):
-    """Fetch data from Polygon.io"""
-    api_key = os.environ.get("POLYGON_API_KEY")
-    if not api_key:
-        raise ValueError("Polygon API key not configured")
-    
-    client = RESTClient(api_key)
-    
-    # Map frontend timeframe to Polygon's 'timespan'
-    timespan_map = {'5m': 'minute', '15m': 'minute', '1h': 'hour', '1d': 'day'}
-    multiplier_map = {'5m': 5, '15m': 15, '1h': 1, '1d': 1}
-    
-    # Handle crypto tickers for Polygon
-    polygon_ticker = ticker.upper()
-    if ticker.endswith('USD') and len(ticker) > 3:  # Crypto ticker
-        polygon_ticker = f"X:{ticker.upper()}"  # Polygon crypto format
-    
-    aggs = client.get_aggs(
-        ticker=polygon_ticker,
-        multiplier=multiplier_map.get(timeframe, 1),
-        timespan=timespan_map.get(timeframe, 'day'),
-        from_=start_date,
-        to=end_date,
-        limit=50000
-    )
-    
-    if not aggs:
-        raise ValueError(f"No data found for {ticker}")
-    
-    # Convert to DataFrame
-    data = pd.DataFrame(aggs)
-    data['time'] = pd.to_datetime(data['timestamp'], unit='ms')
-    data.set_index('time', inplace=True)
-    
-    # Standardize column names
-    column_mapping = {
-        'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'v': 'Volume',
-        'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume',
-        'O': 'Open', 'H': 'High', 'L': 'Low', 'C': 'Close', 'V': 'Volume'
-    }
-    
-    existing_columns = list(data.columns)
-    for old_col, new_col in column_mapping.items():
-        if old_col in existing_columns:
-            data.rename(columns={old_col: new_col}, inplace=True)
-    
-    # Keep only the required OHLCV columns
-    required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-    available_columns = [col for col in required_columns if col in data.columns]
-    
-    if len(available_columns) < 5:
-        raise ValueError(f"Missing required columns. Available: {available_columns}, Required: {required_columns}")
-    
-    # Select only the required columns
-    data = data[available_columns]
-    
-    # Add data range info
-    data_range_info = {
-        'requested_start': start_date,
-        'requested_end': end_date,
-        'actual_start': data.index.min().strftime('%Y-%m-%d'),
-        'actual_end': data.index.max().strftime('%Y-%m-%d'),
-        'data_points': len(data),
-        'source': 'polygon'
-    }
-    
-    return data, data_range_info
-
-def fetch_data_from_alpha_vantage(ticker, start_date, end_date, timeframe):
-    """Fetch data from Alpha Vantage"""
-    try:
-        api_key = os.environ.get("ALPHA_VANTAGE_API_KEY")
-        if not api_key:
-            raise ValueError("Alpha Vantage API key not configured")
-        
-        ts = TimeSeries(key=api_key, output_format='pandas')
-        
-        # Handle crypto tickers for Alpha Vantage
-        alpha_ticker = ticker
-        if ticker.endswith('USD') and len(ticker) > 3:  # Crypto ticker
-            alpha_ticker = f"{ticker}"  # Alpha Vantage crypto format
-        
-        # Map timeframe to Alpha Vantage function
-        if timeframe == '1d':
-            # Get daily data
-            data, meta_data = ts.get_daily(symbol=alpha_ticker, outputsize='full')
-        elif timeframe in ['5m', '15m', '1h']:
-            # Get intraday data (Alpha Vantage has 1min, 5min, 15min, 30min, 60min)
-            interval_map = {'5m': '5min', '15m': '15min', '1h': '60min'}
-            interval = interval_map.get(timeframe, '60min')
-            data, meta_data = ts.get_intraday(symbol=alpha_ticker, interval=interval, outputsize='full')
-        else:
-            raise ValueError(f"Unsupported timeframe for Alpha Vantage: {timeframe}")
-        
-        if data.empty:
-            raise ValueError(f"No data found for {ticker}")
-        
-        # Standardize Alpha Vantage columns to Open, High, Low, Close, Volume
-        av_column_mapping = {
-            '1. open': 'Open',
-            '2. high': 'High',
-            '3. low': 'Low',
-            '4. close': 'Close',
-            '5. volume': 'Volume',
-            'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
-        }
-        data.rename(columns=av_column_mapping, inplace=True)
-        
-        # Alpha Vantage returns data in reverse chronological order (newest first)
-        # Sort to chronological order (oldest first) for proper backtesting
-        data = data.sort_index()
-        
-        # Filter by date range
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
-        data = data[(data.index >= start_dt) & (data.index <= end_dt)]
-        
-        if data.empty:
-            raise ValueError(f"No data found for {ticker} in the specified date range")
-        
-        # Add data range info
-        data_range_info = {
-            'requested_start': start_date,
-            'requested_end': end_date,
-            'actual_start': data.index.min().strftime('%Y-%m-%d'),
-            'actual_end': data.index.max().strftime('%Y-%m-%d'),
-            'data_points': len(data),
-            'source': 'alpha_vantage'
-        }
-        
-        return data, data_range_info
-        
-    except Exception as e:
-        raise ValueError(f"Alpha Vantage error: {str(e)}")
-
-def fetch_data_from_yfinance(ticker, start_date, end_date, timeframe):
-    """Fetch data from yfinance as primary source"""
-    try:
-        # Handle crypto tickers for yfinance
-        yfinance_ticker = ticker
-        if ticker.endswith('USD') and len(ticker) > 3:  # Crypto ticker
-            yfinance_ticker = f"{ticker}-USD"  # yfinance crypto format
-        
-        # Download data from yfinance
-        ticker_obj = yf.Ticker(yfinance_ticker)
-        
-        # Map timeframe to yfinance interval
-        # Frontend sends: '5m', '15m', '1h', '1d'
-        # yfinance expects: '5m', '15m', '1h', '1d'
-        interval_map = {'5m': '5m', '15m': '15m', '1h': '1h', '1d': '1d'}
-        interval = interval_map.get(timeframe, '1d')
-        
-        print(f"yfinance: Using interval '{interval}' for timeframe '{timeframe}'")
-        
-        # For intraday data, we need to limit the period
-        if timeframe in ['5m', '15m', '1h']:
-            # yfinance has limits for intraday data
-            data = ticker_obj.history(period="60d", interval=interval)
-        else:
-            # For daily data, yfinance can handle much longer periods
-            # Convert dates to datetime for better handling
-            start_dt = pd.to_datetime(start_date)
-            end_dt = pd.to_datetime(end_date)
-            
-            # yfinance can handle very long periods, up to decades
-            data = ticker_obj.history(start=start_dt, end=end_dt, interval=interval)
-        
-        if data.empty:
-            raise ValueError(f"No data found for {ticker}")
-        
-        # yfinance already has the correct column names (Open, High, Low, Close, Volume)
-        
-        # Add data range info
-        data_range_info = {
-            'requested_start': start_date,
-            'requested_end': end_date,
-            'actual_start': data.index.min().strftime('%Y-%m-%d'),
-            'actual_end': data.index.max().strftime('%Y-%m-%d'),
-            'data_points': len(data),
-            'source': 'yfinance'
-        }
-        
-        return data, data_range_info
-        
-    except Exception as e:
-        raise ValueError(f"yfinance error: {str(e)}")
-
-def fetch_market_data(ticker, start_date, end_date, timeframe):
-    """Fetch market data with multiple sources: yfinance > Polygon > Alpha Vantage"""
-    errors = []
-    
-    # Try yfinance first (best historical data coverage, free, no API key required)
-    try:
-        print(f"Attempting to fetch data from yfinance for {ticker}")
-        data, data_range_info = fetch_data_from_yfinance(ticker, start_date, end_date, timeframe)
-        print(f"Successfully fetched data from yfinance: {data.shape}")
-        return data, data_range_info
-    except Exception as e:
-        error_msg = f"yfinance failed: {str(e)}"
-        print(error_msg)
-        errors.append(error_msg)
-    
-    # Try Polygon second (professional-grade, reliable when API key is configured)
-    try:
-        print(f"Attempting to fetch data from Polygon for {ticker}")
-        data, data_range_info = fetch_data_from_polygon(ticker, start_date, end_date, timeframe)
-        print(f"Successfully fetched data from Polygon: {data.shape}")
-        return data, data_range_info
-    except Exception as e:
-        error_msg = f"Polygon failed: {str(e)}"
-        print(error_msg)
-        errors.append(error_msg)
-    
-    # Fallback to Alpha Vantage (reliable, good historical data, free tier)
-    try:
-        print(f"Attempting to fetch data from Alpha Vantage for {ticker}")
-        data, data_range_info = fetch_data_from_alpha_vantage(ticker, start_date, end_date, timeframe)
-        print(f"Successfully fetched data from Alpha Vantage: {data.shape}")
-        return data, data_range_info
-    except Exception as e:
-        error_msg = f"Alpha Vantage failed: {str(e)}"
-        print(error_msg)
-        errors.append(error_msg)
-    
-    # If all failed
-    raise ValueError(f"All data sources failed. Errors: {'; '.join(errors)}")
+from django.http import HttpResponse
+from .models import Strategy, BacktestJob
+from .serializers import UserSerializer, StrategySerializer, BacktestJobSerializer, BacktestJobListSerializer
+from .ticker_metadata import get_ticker_metadata
+from .pipeline import BacktestRequestError, parse_backtest_params, get_user_strategy, load_backtest_data
+from .sweep import run_parameter_sweep
+from .walk_forward import run_walk_forward
+from .monte_carlo import run_monte_carlo, trade_returns
+from .batch import parse_tickers, run_batch_backtest
+from .renderers import MsgPackRenderer
+from .result_cache import cached_run_backtest
+from .instrumentation import StageTimings, get_stage_metrics
+from .provider_clients import get_provider_clients
+from .strategy_plan import get_strategy_plan
 
-# ... (The rest of your views: RegisterView, ProfileView, StrategyViewSet, etc.) ...
+logger = logging.getLogger(__name__)
 
 
 class RegisterView(generics.CreateAPIView):
@@ -302,169 +84,51 @@ class StrategyViewSet(viewsets.ModelViewSet):
 
 class BacktestView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [MsgPackRenderer]
 
     def post(self, request, *args, **kwargs):
-        try:
-            strategy_id = request.data.get('strategy_id')
-            ticker = request.data.get('ticker', 'AAPL')
-            start_date = request.data.get('start_date', '2022-01-01')
-            end_date = request.data.get('end_date', '2023-01-01')
-            timeframe = request.data.get('timeframe', 'day') # Polygon uses 'day', 'hour', 'minute'
-            cash = int(request.data.get('cash', 10000))
-            leverage = float(request.data.get('leverage', 1.0))
-
-            # Validate inputs
-            if not strategy_id:
-                return Response({"error": "Strategy ID is required."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            if cash <= 0:
-                return Response({"error": "Initial cash must be positive."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            if leverage < 1.0 or leverage > 10.0:
-                return Response({"error": "Leverage must be between 1x and 10x."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            if not ticker or not ticker.strip():
-                return Response({"error": "Ticker symbol is required."}, status=status.HTTP_400_BAD_REQUEST)
-
-            try:
-                strategy = Strategy.objects.get(id=strategy_id, user=request.user)
-            except Strategy.DoesNotExist:
-                return Response({"error": "Strategy not found."}, status=status.HTTP_404_NOT_FOUND)
+        """
+        Run a backtest and return its results.
 
-            # --- DATA FETCHING WITH FALLBACK STRATEGY ---
+        JSON is the default. Clients that accept application/msgpack get the
+        columnar format instead: epoch-ms timestamps and float64 values as typed arrays.
+        With 'timings': true the response also carries per-stage timings and a
+        Server-Timing header.
+        """
+        self.timings = StageTimings()
+        try:
             try:
-                data, data_range_info = fetch_market_data(ticker, start_date, end_date, timeframe)
-                
-                # Debug: Print the actual columns we received
-                print(f"Debug: Data columns: {list(data.columns)}")
-                print(f"Debug: Data shape: {data.shape}")
-                print(f"Debug: Sample data:\n{data.head()}")
-                print(f"Debug: Data source: {data_range_info.get('source', 'unknown')}")
-                
-                # Check if we have the required 'Close' column
-                if 'Close' not in data.columns:
-                    available_columns = list(data.columns)
-                    return Response({
-                        "error": f"Data format error: 'Close' column not found. Available columns: {available_columns}. Please check your data source."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Ensure we have all required columns
-                required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-                missing_columns = [col for col in required_columns if col not in data.columns]
-                if missing_columns:
-                    return Response({
-                        "error": f"Missing required columns: {missing_columns}. Available columns: {list(data.columns)}"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Validate data quality
-                if data.empty:
-                    return Response({"error": f"No valid data found for {ticker} in the specified date range."}, status=status.HTTP_400_BAD_REQUEST)
-                
-                if len(data) < 30:  # Need at least 30 data points for indicators
-                    return Response({"error": f"Insufficient data for {ticker}. Need at least 30 data points, got {len(data)}."}, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Check if the requested date range matches the available data range
-                requested_start = pd.to_datetime(start_date)
-                requested_end = pd.to_datetime(end_date)
-                actual_start = pd.to_datetime(data_range_info['actual_start'])
-                actual_end = pd.to_datetime(data_range_info['actual_end'])
-
-                # Calculate the coverage of the requested range
-                requested_days = (requested_end - requested_start).days
-                actual_days = (actual_end - actual_start).days
-                
-                # Debug logging
-                print(f"Debug: Requested range: {start_date} to {end_date} ({requested_days} days)")
-                print(f"Debug: Actual data range: {data_range_info['actual_start']} to {data_range_info['actual_end']} ({actual_days} days)")
-                
-                # Calculate what percentage of the requested range we actually have
-                # We'll consider it a full range if we have at least 80% of the requested days
-                # and the actual range overlaps significantly with the requested range
-                coverage_threshold = 0.8  # 80% coverage
-                
-                # Check if the actual range significantly overlaps with the requested range
-                overlap_start = max(requested_start, actual_start)
-                overlap_end = min(requested_end, actual_end)
-                overlap_days = max(0, (overlap_end - overlap_start).days)
-                
-                # Calculate coverage percentage
-                coverage_percentage = overlap_days / requested_days if requested_days > 0 else 0
-                
-                # Debug logging
-                print(f"Debug: Overlap: {overlap_start} to {overlap_end} ({overlap_days} days)")
-                print(f"Debug: Coverage percentage: {coverage_percentage:.1%}")
-                
-                # Determine if this is a significant portion of the requested range
-                is_significant_coverage = coverage_percentage >= coverage_threshold
-                
-                # Check if we have limited overlap with the requested range
-                # This should be based on overlap, not total actual days
-                is_limited_data = overlap_days < (requested_days * 0.5)  # Less than 50% overlap
-                
-                if is_limited_data or not is_significant_coverage:
-                    # Check if there's no overlap at all
-                    if overlap_days == 0:
-                        message = f"⚠️ No data available for requested range. You requested {start_date} to {end_date}, but data is only available from {data_range_info['actual_start']} to {data_range_info['actual_end']} for {ticker}."
-                    else:
-                        message = f"⚠️ Limited data available for requested range. You requested {start_date} to {end_date} ({requested_days} days), but only {overlap_days} days overlap with available data from {data_range_info['actual_start']} to {data_range_info['actual_end']} for {ticker}."
-                    
-                    data_range_message = {
-                        'warning': True,
-                        'message': message,
-                        'requested_range': f"{start_date} to {end_date}",
-                        'available_range': f"{data_range_info['actual_start']} to {data_range_info['actual_end']}",
-                        'data_points': data_range_info['data_points'],
-                        'data_source': data_range_info['source'],
-                        'coverage_percentage': round(coverage_percentage * 100, 1),
-                        'overlap_days': overlap_days
-                    }
-                elif coverage_percentage >= 0.95:  # 95% or more coverage
-                    data_range_message = {
-                        'warning': False,
-                        'message': f"✅ Full data range available: {start_date} to {end_date}",
-                        'requested_range': f"{start_date} to {end_date}",
-                        'available_range': f"{data_range_info['actual_start']} to {data_range_info['actual_end']}",
-                        'data_points': data_range_info['data_points'],
-                        'data_source': data_range_info['source'],
-                        'coverage_percentage': round(coverage_percentage * 100, 1)
-                    }
-                else:
-                    data_range_message = {
-                        'warning': False,
-                        'message': f"📊 Partial data range available: {data_range_info['actual_start']} to {data_range_info['actual_end']} (requested {start_date} to {end_date})",
-                        'requested_range': f"{start_date} to {end_date}",
-                        'available_range': f"{data_range_info['actual_start']} to {data_range_info['actual_end']}",
-                        'data_points': data_range_info['data_points'],
-                        'data_source': data_range_info['source'],
-                        'coverage_percentage': round(coverage_percentage * 100, 1)
-                    }
+                params = parse_backtest_params(request.data)
+                self.report_timings = bool(request.data.get('timings', False))
+                strategy = get_user_strategy(request.user, params['strategy_id'])
 
-            except Exception as e:
-                error_msg = str(e)
-                if "API key" in error_msg.lower():
-                    return Response({"error": "Invalid API key. Please check your Alpha Vantage or Polygon API configuration."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                elif "not found" in error_msg.lower() or "invalid" in error_msg.lower():
-                    return Response({"error": f"Invalid ticker symbol: {ticker}. Please check the symbol and try again."}, status=status.HTTP_400_BAD_REQUEST)
-                else:
-                    return Response({"error": f"Could not fetch market data from Polygon, yfinance, or Alpha Vantage: {error_msg}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                # --- DATA FETCHING WITH FALLBACK STRATEGY ---
+                with self.timings.stage('fetch') as stage:
+                    data, data_range_message = load_backtest_data(params['ticker'], params['start_date'], params['end_date'], params['timeframe'])
+                    stage['rows'] = len(data)
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
 
             # --- RUN THE BACKTESTING ENGINE ---
             try:
-                results = run_backtest(data, strategy.configuration, cash, leverage)
+                results = cached_run_backtest(
+                    data, strategy.configuration, params['cash'], params['leverage'], params['engine'],
+                    max_points=params['max_points'], downsample=params['downsample'],
+                    rolling_window=params['rolling_window'],
+                    columnar=request.accepted_renderer.format == MsgPackRenderer.format,
+                    strategy_id=strategy.id, timings=self.timings, plan=get_strategy_plan(strategy)
+                )
                 
                 # Check if backtest returned an error
                 if 'error' in results:
-                    print(f"Error: {results['error']}")
+                    logger.warning("Backtest of strategy %s failed: %s", strategy.id, results['error'])
                     return Response({"error": results['error']}, status=status.HTTP_400_BAD_REQUEST)
                 
-                if 'Equity Final [$]' not in results:
-                    print("Warning: 'Equity Final [$]' not found in results. This might indicate no trades were made.")
-                    print("Full results:", results)
-                else:
-                    print(results)
-                
                 # Add data range information to the response
                 results['data_range_info'] = data_range_message
+                if self.report_timings:
+                    # Serialization happens after this, so it is only in the Server-Timing header
+                    results['timings'] = self.timings.as_dict()
                 return Response(results, status=status.HTTP_200_OK)
                 
             except Exception as e:
@@ -473,6 +137,306 @@ class BacktestView(APIView):
         except Exception as e:
             return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Render the response as a timed 'serialization' stage and record the stages in the metrics."""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timings = getattr(self, 'timings', None)
+        if timings is None:  # Rejected before post() ran, e.g. not authenticated
+            return response
+
+        with timings.stage('serialization') as stage:
+            response.render()
+            stage['rows'] = len(response.content)
+        outcome = 'success' if response.status_code < 400 else 'client_error' if response.status_code < 500 else 'server_error'
+        get_stage_metrics().observe(timings, outcome)
+        if getattr(self, 'report_timings', False):
+            response['Server-Timing'] = timings.server_timing()
+        return response
+
+
+class SweepView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Backtest a saved strategy over a grid of parameter values.
+
+        'ranges' maps a parameter path (conditions.<i>.value, conditions.<i>.compareValue,
+        exitCondition.value, exitCondition.timePeriod or leverage) to a list of values
+        or a {start, stop, step} object. Results are ranked by 'rank_by'.
+        """
+        try:
+            try:
+                params = parse_backtest_params(request.data)
+                top = int(request.data.get('top', 50))
+                if top < 1:
+                    raise ValueError
+                # A sweep never has more results than combinations
+                top = min(top, settings.SWEEP_MAX_COMBINATIONS)
+                strategy = get_user_strategy(request.user, params['strategy_id'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+            except (TypeError, ValueError):
+                return Response({"error": "top must be a positive whole number."}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                data, data_range_message = load_backtest_data(params['ticker'], params['start_date'], params['end_date'], params['timeframe'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+
+            try:
+                sweep = run_parameter_sweep(
+                    data,
+                    strategy.configuration,
+                    request.data.get('ranges'),
+                    params['cash'],
+                    params['leverage'],
+                    params['engine'],
+                    rank_by=request.data.get('rank_by', 'return'),
+                    max_combinations=settings.SWEEP_MAX_COMBINATIONS,
+                )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            sweep['results'] = sweep['results'][:top]
+            sweep['data_range_info'] = data_range_message
+            return Response(sweep, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class WalkForwardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Walk-forward optimization of a saved strategy.
+
+        Takes the sweep fields plus 'train_bars' and 'test_bars' (window lengths in
+        bars), an optional 'step_bars' (defaults to test_bars) and 'anchored' to
+        keep every train window starting at the first bar.
+        """
+        try:
+            try:
+                params = parse_backtest_params(request.data)
+                train_bars = int(request.data.get('train_bars', 0))
+                test_bars = int(request.data.get('test_bars', 0))
+                step_bars = int(request.data['step_bars']) if request.data.get('step_bars') else None
+                strategy = get_user_strategy(request.user, params['strategy_id'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+            except (TypeError, ValueError):
+                return Response({"error": "train_bars, test_bars and step_bars must be whole numbers."}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                data, data_range_message = load_backtest_data(params['ticker'], params['start_date'], params['end_date'], params['timeframe'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+
+            try:
+                result = run_walk_forward(
+                    data,
+                    strategy.configuration,
+                    request.data.get('ranges'),
+                    params['cash'],
+                    train_bars,
+                    test_bars,
+                    step_bars,
+                    anchored=bool(request.data.get('anchored', False)),
+                    leverage=params['leverage'],
+                    engine=params['engine'],
+                    rank_by=request.data.get('rank_by', 'return'),
+                    max_combinations=settings.SWEEP_MAX_COMBINATIONS,
+                    max_windows=settings.WALK_FORWARD_MAX_WINDOWS,
+                )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            result['data_range_info'] = data_range_message
+            return Response(result, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MonteCarloView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Monte Carlo robustness analysis of a backtest's closed trades.
+
+        Takes the backtest fields plus 'simulations', 'method' ('bootstrap' or
+        'permutation'), 'ruin_drawdown_pct' and an optional 'seed'. The backtest
+        itself comes from the result cache when it has been run before.
+        """
+        try:
+            try:
+                params = parse_backtest_params(request.data)
+                simulations = int(request.data.get('simulations', 1000))
+                ruin_drawdown_pct = float(request.data.get('ruin_drawdown_pct', 50))
+                seed = int(request.data['seed']) if request.data.get('seed') is not None else None
+                strategy = get_user_strategy(request.user, params['strategy_id'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+            except (TypeError, ValueError):
+                return Response({"error": "simulations, ruin_drawdown_pct and seed must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+
+            if simulations > settings.MONTE_CARLO_MAX_SIMULATIONS:
+                return Response({"error": f"At most {settings.MONTE_CARLO_MAX_SIMULATIONS} simulations are allowed."}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                data, data_range_message = load_backtest_data(params['ticker'], params['start_date'], params['end_date'], params['timeframe'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+
+            results = cached_run_backtest(
+                data, strategy.configuration, params['cash'], params['leverage'], params['engine'],
+                columnar=True, strategy_id=strategy.id, plan=get_strategy_plan(strategy)
+            )
+            if 'error' in results:
+                return Response({"error": results['error']}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                analysis = run_monte_carlo(
+                    trade_returns(results),
+                    params['cash'],
+                    simulations,
+                    request.data.get('method', 'bootstrap'),
+                    ruin_drawdown_pct,
+                    seed,
+                )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            analysis['data_range_info'] = data_range_message
+            return Response(analysis, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchBacktestView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Backtest a saved strategy over a list of tickers in one request.
+
+        Takes the usual backtest fields with 'tickers' (a list) in place of 'ticker'.
+        Set 'include_details' to also return each ticker's plot data and trades.
+        """
+        try:
+            try:
+                params = parse_backtest_params(request.data)
+                tickers = parse_tickers(request.data.get('tickers'), settings.BATCH_MAX_TICKERS)
+                strategy = get_user_strategy(request.user, params['strategy_id'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                batch = run_batch_backtest(
+                    tickers,
+                    strategy.configuration,
+                    params['start_date'],
+                    params['end_date'],
+                    params['timeframe'],
+                    params['cash'],
+                    params['leverage'],
+                    params['engine'],
+                    include_details=bool(request.data.get('include_details', False)),
+                    max_points=params['max_points'],
+                    downsample=params['downsample'],
+                    plan=get_strategy_plan(strategy),
+                )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response(batch, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BacktestJobListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """List the user's backtest jobs, newest first, without their results."""
+        jobs = BacktestJob.objects.filter(user=request.user)
+        job_status = request.query_params.get('status')
+        if job_status:
+            jobs = jobs.filter(status=job_status)
+        serializer = BacktestJobListSerializer(jobs[:100], many=True)
+        return Response(serializer.data)
+
+    def post(self, request, *args, **kwargs):
+        """
+        Queue a backtest to run on a background worker.
+
+        Takes the same fields as the backtest endpoint and returns the job id
+        straight away; poll the job endpoint for its status and result.
+        """
+        try:
+            try:
+                params = parse_backtest_params(request.data)
+                strategy = get_user_strategy(request.user, params['strategy_id'])
+            except BacktestRequestError as e:
+                return Response({"error": e.message}, status=e.status_code)
+
+            pending = BacktestJob.objects.filter(
+                user=request.user, status__in=[BacktestJob.STATUS_QUEUED, BacktestJob.STATUS_RUNNING]
+            ).count()
+            if pending >= settings.BACKTEST_JOB_MAX_PENDING:
+                return Response(
+                    {"error": f"You already have {pending} backtests waiting to run. Please wait for them to finish."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+
+            # Snapshot the configuration so later edits to the strategy don't change a queued run
+            job = BacktestJob.objects.create(
+                user=request.user,
+                strategy=strategy,
+                parameters={**params, 'configuration': strategy.configuration},
+            )
+            return Response({"job_id": job.id, "status": job.status}, status=status.HTTP_202_ACCEPTED)
+
+        except Exception as e:
+            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BacktestJobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """Return a job's status, and its result or error once it has finished."""
+        try:
+            job = BacktestJob.objects.get(id=pk, user=request.user)
+        except BacktestJob.DoesNotExist:
+            return Response({"error": "Backtest job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(BacktestJobSerializer(job).data)
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint for the backtest stage and provider connection metrics of this process."""
+    # The metrics token is not a JWT, so skip JWT authentication entirely
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        # The token is the only way in, so without one the endpoint stays closed
+        if not settings.METRICS_TOKEN:
+            return Response({"error": "Metrics are disabled; set METRICS_TOKEN to enable them."}, status=status.HTTP_403_FORBIDDEN)
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return Response({"error": "Invalid or missing metrics token."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        body = get_stage_metrics().render() + get_provider_clients().render()
+        return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
 
 class DateRangeView(APIView):
     permission_classes = [IsAuthenticated]
@@ -486,22 +450,22 @@ class DateRangeView(APIView):
             if not ticker:
                 return Response({"error": "Ticker symbol is required."}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Try to get a sample of data to determine available range
-            # Use a wide date range to see what's actually available
-            sample_start = '2020-01-01'
-            sample_end = datetime.now().strftime('%Y-%m-%d')
-            
+            # Answer from the metadata index; only a never-seen ticker waits for a provider
             try:
-                data, data_range_info = fetch_market_data(ticker, sample_start, sample_end, timeframe)
-                
+                metadata = get_ticker_metadata(ticker, timeframe, timedelta(hours=settings.TICKER_METADATA_MAX_AGE_HOURS))
+                if not metadata.bar_count:
+                    raise ValueError(f"No data found for {ticker}")
+                available_start = metadata.first_date.isoformat()
+                available_end = metadata.last_date.isoformat()
+
                 return Response({
                     'ticker': ticker,
                     'timeframe': timeframe,
-                    'available_start': data_range_info['actual_start'],
-                    'available_end': data_range_info['actual_end'],
-                    'data_points': data_range_info['data_points'],
-                    'data_source': data_range_info['source'],
-                    'message': f"Historical data available for {ticker} from {data_range_info['actual_start']} to {data_range_info['actual_end']} ({data_range_info['data_points']} data points)"
+                    'available_start': available_start,
+                    'available_end': available_end,
+                    'data_points': metadata.bar_count,
+                    'data_source': metadata.source,
+                    'message': f"Historical data available for {ticker} from {available_start} to {available_end} ({metadata.bar_count} data points)"
                 })
                 
             except Exception as e:
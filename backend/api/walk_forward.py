@@ -0,0 +1,169 @@
+# backend/api/walk_forward.py
+import math
+import time
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .backtester import SIMULATION_ENGINES, DEFAULT_ENGINE, validate_strategy_config
+from .indicators import add_indicators_to_data
+from .process_pool import get_process_pool, load_shared_frame, shared_frame
+from .sweep import RANK_KEYS, apply_params, build_grid, evaluate_params, sweep_workers
+
+
+def build_windows(total_bars: int, train_bars: int, test_bars: int, step_bars: int = None,
+                  anchored: bool = False, max_windows: int = 50) -> list:
+    """
+    Split bar positions into (train_start, train_end, test_start, test_end) windows, ends exclusive.
+
+    Rolling windows slide the whole train window forward by step_bars (default
+    test_bars); anchored windows keep the train window starting at the first bar.
+    """
+    step_bars = step_bars or test_bars
+    if train_bars < 2 or test_bars < 2:
+        raise ValueError("Train and test windows must each contain at least 2 bars")
+    if step_bars < 1:
+        raise ValueError("step_bars must be positive")
+    if train_bars + test_bars > total_bars:
+        raise ValueError(f"Train and test windows need {train_bars + test_bars} bars, but only {total_bars} are available")
+
+    windows = []
+    train_end = train_bars
+    while train_end + test_bars <= total_bars:
+        train_start = 0 if anchored else train_end - train_bars
+        windows.append((train_start, train_end, train_end, train_end + test_bars))
+        train_end += step_bars
+
+    if len(windows) > max_windows:
+        raise ValueError(f"Walk-forward has {len(windows)} windows; the maximum is {max_windows}")
+    return windows
+
+
+def _run_chunk(tasks: list, frame_path: str, cash: float, engine: str) -> list:
+    df_with_indicators = load_shared_frame(frame_path)
+    return [
+        (key, evaluate_params(df_with_indicators.iloc[start:end], config, cash, leverage, engine))
+        for key, start, end, config, leverage in tasks
+    ]
+
+
+def _evaluate(frame_path: str, df_with_indicators: pd.DataFrame, tasks: list, cash: float, engine: str, workers: int) -> dict:
+    """Run (key, start, end, config, leverage) tasks serially, or on the shared pool given a frame_path, and return {key: outcome}."""
+    if frame_path is None:
+        return {key: evaluate_params(df_with_indicators.iloc[start:end], config, cash, leverage, engine)
+                for key, start, end, config, leverage in tasks}
+
+    # A few chunks per worker keeps them busy without paying IPC per task
+    chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    outcomes = {}
+    for chunk_outcomes in get_process_pool().map(_run_chunk, chunks, [frame_path] * len(chunks),
+                                                 [cash] * len(chunks), [engine] * len(chunks)):
+        outcomes.update(chunk_outcomes)
+    return outcomes
+
+
+def _date(index: pd.DatetimeIndex, position: int) -> str:
+    return index[position].strftime('%Y-%m-%d %H:%M')
+
+
+def run_walk_forward(data_df: pd.DataFrame, strategy_config: dict, ranges: dict, initial_cash: float,
+                     train_bars: int, test_bars: int, step_bars: int = None, anchored: bool = False,
+                     leverage: float = 1.0, engine: str = None, rank_by: str = 'return', max_workers: int = None,
+                     max_combinations: int = 5000, max_windows: int = 50) -> dict:
+    """
+    Walk-forward optimization over rolling or anchored train/test windows.
+
+    Indicators are calculated once over the full series and sliced per window.
+    Every parameter combination is simulated on each train window, the best one
+    by rank_by is then simulated on the following test window. Both phases run
+    on the shared process pool.
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine not in SIMULATION_ENGINES:
+        raise ValueError(f"Invalid engine: {engine}. Must be one of {list(SIMULATION_ENGINES)}")
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"Invalid rank_by: {rank_by}. Must be one of {list(RANK_KEYS)}")
+
+    validate_strategy_config(strategy_config)
+    grid = build_grid(strategy_config, ranges, max_combinations)
+
+    started = time.perf_counter()
+    df_with_indicators = add_indicators_to_data(data_df, strategy_config)
+    windows = build_windows(len(df_with_indicators), train_bars, test_bars, step_bars, anchored, max_windows)
+
+    variants = [apply_params(strategy_config, leverage, params) for params in grid]
+    train_tasks = [
+        ((w, g), train_start, train_end, config, task_leverage)
+        for w, (train_start, train_end, _, _) in enumerate(windows)
+        for g, (config, task_leverage) in enumerate(variants)
+    ]
+
+    workers = min(max_workers or sweep_workers(), len(train_tasks))
+    with shared_frame(df_with_indicators) if workers > 1 else nullcontext() as frame_path:
+        train_outcomes = _evaluate(frame_path, df_with_indicators, train_tasks, initial_cash, engine, workers)
+
+        best = {}
+        for w in range(len(windows)):
+            ranked = [(g, train_outcomes[(w, g)]) for g in range(len(grid)) if 'error' not in train_outcomes[(w, g)]]
+            if ranked:
+                # Ties go to the earliest combination in the grid
+                best[w] = max(ranked, key=lambda item: item[1][RANK_KEYS[rank_by]])
+
+        test_tasks = [
+            (w, windows[w][2], windows[w][3], variants[g][0], variants[g][1])
+            for w, (g, _) in best.items()
+        ]
+        test_outcomes = _evaluate(frame_path, df_with_indicators, test_tasks, initial_cash, engine, workers)
+
+    index = df_with_indicators.index
+    rows = []
+    for w, (train_start, train_end, test_start, test_end) in enumerate(windows):
+        row = {
+            'window': w + 1,
+            'train_start': _date(index, train_start),
+            'train_end': _date(index, train_end - 1),
+            'test_start': _date(index, test_start),
+            'test_end': _date(index, test_end - 1),
+        }
+        if w not in best:
+            row['error'] = train_outcomes[(w, 0)]['error']
+        else:
+            g, train = best[w]
+            row.update({'params': grid[g], 'train': train, 'test': test_outcomes[w]})
+        rows.append(row)
+
+    return {
+        'windows': rows,
+        'summary': summarize_walk_forward(rows),
+        'combinations': len(grid),
+        'workers': workers,
+        'rank_by': rank_by,
+        'anchored': anchored,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def summarize_walk_forward(rows: list) -> dict:
+    """Aggregate in-sample and out-of-sample results across windows."""
+    completed = [row for row in rows if 'test' in row and 'error' not in row['test']]
+    summary = {'windows': len(rows), 'completed_windows': len(completed)}
+    if not completed:
+        return summary
+
+    train_returns = [row['train']['Return [%]'] for row in completed]
+    test_returns = [row['test']['Return [%]'] for row in completed]
+    # Each test window starts from the initial cash, so chain their returns
+    compounded = math.prod(1 + value / 100 for value in test_returns)
+    average_train = sum(train_returns) / len(train_returns)
+    average_test = sum(test_returns) / len(test_returns)
+    summary.update({
+        'average_train_return_pct': round(average_train, 4),
+        'average_test_return_pct': round(average_test, 4),
+        'compounded_test_return_pct': round((compounded - 1) * 100, 4),
+        'profitable_test_windows': sum(1 for value in test_returns if value > 0),
+        'total_test_trades': sum(row['test']['# Trades'] for row in completed),
+        # Out-of-sample return per unit of in-sample return; near 1 means the optimization generalizes
+        'walk_forward_efficiency': round(average_test / average_train, 4) if average_train > 0 else None,
+    })
+    return summary
@@ -114,6 +114,87 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Local market data store
+# Downloaded OHLCV bars are cached here so repeat backtests don't hit the providers
+
+BAR_STORE_DIR = os.environ.get('BAR_STORE_DIR', os.path.join(BASE_DIR, 'data', 'bars'))
+
+# Market data providers: seconds before a provider counts as failed, seconds before the next provider is
+# hedged in, and consecutive failures after which a provider is skipped for the cool-down
+PROVIDER_DEADLINE_SECONDS = float(os.environ.get('PROVIDER_DEADLINE_SECONDS', 20))
+PROVIDER_HEDGE_DELAY_SECONDS = float(os.environ.get('PROVIDER_HEDGE_DELAY_SECONDS', 3))
+PROVIDER_FAILURE_THRESHOLD = int(os.environ.get('PROVIDER_FAILURE_THRESHOLD', 2))
+PROVIDER_COOLDOWN_SECONDS = float(os.environ.get('PROVIDER_COOLDOWN_SECONDS', 60))
+
+# Requests per minute allowed to each provider (0 for no limit); the defaults fit the free tiers
+PROVIDER_RATE_LIMITS = {
+    'yfinance': float(os.environ.get('YFINANCE_REQUESTS_PER_MINUTE', 60)),
+    'Polygon': float(os.environ.get('POLYGON_REQUESTS_PER_MINUTE', 5)),
+    'Alpha Vantage': float(os.environ.get('ALPHA_VANTAGE_REQUESTS_PER_MINUTE', 5)),
+}
+
+# Intraday windows fetched at once when a long intraday range is loaded (provider rate limits still apply)
+INTRADAY_FETCH_WORKERS = int(os.environ.get('INTRADAY_FETCH_WORKERS', 4))
+
+# Age after which DateRangeView refreshes a ticker's available range in the background
+TICKER_METADATA_MAX_AGE_HOURS = float(os.environ.get('TICKER_METADATA_MAX_AGE_HOURS', 12))
+
+# Idle keep-alive connections kept per provider host, shared by every request in a process
+PROVIDER_HTTP_POOL_SIZE = int(os.environ.get('PROVIDER_HTTP_POOL_SIZE', 10))
+
+# Upper bound for memoized indicator columns shared across backtests in one process
+INDICATOR_CACHE_MAX_MB = int(os.environ.get('INDICATOR_CACHE_MAX_MB', 256))
+
+# Finished backtest results reused for identical reruns (same config, data and run parameters), bounded by
+# entry count and total pickled size
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 256))
+RESULT_CACHE_MAX_MB = int(os.environ.get('RESULT_CACHE_MAX_MB', 256))
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', 3600))
+
+# Worker processes shared by every sweep, walk-forward run and batch in one web process (defaults to the
+# CPU count); concurrent requests queue on this pool instead of starting their own
+BACKTEST_POOL_WORKERS = int(os.environ['BACKTEST_POOL_WORKERS']) if os.environ.get('BACKTEST_POOL_WORKERS') else None
+
+# Parameter sweeps: shared pool processes one sweep spreads its work over (defaults to the whole pool) and
+# the largest grid accepted
+SWEEP_MAX_WORKERS = int(os.environ['SWEEP_MAX_WORKERS']) if os.environ.get('SWEEP_MAX_WORKERS') else None
+SWEEP_MAX_COMBINATIONS = int(os.environ.get('SWEEP_MAX_COMBINATIONS', 5000))
+
+# Walk-forward optimization: most train/test windows per run (sweep settings apply to each train window)
+WALK_FORWARD_MAX_WINDOWS = int(os.environ.get('WALK_FORWARD_MAX_WINDOWS', 50))
+
+# Monte Carlo trade resampling: most simulated equity paths per request
+MONTE_CARLO_MAX_SIMULATIONS = int(os.environ.get('MONTE_CARLO_MAX_SIMULATIONS', 100000))
+
+# Multi-ticker batches: concurrent provider fetches and batch size (backtests run on BACKTEST_POOL_WORKERS)
+BATCH_FETCH_WORKERS = int(os.environ.get('BATCH_FETCH_WORKERS', 8))
+BATCH_MAX_TICKERS = int(os.environ.get('BATCH_MAX_TICKERS', 100))
+
+# Background backtest jobs: worker processes started by run_backtest_workers, queue polling interval,
+# how often a running job's worker records a heartbeat, how long a 'running' job may go without one before
+# it is requeued, and how many unfinished jobs a user may have
+BACKTEST_JOB_WORKERS = int(os.environ.get('BACKTEST_JOB_WORKERS', 2))
+BACKTEST_JOB_POLL_SECONDS = float(os.environ.get('BACKTEST_JOB_POLL_SECONDS', 2))
+BACKTEST_JOB_HEARTBEAT_SECONDS = float(os.environ.get('BACKTEST_JOB_HEARTBEAT_SECONDS', 30))
+BACKTEST_JOB_STALE_MINUTES = float(os.environ.get('BACKTEST_JOB_STALE_MINUTES', 5))
+BACKTEST_JOB_MAX_PENDING = int(os.environ.get('BACKTEST_JOB_MAX_PENDING', 20))
+
+# Bearer token required by the Prometheus /api/metrics/ endpoint; the endpoint is disabled while it is empty
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Trace Python allocations with tracemalloc so backtest stage timings include 'peak_mb'; it slows every
+# allocation down, so it is off unless set to 1 (PYTHONTRACEMALLOC=1 turns it on as well)
+BACKTEST_TRACE_MEMORY = os.environ.get('BACKTEST_TRACE_MEMORY', '0') == '1'
+
+# Level of the api.* loggers; the market data diagnostics of a backtest are logged at DEBUG
+API_LOG_LEVEL = os.environ.get('API_LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'loggers': {'api': {'handlers': ['console'], 'level': API_LOG_LEVEL}},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 